@@ -0,0 +1,307 @@
+"""Async serving mode for the T20 Fantasy Hub API.
+
+An ASGI app (Starlette) that answers the hot read endpoints, the scrape
+endpoints and the standings stream on asyncio — datastore reads through
+db_async.py, Cricinfo fetches through curl_cffi's async session — so slow
+scrapes and MongoDB round trips suspend a request instead of pinning a
+worker thread. Every other route falls through to the Flask app (main.py)
+on a thread pool, so behaviour is identical either way.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 10000 --workers 4
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker --workers 4
+    python asgi.py                  # dev server (with the daily auto-scrape)
+
+ASGI_WSGI_THREADS sizes the pool the Flask routes run on (default 16).
+"""
+
+import asyncio
+import contextlib
+import functools
+import json
+import os
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header, parse_etags
+
+import db_async
+import live_updates
+import main
+import prerender
+import resilience
+import shared_cache
+from calculate_points import recalculate_all
+
+WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", "16"))
+
+
+def _json(data, status=200, headers=None):
+    """JSON response serialized the way Flask's jsonify does (sorted, compact)."""
+    body = json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n"
+    return Response(body, status_code=status, media_type="application/json", headers=headers)
+
+
+def _body_response(body, encoding, status=200, headers=None):
+    """JSON response for an already-encoded body."""
+    headers = dict(headers or {}, Vary="Accept-Encoding")
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, status_code=status, media_type="application/json", headers=headers)
+
+
+def _cached_response(request, slug, name):
+    """Async main._cached_response: a shared-cache body as a response, or None on a miss."""
+    encoding = prerender.pick_encoding(
+        parse_accept_header(request.headers.get("accept-encoding"), Accept))
+    variant = prerender.variant_name(name, encoding)
+    hit = shared_cache.open_body(slug, variant)
+    if hit is None:
+        return None
+    f, version = hit
+    with f:
+        body = f.read()  # tmpfs: a memory copy, not disk I/O
+    etag = shared_cache.body_etag(slug, version, variant)
+    headers = {"X-Data-Version": str(version), "Cache-Control": "no-cache"}
+    if etag is not None:
+        headers["ETag"] = '"{}"'.format(etag)
+        if parse_etags(request.headers.get("if-none-match")).contains(etag):
+            return Response(status_code=304, headers=dict(headers, Vary="Accept-Encoding"))
+    return _body_response(body, encoding, headers=headers)
+
+
+async def _serve_cached(request, slug, name, loader):
+    """Async main._serve_cached: shared cache, then persisted bodies, then *loader*."""
+    resp = _cached_response(request, slug, name)
+    if resp is not None:
+        return resp
+
+    encoding = prerender.pick_encoding(
+        parse_accept_header(request.headers.get("accept-encoding"), Accept))
+    variant = prerender.variant_name(name, encoding)
+    version, bodies = await db_async.get_response_bodies(slug)
+    if variant not in bodies:
+        version = await db_async.get_data_version(slug)  # read before the data
+        payload = await loader(slug)
+        # Compression is CPU-bound; keep it off the event loop
+        bodies = await asyncio.to_thread(prerender.render, {name: payload})
+        if version is None:
+            return _body_response(bodies[variant], encoding)
+    try:
+        shared_cache.publish(slug, version, bodies)
+    except OSError as e:
+        print("Warning: warming shared cache failed: {}".format(e))
+    return _body_response(bodies[variant], encoding, headers={"X-Data-Version": str(version)})
+
+
+def _resilient(handler, cached=None, params=()):
+    """Async main._resilient_read: deadline, shared-cache and stale fallback, circuit breaker."""
+    @functools.wraps(handler)
+    async def wrapper(request):
+        query = main._read_query(request.query_params, params)
+        key = (request.url.path, query, prerender.pick_encoding(
+            parse_accept_header(request.headers.get("accept-encoding"), Accept)))
+        if resilience.breaker.allow():
+            try:
+                with resilience.deadline():
+                    resp = await handler(request)
+            except resilience.DATASTORE_ERRORS as e:
+                resilience.breaker.record_failure()
+                print("Warning: datastore read failed for {}: {}".format(request.url.path, e))
+            else:
+                resilience.breaker.record_success()
+                if resp.status_code == 200 and not isinstance(resp, StreamingResponse):
+                    resilience.keep(key, resp.body, {
+                        h: resp.headers[h] for h in resilience.KEPT_HEADERS if h in resp.headers})
+                return resp
+
+        if cached and not query:
+            resp = _cached_response(request, request.path_params["slug"], cached)
+            if resp is not None:
+                return resp
+        stale = resilience.last_known_good(key)
+        if stale is None:
+            return _json({"error": "Datastore unavailable, try again shortly"}, 503,
+                         headers=resilience.unavailable_headers())
+        body, headers = stale
+        return Response(body, headers=headers)
+    return wrapper
+
+
+# ---------------------------------------------------------------------------
+# Fantasy read endpoints
+# ---------------------------------------------------------------------------
+
+async def fantasy_leaderboard(request):
+    slug = request.path_params["slug"]
+    if not main._read_query(request.query_params, main.LEADERBOARD_PARAMS):
+        return await _serve_cached(request, slug, "leaderboard.json", db_async.get_leaderboard)
+
+    query, error = main._parse_leaderboard_args(request.query_params)
+    if error:
+        return _json(*error)
+    rows = await db_async.get_leaderboard_page(
+        slug, after_rank=query["after_rank"], limit=query["limit"], max_rank=query["max_rank"],
+        team=query["team"], fields=query["query_fields"])
+    next_cursor = main._finish_leaderboard_page(rows, query)
+
+    headers = {}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+        args = {p: request.query_params[p] for p in main.LEADERBOARD_PARAMS
+                if p in request.query_params}
+        next_url = request.url.replace_query_params(**dict(args, cursor=str(next_cursor)))
+        headers["Link"] = '<{}>; rel="next"'.format(next_url.path + "?" + next_url.query)
+    return _json(rows, headers=headers)
+
+
+async def fantasy_teams(request):
+    return await _serve_cached(request, request.path_params["slug"], "teams.json",
+                               db_async.get_team_leaderboard)
+
+
+async def fantasy_dashboard(request):
+    async def _load(tid):
+        from calculate_points import build_dashboard
+        leaderboard, teams, players = await asyncio.gather(
+            db_async.get_leaderboard(tid), db_async.get_team_leaderboard(tid),
+            db_async.get_all_player_points(tid))
+        return build_dashboard(leaderboard, teams, players)
+    return await _serve_cached(request, request.path_params["slug"], "dashboard.json", _load)
+
+
+async def fantasy_history(request):
+    query, error = main._parse_history_args(request.query_params)
+    if error:
+        return _json(*error)
+    return _json(await db_async.get_standings_history(request.path_params["slug"], *query))
+
+
+async def fantasy_stream(request):
+    last = request.headers.get("last-event-id") or request.query_params.get("version")
+    try:
+        last = int(last) if last else None
+    except ValueError:
+        last = None
+    return StreamingResponse(
+        live_updates.stream_async(request.path_params["slug"], last),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def fantasy_player(request):
+    search_lower = request.path_params["player_name"].lower()
+    for p in await db_async.get_all_player_points(request.path_params["slug"]):
+        if search_lower in p["player_name"].lower():
+            return _json(p)
+    return _json({"error": "Player not found"}, 404)
+
+
+async def fantasy_team_players(request):
+    search_lower = request.path_params["team_name"].lower()
+    all_players = await db_async.get_all_player_points(request.path_params["slug"])
+    team_players = [p for p in all_players if p.get("team", "").lower() == search_lower]
+    team_players.sort(key=lambda p: p["total_points"], reverse=True)
+    return _json(team_players)
+
+
+async def fantasy_matches(request):
+    return _json(await db_async.get_match_summaries(request.path_params["slug"]))
+
+
+async def list_tournaments(request):
+    return _json(await db_async.list_tournaments())
+
+
+# ---------------------------------------------------------------------------
+# Scrape endpoints
+# ---------------------------------------------------------------------------
+
+async def _recalculate(slug):
+    # Scoring is CPU-bound and uses the sync data layer: run it on a thread
+    try:
+        await asyncio.to_thread(recalculate_all, slug)
+    except Exception as e:
+        print("Warning: recalculate failed: {}".format(e))
+
+
+async def get_match_endpoint(request):
+    from scrape_match import scrape_match_async
+    slug, match_id = request.path_params["slug"], request.path_params["match_id"]
+
+    doc = await db_async.get_match(slug, match_id)
+    if doc and request.query_params.get("refresh") != "1":
+        return _json(doc)
+
+    scorecard_url = request.query_params.get("scorecard_url", "").strip()
+    if not scorecard_url:
+        return _json({"error": "scorecard_url query param required (ESPN Cricinfo full-scorecard URL)"}, 400)
+    try:
+        match_data, vs_portion = await scrape_match_async(scorecard_url)
+        if match_id:
+            match_data["match_id"] = str(match_id)
+        if await db_async.save_match(slug, match_data):
+            await _recalculate(slug)
+        return _json(match_data)
+    except Exception as e:
+        return _json({"error": "Scrape failed: {}".format(str(e))}, 500)
+
+
+async def auto_scrape_match(request):
+    from scrape_match import scrape_match_async
+    slug = request.path_params["slug"]
+
+    scorecard_url = request.query_params.get("scorecard_url", "").strip()
+    if not scorecard_url:
+        return _json({"error": "scorecard_url query param required"}, 400)
+    try:
+        match_data, vs_portion = await scrape_match_async(scorecard_url)
+        match_id = match_data.get("match_id", "")
+        existing = await db_async.get_match(slug, match_id) if match_id else None
+        if existing:
+            return _json(existing)
+        await db_async.save_match(slug, match_data)
+        await _recalculate(slug)
+        return _json(match_data)
+    except Exception as e:
+        return _json({"error": "Scrape failed: {}".format(str(e))}, 500)
+
+
+routes = [
+    Route("/tournaments", _resilient(list_tournaments), methods=["GET"]),
+    Route("/t/{slug}/match/auto", auto_scrape_match, methods=["GET"]),
+    Route("/t/{slug}/match/{match_id}", get_match_endpoint, methods=["GET"]),
+    Route("/t/{slug}/fantasy/leaderboard",
+          _resilient(fantasy_leaderboard, cached="leaderboard.json", params=main.LEADERBOARD_PARAMS),
+          methods=["GET"]),
+    Route("/t/{slug}/fantasy/teams", _resilient(fantasy_teams, cached="teams.json"),
+          methods=["GET"]),
+    Route("/t/{slug}/fantasy/dashboard", _resilient(fantasy_dashboard, cached="dashboard.json"),
+          methods=["GET"]),
+    Route("/t/{slug}/fantasy/stream", fantasy_stream, methods=["GET"]),
+    Route("/t/{slug}/fantasy/history", _resilient(fantasy_history, params=main.HISTORY_PARAMS),
+          methods=["GET"]),
+    Route("/t/{slug}/fantasy/player/{player_name}", _resilient(fantasy_player), methods=["GET"]),
+    Route("/t/{slug}/fantasy/team/{team_name}", _resilient(fantasy_team_players), methods=["GET"]),
+    Route("/t/{slug}/fantasy/matches", _resilient(fantasy_matches), methods=["GET"]),
+    # Everything else (writes, admin, the UI) is served by the Flask app
+    Mount("/", app=WSGIMiddleware(main.app, workers=WSGI_THREADS)),
+]
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Connect and prime the shared cache before uvicorn accepts connections
+    await asyncio.to_thread(main.warm_up)
+    yield
+
+
+app = Starlette(routes=routes, lifespan=lifespan)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    main._start_scheduler()
+    uvicorn.run(app, host="127.0.0.1", port=int(os.environ.get("PORT", "5000")))
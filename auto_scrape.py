@@ -28,7 +28,9 @@ def _fetch_series_results(series_url):
     Returns a list of match dicts with: id, slug, status, teams, series info.
     """
     from curl_cffi import requests as cffi_requests
+    from scrape_match import cricinfo_url
 
+    series_url = cricinfo_url(series_url)
     print(f"  Fetching series results: {series_url}")
     resp = cffi_requests.get(series_url, impersonate="chrome", timeout=30)
     resp.raise_for_status()
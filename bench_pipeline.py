@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the scoring pipeline.
+
+Times, on a seeded synthetic tournament (see synthetic_tournament.py):
+
+    scoring.*                 the pure per-record functions in scoring.py (fipl's rules)
+    scoring.custom_rules      the same records under a compiled custom rule set
+    aggregate.resolve_team.*  roster lookup by name (exact/substring/Unknown) and by player id
+    aggregate.score_match     calculate_points.score_match over every match
+    aggregate.score_stats     re-scoring every match from its stored stats (a rule change)
+    aggregate.merge_scores    merging those scores into players (learning ids, resolving teams)
+    persist.save_matches      db.save_match for every match
+    pipeline.recalculate_all.cold     the full recalculation from match documents alone
+    pipeline.recalculate_all.rescore  the same after a rule change: scored from stored stats
+    pipeline.recalculate_all          the same, every match's score cached
+    pipeline.what_if                  the standings under four candidate rule sets at once
+
+Persistence runs against an in-memory datastore — the MongoDB backend on
+mongomock, or with --backend memory the SQLite backend — so the numbers
+measure our code rather than network latency.
+
+Results go to a JSON report; pass --compare with an earlier report to flag
+regressions between commits:
+
+    python bench_pipeline.py --output bench_report.json
+    git stash && python bench_pipeline.py --output base.json && git stash pop
+    python bench_pipeline.py --compare base.json
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+
+def use_inmemory_datastore(backend="mongomock"):
+    """Point db.py and the shared cache at throwaway in-memory/temp stores.
+
+    backend — "mongomock" (the MongoDB backend against mongomock) or
+              "memory" (the SQLite backend in memory)
+    """
+    os.environ["SHARED_CACHE_DIR"] = tempfile.mkdtemp(prefix="t20-bench-cache-")
+    if backend == "memory":
+        os.environ["STORAGE_BACKEND"] = "memory"
+        return
+    os.environ["STORAGE_BACKEND"] = "mongo"
+    os.environ["MONGODB_URI"] = "mongomock://bench"
+
+    try:
+        import mongomock
+    except ImportError:
+        print("⚠️  mongomock not installed — needed for the in-memory MongoDB stand-in.", file=sys.stderr)
+        print("   Install with: pip install mongomock (or use --backend memory)", file=sys.stderr)
+        sys.exit(1)
+
+    from mongomock.collection import Collection, Cursor
+
+    # mongomock isn't thread-safe; serialise it like a single-threaded server
+    # so threaded load tests measure our code, not its races.
+    lock = threading.RLock()
+    locked = {
+        Collection: ("insert_one", "insert_many", "update_one", "update_many", "replace_one",
+                     "delete_one", "delete_many", "bulk_write", "find_one",
+                     "find_one_and_update", "count_documents", "create_index"),
+        Cursor: ("_compute_results",),
+    }
+    for cls, names in locked.items():
+        for name in names:
+            original = getattr(cls, name)
+
+            @functools.wraps(original)
+            def _serialised(*args, _original=original, **kwargs):
+                with lock:
+                    return _original(*args, **kwargs)
+            setattr(cls, name, _serialised)
+
+
+def _reset_db():
+    import db
+    db.reset_storage()
+    return db.get_storage()
+
+
+def _time(fn, repeat, setup=None):
+    """Run *fn* *repeat* times (after an untimed *setup*); return per-run seconds."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):  # recalculate_all logs
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _summary(timings, ops):
+    best = min(timings)
+    return {
+        "runs": len(timings),
+        "ops": ops,
+        "min_s": round(best, 6),
+        "median_s": round(statistics.median(timings), 6),
+        "mean_s": round(statistics.mean(timings), 6),
+        "ops_per_s": round(ops / best, 1) if best else None,
+    }
+
+
+def run(matches=2000, seed=7, repeat=5, pipeline_repeat=3, backend="mongomock"):
+    """Run every benchmark and return the report dict."""
+    import synthetic_tournament
+    from scoring import (
+        calculate_batting_points, calculate_bowling_points, calculate_fielding_points, get_rule_set,
+    )
+    from calculate_points import (
+        _learn_ids, _merge_scores, _resolve_team, _team_map, match_stats, score_match, score_stats,
+    )
+
+    t0 = time.perf_counter()
+    tournament = synthetic_tournament.generate(seed=seed, matches=matches)
+    gen_s = time.perf_counter() - t0
+    all_matches = tournament["matches"]
+    roster = tournament["roster"]
+
+    batting = [r for m in all_matches for r in m["batting"]]
+    bowling = [r for m in all_matches for r in m["bowling"]]
+    fielding = [e for m in all_matches for e in m["fielding"].values()]
+    scorecard_players = sorted({(r["player"], r["player_id"]) for r in batting + bowling})
+
+    results = {}
+
+    def _bench(name, fn, ops, n=repeat, setup=None):
+        results[name] = r = _summary(_time(fn, n, setup), ops)
+        print(f"  {name:<28} {r['min_s'] * 1000:>10.2f} ms  {r['ops_per_s'] or 0:>14,.0f} ops/s")
+
+    print(f"Synthetic tournament: {len(all_matches)} matches, {len(roster)} roster entries, "
+          f"{len(batting) + len(bowling)} records (generated in {gen_s:.2f}s)\n")
+
+    _bench("scoring.batting", lambda: [calculate_batting_points(r) for r in batting], len(batting))
+    _bench("scoring.bowling", lambda: [calculate_bowling_points(r) for r in bowling], len(bowling))
+    _bench("scoring.fielding", lambda: [calculate_fielding_points(e) for e in fielding], len(fielding))
+    # A league's own rule set, through its compiled functions
+    custom = get_rule_set({"batting": {"six": 4, "milestone_runs": 30}, "bowling": {"dot": 2}})
+    _bench("scoring.custom_rules",
+           lambda: ([custom["batting"](r) for r in batting], [custom["bowling"](r) for r in bowling],
+                    [custom["fielding"](e) for e in fielding]),
+           len(batting) + len(bowling) + len(fielding))
+    # By name (the first recalculation, or records without ids), then by id
+    # (every later one, once the ids are learned)
+    by_name = _team_map(roster)
+    _bench("aggregate.resolve_team.name",
+           lambda: [_resolve_team(n, by_name) for n, _ in scorecard_players],
+           len(scorecard_players))
+    scored_matches = [score_match(m) for m in all_matches]
+    learned = _team_map(roster)
+    _learn_ids(scored_matches, learned)
+    _bench("aggregate.resolve_team.id",
+           lambda: [_resolve_team(n, learned, pid) for n, pid in scorecard_players],
+           len(scorecard_players))
+
+    _bench("aggregate.score_match", lambda: [score_match(m) for m in all_matches],
+           len(all_matches))
+    stats = [match_stats(m) for m in all_matches]
+    _bench("aggregate.score_stats", lambda: [score_stats(m, custom) for m in stats],
+           len(all_matches))
+
+    def _merge():
+        players, team_map = {}, _team_map(roster)
+        _learn_ids(scored_matches, team_map)
+        for scored in scored_matches:
+            _merge_scores(scored, players, team_map)
+    _bench("aggregate.merge_scores", _merge, len(all_matches))
+
+    use_inmemory_datastore(backend)
+    tid = "bench"
+
+    def _seed():
+        from db import create_tournament
+        _reset_db()
+        create_tournament(tid, "Benchmark", roster)
+
+    def _save_matches():
+        from db import save_match
+        for m in all_matches:
+            save_match(tid, dict(m))
+
+    _bench("persist.save_matches", _save_matches, len(all_matches),
+           n=pipeline_repeat, setup=_seed)
+
+    from calculate_points import recalculate_all
+    from db import evict_match_scores
+    def _fresh():
+        _seed()
+        _save_matches()
+
+    _bench("pipeline.recalculate_all.cold", lambda: recalculate_all(tid), len(all_matches),
+           n=pipeline_repeat, setup=_fresh)
+    # Keeping no rules version empties the score cache; the stats stay
+    _bench("pipeline.recalculate_all.rescore", lambda: recalculate_all(tid), len(all_matches),
+           n=pipeline_repeat, setup=lambda: evict_match_scores([]))
+    _bench("pipeline.recalculate_all", lambda: recalculate_all(tid), len(all_matches),
+           n=pipeline_repeat)
+    from calculate_points import what_if
+    candidates = {str(mom): {"mom": mom, "fielding": {"catch": 10}} for mom in (0, 25, 50, 100)}
+    _bench("pipeline.what_if", lambda: what_if(tid, candidates, limit=50), len(all_matches),
+           n=pipeline_repeat)
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"matches": matches, "seed": seed, "repeat": repeat,
+                   "pipeline_repeat": pipeline_repeat, "backend": backend},
+        "results": results,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold=0.10):
+    """Print per-benchmark change vs *baseline*; return names that regressed."""
+    regressions = []
+    print(f"\nvs baseline {baseline.get('commit') or '?'} (threshold {threshold:.0%}):")
+    for name, r in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("min_s"):
+            print(f"  {name:<28} (new)")
+            continue
+        change = r["min_s"] / base["min_s"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  ⚠️  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<28} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fantasy scoring pipeline.")
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per in-memory benchmark (best is reported)")
+    parser.add_argument("--pipeline-repeat", type=int, default=3,
+                        help="Runs per persistence benchmark")
+    parser.add_argument("--backend", choices=("mongomock", "memory"), default="mongomock",
+                        help="Datastore for the persistence benchmarks")
+    parser.add_argument("--output", default="bench_report.json",
+                        help="Where to write the JSON report")
+    parser.add_argument("--compare", default="",
+                        help="Baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Slowdown fraction that counts as a regression")
+    args = parser.parse_args()
+
+    report = run(matches=args.matches, seed=args.seed, repeat=args.repeat,
+                 pipeline_repeat=args.pipeline_repeat, backend=args.backend)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
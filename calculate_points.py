@@ -1,54 +1,128 @@
 """Aggregate fantasy points for a tournament.
 
-Reads player→team mapping from MongoDB (tournament doc), scores every match,
+Reads player→team mapping from the tournament roster, scores every match,
 and writes results to MongoDB.
+
+Each tournament scores with its own rule set (scoring.get_rule_set; the
+fipl defaults unless it stores "scoring_rules"). Scoring a match
+(score_match) depends only on its content and the rule set, so the result
+is cached under (content_hash, rule-set version): a recalculation scores
+only new or changed matches and merges cached scores for the rest. Teams
+are resolved at merge time, against the current roster.
 """
 
-import re
+import os
 
-from scoring import (
-    calculate_batting_points,
-    calculate_bowling_points,
-    calculate_fielding_points,
-    MOM_BONUS,
-)
+import careers
+from scoring import DEFAULT_RULE_SET, get_rule_set
+from storage import normalise_name
 
 
 # ---------------------------------------------------------------------------
-# Player → team mapping (from MongoDB)
+# Player → team mapping (from the roster)
 # ---------------------------------------------------------------------------
-
-def _load_player_team_map(tournament_id):
-    """Load player→team mapping from the tournament's roster in MongoDB."""
-    from db import get_players
-    players = get_players(tournament_id)
-    mapping = {}
+#
+# Scorecard records carry Cricinfo's player id; roster entries carry one once
+# it is known. A team_map is a dict of:
+#
+#     by_id    {player_id: team}
+#     by_name  {name_key: team}         every roster entry
+#     ids      {name_key: player_id}    entries already tied to a player
+#     learned  {name_key: player_id}    ids tied during this run (to save)
+#     aliases  {name_key: player_id}    scorecard name → id, for records
+#                                       saved before ids were scraped
+
+# Same key the roster is stored under
+_normalise = normalise_name
+
+
+def _team_map(players):
+    """Build a team_map from a roster list [{player_name, team[, player_id]}]."""
+    team_map = {"by_id": {}, "by_name": {}, "ids": {}, "learned": {}, "aliases": {}}
     for p in players:
         name = p.get("player_name", "").strip()
         team = p.get("team", "").strip()
-        if name and team:
-            mapping[_normalise(name)] = team
-    return mapping
+        if not (name and team):
+            continue
+        key = _normalise(name)
+        team_map["by_name"][key] = team
+        player_id = p.get("player_id")
+        if player_id is not None:
+            team_map["by_id"][player_id] = team
+            team_map["ids"][key] = player_id
+    return team_map
 
 
-def _normalise(name):
-    """Lowercase, collapse whitespace, strip designations."""
-    name = re.sub(r"\s*\(c\)\s*", " ", name, flags=re.IGNORECASE)
-    name = re.sub(r"\s*\(wk\)\s*", " ", name, flags=re.IGNORECASE)
-    return " ".join(name.lower().split())
+def _load_player_team_map(tournament_id):
+    """Load the team_map for a tournament's roster."""
+    from db import get_players
+    return _team_map(get_players(tournament_id))
+
 
+def _resolve_team(player_name, team_map, player_id=None):
+    """Roster team: by player id, else by name (exact → substring) → 'Unknown'.
 
-def _resolve_team(player_name, team_map):
-    """Fuzzy-ish lookup: exact → substring → 'Unknown'."""
+    Name matching skips entries tied to another player's id.
+    """
+    if player_id is not None and player_id in team_map["by_id"]:
+        return team_map["by_id"][player_id]
+    by_name, ids = team_map["by_name"], team_map["ids"]
     key = _normalise(player_name)
-    if key in team_map:
-        return team_map[key]
-    for csv_key, team in team_map.items():
-        if csv_key in key or key in csv_key:
+    if key in by_name and (player_id is None or key not in ids):
+        return by_name[key]
+    for csv_key, team in by_name.items():
+        if (player_id is None or csv_key not in ids) and (csv_key in key or key in csv_key):
             return team
     return "Unknown"
 
 
+def _learn_ids(scored_matches, team_map):
+    """Tie scorecard player ids to roster entries, and scorecard names to ids.
+
+    An id is tied to a roster entry only when the match is unambiguous: the
+    id's name matches one free entry (exactly, else by substring) and no
+    other id matches it too. Ties go to team_map["learned"] for saving;
+    everything else keeps resolving by name. A scorecard name two different
+    ids go by gets no alias.
+    """
+    aliases, ids, by_name = team_map["aliases"], team_map["ids"], team_map["by_name"]
+    names = {}
+    ambiguous = set()
+    for scored in scored_matches:
+        for row in scored["players"]:
+            name, player_id = row["player"], row["player_id"]
+            if player_id is None:
+                continue
+            names.setdefault(player_id, name)
+            key = _normalise(name)
+            if aliases.setdefault(key, player_id) != player_id:
+                ambiguous.add(key)
+    for key in ambiguous:
+        del aliases[key]
+
+    free = [k for k in by_name if k not in ids]
+    claims = {}
+    for player_id, name in names.items():
+        if player_id in team_map["by_id"]:
+            continue
+        key = _normalise(name)
+        candidates = [key] if key in by_name and key not in ids else [
+            k for k in free if k in key or key in k]
+        if len(candidates) == 1:
+            claims.setdefault(candidates[0], []).append(player_id)
+    for key, claimants in claims.items():
+        if len(claimants) == 1:
+            player_id = claimants[0]
+            team_map["by_id"][player_id] = by_name[key]
+            ids[key] = team_map["learned"][key] = player_id
+
+
+def player_key(row):
+    """A player's identity in points/leaderboard rows: Cricinfo id, else name."""
+    player_id = row.get("player_id")
+    return row["player_name"] if player_id is None else player_id
+
+
 # Canonical team-name mapping
 _TEAM_CANONICAL = {
     "gkkani": "GKKani",
@@ -71,115 +145,264 @@ def _normalise_team(team):
 # Match processing
 # ---------------------------------------------------------------------------
 
-def _process_match(match_data, match_id, match_name, players, team_map):
-    """Score a single match and accumulate into *players* dict."""
+# Raw scoring inputs kept per player per match (see match_stats), by component
+STAT_FIELDS = {
+    "batting": ("runs", "balls", "fours", "sixes"),
+    "bowling": ("balls", "maidens", "runs", "wickets", "dots"),
+    "fielding": ("catches", "runout", "stumpings"),
+}
 
-    def _ensure_player(name):
-        key = _normalise(name)
-        if key not in players:
-            players[key] = {
-                "player_name": name,
-                "team": _normalise_team(_resolve_team(name, team_map)),
-                "matches": [],
-                "total_points": 0,
-            }
-        return key
-
-    def _get_or_create_match_record(key, mid):
-        for rec in players[key]["matches"]:
-            if rec["match_id"] == mid:
-                return rec
-        rec = {
-            "match_id": mid,
-            "match_name": match_name,
-            "batting_points": 0,
-            "bowling_points": 0,
-            "fielding_points": 0,
-            "mom": 0,
-            "total": 0,
-        }
-        players[key]["matches"].append(rec)
-        return rec
+
+def match_stats(match_data):
+    """The raw scoring inputs of one match, aggregated per player.
+
+    Returns {match_id, match_name[, start_time], players}: one row per player,
+    {player, player_id[, batting][, bowling][, fielding][, mom]}, in order
+    of first appearance, keyed like score_match's. Each component holds
+    the STAT_FIELDS the scoring functions read, summed over the player's
+    records; a batting component has "dismissal": "out" if they were out.
+    """
+    match_id = str(match_data.get("match_id", ""))
+    rows = {}
+
+    def _add(name, player_id, component, record):
+        key = _normalise(name) if player_id is None else player_id
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = {"player": name, "player_id": player_id}
+        stats = row.setdefault(component, dict.fromkeys(STAT_FIELDS[component], 0))
+        for field in STAT_FIELDS[component]:
+            stats[field] += record.get(field, 0)
+        return stats
 
     for rec in match_data.get("batting", []):
-        name = rec.get("player", "")
-        if not name:
-            continue
-        pts = calculate_batting_points(rec)
-        key = _ensure_player(name)
-        mr = _get_or_create_match_record(key, match_id)
-        mr["batting_points"] += pts
-        mr["total"] += pts
-        players[key]["total_points"] += pts
+        if rec.get("player"):
+            stats = _add(rec["player"], rec.get("player_id"), "batting", rec)
+            dismissal = rec.get("dismissal", "")
+            if dismissal and "not out" not in dismissal.lower():
+                stats["dismissal"] = "out"
 
     for rec in match_data.get("bowling", []):
-        name = rec.get("player", "")
-        if not name:
-            continue
-        pts = calculate_bowling_points(rec)
-        key = _ensure_player(name)
-        mr = _get_or_create_match_record(key, match_id)
-        mr["bowling_points"] += pts
-        mr["total"] += pts
-        players[key]["total_points"] += pts
-
-    fielding = match_data.get("fielding", {})
-    for name, entry in fielding.items():
-        if not name:
-            continue
-        pts = calculate_fielding_points(entry)
-        key = _ensure_player(name)
-        mr = _get_or_create_match_record(key, match_id)
-        mr["fielding_points"] += pts
-        mr["total"] += pts
-        players[key]["total_points"] += pts
+        if rec.get("player"):
+            _add(rec["player"], rec.get("player_id"), "bowling", rec)
+
+    for name, entry in match_data.get("fielding", {}).items():
+        if name:
+            _add(name, entry.get("player_id"), "fielding", entry)
 
     mom_name = match_data.get("man_of_the_match")
     if mom_name:
-        key = _ensure_player(mom_name)
-        mr = _get_or_create_match_record(key, match_id)
-        mr["mom"] = MOM_BONUS
-        mr["total"] += MOM_BONUS
-        players[key]["total_points"] += MOM_BONUS
+        player_id = match_data.get("man_of_the_match_id")
+        key = _normalise(mom_name) if player_id is None else player_id
+        rows.setdefault(key, {"player": mom_name, "player_id": player_id})["mom"] = True
+
+    stats = {
+        "match_id": match_id,
+        "match_name": match_data.get("match_name", "Match {}".format(match_id)),
+        "players": list(rows.values()),
+    }
+    if match_data.get("start_time"):
+        stats["start_time"] = match_data["start_time"]
+    return stats
+
+
+def score_stats(stats, rule_set=None):
+    """Score one match's match_stats() under *rule_set* (default: fipl's).
+
+    Returns {match_id, match_name[, start_time], players}: one row per player,
+    {player, player_id, batting_points, bowling_points, fielding_points,
+    mom, total}, in the same order. Needs no match document, so changing
+    a tournament's rules only re-runs this over stored stats.
+    """
+    rule_set = rule_set or DEFAULT_RULE_SET
+    stat_rows = stats["players"]
+    rows = [{
+        "player": row["player"],
+        "player_id": row["player_id"],
+        "batting_points": 0,
+        "bowling_points": 0,
+        "fielding_points": 0,
+        "mom": rule_set["mom"] if row.get("mom") else 0,
+    } for row in stat_rows]
+    for component in STAT_FIELDS:
+        points, field = rule_set[component], component + "_points"
+        for row, stat_row in zip(rows, stat_rows):
+            if component in stat_row:
+                row[field] = points(stat_row[component])
+    for row in rows:
+        row["total"] = row["batting_points"] + row["bowling_points"] + row["fielding_points"] + row["mom"]
+    scored = {"match_id": stats["match_id"], "match_name": stats["match_name"], "players": rows}
+    if "start_time" in stats:
+        scored["start_time"] = stats["start_time"]
+    return scored
+
+
+def score_match(match_data, rule_set=None):
+    """Score one match under *rule_set* (default: fipl's), independently of any roster.
+
+    Same as score_stats(match_stats(match_data), rule_set). Rows are keyed
+    by Cricinfo player id (by normalised name for records with no id).
+    """
+    return score_stats(match_stats(match_data), rule_set)
 
 
-# ---------------------------------------------------------------------------
-# Public API
-# ---------------------------------------------------------------------------
+_SCORE_FIELDS = ("batting_points", "bowling_points", "fielding_points", "mom")
 
-def recalculate_all(tournament_id):
-    """Re-score every match for a tournament and write to MongoDB.
 
-    Returns (leaderboard, team_leaderboard) lists.
+def _merge_scores(scored, players, team_map):
+    """Accumulate one score_match() result into *players*.
+
+    *players* is keyed by Cricinfo player id (by normalised name for records
+    with no id and no alias).
     """
-    from db import (
-        get_all_matches, save_all_player_points,
-        save_leaderboard, save_team_leaderboard,
-    )
+    match_id, match_name = scored["match_id"], scored["match_name"]
+    for row in scored["players"]:
+        name, player_id = row["player"], row["player_id"]
+        if player_id is None:
+            player_id = team_map["aliases"].get(_normalise(name))
+        key = _normalise(name) if player_id is None else player_id
+        player = players.get(key)
+        if player is None:
+            player = players[key] = {
+                "player_name": name,
+                "team": _normalise_team(_resolve_team(name, team_map, player_id)),
+                "matches": [],
+                "total_points": 0,
+            }
+            if player_id is not None:
+                player["player_id"] = player_id
+
+        # Match ids are unique per tournament, so a record for this match
+        # (two rows for one player, e.g. via an alias) can only be the last
+        rec = player["matches"][-1] if player["matches"] else None
+        if rec is None or rec["match_id"] != match_id:
+            rec = {"match_id": match_id, "match_name": match_name,
+                   "batting_points": 0, "bowling_points": 0, "fielding_points": 0,
+                   "mom": 0, "total": 0}
+            player["matches"].append(rec)
+        # Component by component, so totals add up exactly as before caching
+        for field in _SCORE_FIELDS:
+            rec[field] += row[field]
+            rec["total"] += row[field]
+            player["total_points"] += row[field]
 
-    team_map = _load_player_team_map(tournament_id)
-    players = {}
 
-    all_matches = get_all_matches(tournament_id)
-    for doc in all_matches:
-        match_id = doc.get("match_id", "")
-        match_name = doc.get("match_name", "Match {}".format(match_id))
-        _process_match(doc, str(match_id), match_name, players, team_map)
+def _process_match(match_data, match_id, match_name, players, team_map, rule_set=None):
+    """Score a single match and accumulate into *players* dict (uncached)."""
+    scored = dict(score_match(match_data, rule_set), match_id=match_id, match_name=match_name)
+    _merge_scores(scored, players, team_map)
 
+
+def load_rule_set(tournament_id):
+    """The compiled scoring rule set for a tournament."""
+    from db import get_tournament
+    return get_rule_set((get_tournament(tournament_id) or {}).get("scoring_rules"))
+
+
+# Rule-set versions in use when this process last evicted the score cache
+_live_rule_versions = set()
+
+
+def evict_stale_scores():
+    """Drop cached match scores of rule sets no tournament uses any more.
+
+    Call after changing a tournament's rules; recalculate_all also runs it
+    when this process first meets a rule-set version. Returns how many.
+    """
+    global _live_rule_versions
+    from db import evict_match_scores, list_scoring_rules
+
+    live = {DEFAULT_RULE_SET["version"]}
+    for rules in list_scoring_rules():
+        try:
+            live.add(get_rule_set(rules)["version"])
+        except ValueError:
+            pass
+    evicted = evict_match_scores(live)
+    if evicted:
+        print("Evicted {} cached match scores of retired scoring rules".format(evicted))
+    _live_rule_versions = live
+    return evicted
+
+
+def _scored_matches(tournament_id, rule_set):
+    """score_match() for every match of a tournament, in stored order.
+
+    Cached scores are reused. Matches with none under this rule set are
+    scored from their stored stats; only new or changed matches are loaded
+    (and their stats stored). Matches saved before content hashes get one
+    on the way.
+    """
+    from db import (
+        get_match_hashes, get_match_scores, save_match, save_match_scores, save_player_match_stats,
+    )
+
+    version = rule_set["version"]
+    if version not in _live_rule_versions:
+        evict_stale_scores()
+    index = get_match_hashes(tournament_id)
+    cached = get_match_scores(version, [h for _, h in index if h])
+    missing = {match_id: h for match_id, h in index if h not in cached}
+    if not missing:
+        return [cached[h] for _, h in index]
+
+    stats, docs = _current_stats(tournament_id, missing)
+    if docs:
+        for doc in docs:
+            if not missing[doc["match_id"]]:
+                save_match(tournament_id, doc)  # sets doc["content_hash"]
+                stats[doc["match_id"]]["content_hash"] = doc["content_hash"]
+        save_player_match_stats(tournament_id, {d["match_id"]: stats[d["match_id"]] for d in docs})
+    fresh = {match_id: score_stats(s, rule_set) for match_id, s in stats.items()}
+    save_match_scores(version, {stats[match_id]["content_hash"]: scored
+                                for match_id, scored in fresh.items()})
+    return [fresh[match_id] if match_id in fresh else cached[h] for match_id, h in index]
+
+
+def _current_stats(tournament_id, hashes):
+    """match_stats() (with content_hash) of matches {match_id: content_hash}.
+
+    Stored stats are used when they match the content hash; the rest are
+    extracted from the match documents. Returns ({match_id: stats}, the
+    documents that had to be read). Writes nothing.
+    """
+    from db import get_matches, get_player_match_stats
+
+    hashes = dict(hashes)
+    stats = {}
+    for match_id, stored in get_player_match_stats(tournament_id, list(hashes)).items():
+        if stored["content_hash"] == hashes[match_id]:
+            stats[match_id] = stored
+            del hashes[match_id]
+    docs = get_matches(tournament_id, list(hashes)) if hashes else []
+    for doc in docs:
+        stats[doc["match_id"]] = dict(match_stats(doc), content_hash=doc.get("content_hash"))
+    return stats, docs
+
+
+def _standings(players, team_map):
+    """(all_players, leaderboard, team_leaderboard) from merged *players*."""
     all_players = sorted(players.values(), key=lambda p: p["total_points"], reverse=True)
 
-    leaderboard = [
-        {
+    leaderboard = []
+    for rank, p in enumerate(all_players, 1):
+        row = {
+            "rank": rank,
             "player_name": p["player_name"],
             "team": p["team"],
             "matches_played": len(p["matches"]),
             "total_points": p["total_points"],
         }
-        for p in all_players
-    ]
+        if "player_id" in p:
+            row["player_id"] = p["player_id"]
+        leaderboard.append(row)
+
+    return all_players, leaderboard, _team_standings(all_players, team_map)
 
-    # Team leaderboard
-    all_roster_teams = set(team_map.values())
+
+def _team_standings(all_players, team_map):
+    """Team leaderboard rows from players in rank order: roster teams, then any others."""
+    all_roster_teams = set(team_map["by_name"].values())
     teams = {}
     for t in all_roster_teams:
         norm_t = _normalise_team(t)
@@ -193,18 +416,284 @@ def recalculate_all(tournament_id):
             teams[t] = {"team": t, "total_points": 0, "player_count": 0}
         teams[t]["total_points"] += p["total_points"]
         teams[t]["player_count"] += 1
-    team_leaderboard = sorted(teams.values(), key=lambda t: t["total_points"], reverse=True)
+    return sorted(teams.values(), key=lambda t: t["total_points"], reverse=True)
+
+
+def _fixture_order(matches):
+    """Scored matches (or stats) in fixture order: by start_time, undated (older) ones first.
+
+    Stable, so matches without dates keep their stored order.
+    """
+    return sorted(matches, key=lambda m: m.get("start_time") or "")
+
+
+def _merge_with_history(scored_matches, players, team_map):
+    """_merge_scores() each match into *players*, recording the standings after each.
+
+    Returns {"matches": [{match_id, match_name[, start_time]}], "teams": {...},
+    "players": {...}}: a trajectory per team name / per *players* key,
+    {"start": index of the first match it is ranked after, "points": [...],
+    "ranks": [...]}, with one total and rank per match from then on.
+    """
+    matches, tracks = [], {"teams": {}, "players": {}}
+    roster_teams = [t["team"] for t in _team_standings([], team_map)]
+
+    def _record(kind, step, ranked):
+        kind_tracks = tracks[kind]
+        for rank, (key, points) in enumerate(ranked, 1):
+            track = kind_tracks.get(key)
+            if track is None:
+                track = kind_tracks[key] = {"start": step, "points": [], "ranks": []}
+            track["points"].append(points)
+            track["ranks"].append(rank)
+
+    for step, scored in enumerate(scored_matches):
+        _merge_scores(scored, players, team_map)
+        entry = {"match_id": scored["match_id"], "match_name": scored["match_name"]}
+        if "start_time" in scored:
+            entry["start_time"] = scored["start_time"]
+        matches.append(entry)
+        # Ranked exactly as _standings ranks them; team names are already
+        # normalised, so the team totals skip _team_standings' re-normalising
+        ranked = sorted(((key, p["total_points"]) for key, p in players.items()),
+                        key=lambda kv: kv[1], reverse=True)
+        _record("players", step, ranked)
+        teams = dict.fromkeys(roster_teams, 0)
+        for key, points in ranked:
+            team = players[key]["team"]
+            if team != "Unknown":
+                teams[team] = teams.get(team, 0) + points
+        _record("teams", step, sorted(teams.items(), key=lambda kv: kv[1], reverse=True))
+    return dict(tracks, matches=matches)
+
+
+def _history_rows(history, players):
+    """The standings history as stored: rows keyed for lookup, in final rank order."""
+    by_rank = lambda kv: kv[1]["ranks"][-1]
+    teams = [dict(track, key=team, team=team)
+             for team, track in sorted(history["teams"].items(), key=by_rank)]
+    rows = []
+    for key, track in sorted(history["players"].items(), key=by_rank):
+        p = players[key]
+        row = dict(track, key=str(player_key(p)), player_name=p["player_name"], team=p["team"])
+        if "player_id" in p:
+            row["player_id"] = p["player_id"]
+        rows.append(row)
+    return {"matches": history["matches"], "teams": teams, "players": rows}
+
+
+# ---------------------------------------------------------------------------
+# Response publishing
+# ---------------------------------------------------------------------------
+
+DASHBOARD_TOP_N = int(os.environ.get("DASHBOARD_TOP_N", "100"))
+
+# Column order of each per-match row in a dashboard breakdown
+DASHBOARD_MATCH_FIELDS = (
+    "match_id", "batting_points", "bowling_points", "fielding_points", "mom", "total",
+)
+
+
+def build_dashboard(leaderboard, team_leaderboard, all_players, top_n=None):
+    """Build the Standings view payload: teams, top-N players and their breakdowns.
+
+    Per-match breakdowns are compact rows (see DASHBOARD_MATCH_FIELDS) aligned
+    with the leaderboard rows; match names are listed once in "matches".
+    """
+    top_n = DASHBOARD_TOP_N if top_n is None else top_n
+    top = leaderboard[:top_n]
+    by_key = {player_key(p): p for p in all_players}
+
+    match_names = {}
+    breakdowns = []
+    for row in top:
+        player = by_key.get(player_key(row), {})
+        compact = []
+        for m in player.get("matches", []):
+            match_names.setdefault(m["match_id"], m.get("match_name", ""))
+            compact.append([m.get(f, 0) for f in DASHBOARD_MATCH_FIELDS])
+        breakdowns.append(compact)
+
+    return {
+        "teams": team_leaderboard,
+        "leaderboard": top,
+        "leaderboard_total": len(leaderboard),
+        "match_fields": list(DASHBOARD_MATCH_FIELDS),
+        "matches": match_names,
+        "breakdowns": breakdowns,
+    }
+
+
+def standings_diff(old_leaderboard, new_leaderboard, old_teams, new_teams):
+    """Return the rows that changed between two recalculations.
+
+    Players are keyed by player_key (id, else name) and teams by team;
+    unchanged rows are omitted.
+    """
+    def _changes(old, new, key):
+        old_by_key = {key(r): r for r in old}
+        new_keys = {key(r) for r in new}
+        changed = [r for r in new if old_by_key.get(key(r)) != r]
+        removed = [k for k in old_by_key if k not in new_keys]
+        return changed, removed
+
+    players, removed = _changes(old_leaderboard, new_leaderboard, player_key)
+    teams, teams_removed = _changes(old_teams, new_teams, lambda r: r["team"])
+    return {
+        "players": players,
+        "removed": removed,
+        "teams": teams,
+        "teams_removed": teams_removed,
+    }
+
+
+def _publish_responses(tournament_id, leaderboard, team_leaderboard, all_players, diff):
+    """Render the read bodies, persist them and publish them to all workers.
+
+    Bodies are serialized and compressed here once so the read endpoints only
+    stream bytes. *diff* (see standings_diff) is published alongside for the
+    live stream. With STATIC_PUBLISH_DIR set they are also published as
+    static files (see static_publish.py). Failures are logged, not raised:
+    the read endpoints fall back to MongoDB.
+    """
+    import prerender
+    import shared_cache
+    import static_publish
+    from db import bump_data_version, save_response_bodies
+
+    try:
+        version = bump_data_version(tournament_id)
+        bodies = prerender.render({
+            "leaderboard.json": leaderboard,
+            "teams.json": team_leaderboard,
+            "dashboard.json": build_dashboard(leaderboard, team_leaderboard, all_players),
+        })
+        save_response_bodies(tournament_id, version, bodies)
+        if static_publish.PUBLISH_DIR:
+            static_publish.publish_tournament(tournament_id, version, bodies, all_players)
+        # Only live streams read the diff, and only from the shared cache
+        bodies["diff.json"] = shared_cache.dumps(dict(diff, from_version=version - 1, version=version))
+        shared_cache.publish(tournament_id, version, bodies)
+    except Exception as e:
+        print("Warning: publishing cached responses failed: {}".format(e))
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def recalculate_all(tournament_id):
+    """Re-score every match for a tournament and write to MongoDB.
+
+    Matches are merged in fixture order, and the standings after each one
+    are stored as the tournament's standings history. The players' careers
+    across tournaments (careers.py) are brought up to date.
+    Returns (leaderboard, team_leaderboard) lists.
+    """
+    from db import (
+        get_leaderboard, get_team_leaderboard, save_all_player_points, save_leaderboard,
+        save_standings_history, save_team_leaderboard, set_player_ids,
+    )
+
+    team_map = _load_player_team_map(tournament_id)
+    players = {}
+
+    scored_matches = _fixture_order(_scored_matches(tournament_id, load_rule_set(tournament_id)))
+    _learn_ids(scored_matches, team_map)
+    history = _merge_with_history(scored_matches, players, team_map)
+
+    all_players, leaderboard, team_leaderboard = _standings(players, team_map)
+
+    diff = standings_diff(get_leaderboard(tournament_id), leaderboard,
+                          get_team_leaderboard(tournament_id), team_leaderboard)
 
     # Save to MongoDB
+    if team_map["learned"]:
+        set_player_ids(tournament_id, team_map["learned"])
     save_all_player_points(tournament_id, all_players)
     save_leaderboard(tournament_id, leaderboard)
     save_team_leaderboard(tournament_id, team_leaderboard)
+    save_standings_history(tournament_id, _history_rows(history, players))
+    careers.update_tournament(tournament_id, all_players, {
+        m["match_id"]: m["start_time"] for m in history["matches"] if "start_time" in m})
+    _publish_responses(tournament_id, leaderboard, team_leaderboard, all_players, diff)
 
     print(f"[{tournament_id}] Scored {len(all_players)} players across "
           f"{sum(len(p['matches']) for p in all_players)} match appearances.")
     return leaderboard, team_leaderboard
 
 
+# Rule sets one what-if may compare (each is a full scoring pass)
+WHAT_IF_MAX_RULE_SETS = int(os.environ.get("WHAT_IF_MAX_RULE_SETS", "8"))
+
+
+def _with_deltas(rows, baseline, key):
+    """Copy *rows* with rank_delta (places gained) and points_delta against *baseline*."""
+    before = {key(r): (rank, r) for rank, r in enumerate(baseline, 1)}
+    out = []
+    for rank, row in enumerate(rows, 1):
+        row = dict(row)
+        old_rank, old = before.get(key(row), (None, None))
+        row["rank_delta"] = None if old_rank is None else old_rank - rank
+        row["points_delta"] = row["total_points"] - (old["total_points"] if old else 0)
+        out.append(row)
+    return out
+
+
+def what_if(tournament_id, rule_sets, limit=None):
+    """Standings under alternative rule sets, side by side. Writes nothing.
+
+    *rule_sets* is {name: rule-set document} (see scoring.validate_rules;
+    ValueError if one is invalid). Every match's stats are scored under the
+    tournament's own rules (the baseline) and each candidate in one pass.
+    Returns {baseline, scenarios: {name: ...}}, each with its rules version,
+    leaderboard and teams; scenario rows carry rank_delta and points_delta
+    against the baseline. *limit* caps the leaderboard rows (None: all).
+    """
+    from db import get_match_hashes
+
+    candidates = {}
+    for name, doc in rule_sets.items():
+        try:
+            candidates[name] = get_rule_set(doc, cache=False)
+        except ValueError as e:
+            raise ValueError("rule set '{}': {}".format(name, e)) from None
+    names = list(candidates)
+    compiled = [load_rule_set(tournament_id)] + [candidates[n] for n in names]
+
+    index = get_match_hashes(tournament_id)
+    stats, _ = _current_stats(tournament_id, index)
+    stats = _fixture_order(stats[match_id] for match_id, _ in index)
+    team_map = _load_player_team_map(tournament_id)
+    _learn_ids(stats, team_map)
+
+    players = [{} for _ in compiled]
+    for match in stats:
+        for rule_set, merged in zip(compiled, players):
+            _merge_scores(score_stats(match, rule_set), merged, team_map)
+
+    results = []
+    for rule_set, merged in zip(compiled, players):
+        _, leaderboard, teams = _standings(merged, team_map)
+        results.append({"version": rule_set["version"], "leaderboard": leaderboard, "teams": teams})
+
+    baseline = results[0]
+    scenarios = {}
+    for name, rule_set, result in zip(names, compiled[1:], results[1:]):
+        scenarios[name] = {
+            "version": result["version"],
+            "rules": rule_set["rules"],
+            "leaderboard": _with_deltas(result["leaderboard"][:limit], baseline["leaderboard"],
+                                        player_key),
+            "teams": _with_deltas(result["teams"], baseline["teams"], lambda t: t["team"]),
+        }
+    return {
+        "baseline": dict(baseline, leaderboard=baseline["leaderboard"][:limit]),
+        "leaderboard_total": len(baseline["leaderboard"]),
+        "scenarios": scenarios,
+    }
+
+
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
@@ -0,0 +1,140 @@
+"""Player careers: every player's fantasy record across all tournaments.
+
+A materialised view over the tournaments' player points, kept in two
+record sets:
+
+    career_parts    one per player per tournament: that tournament's totals
+                    for the player and their last FORM_MATCHES matches in it
+    player_careers  one per player: the sum of their parts, plus their
+                    recent form across tournaments; indexed by total points
+
+calculate_points.recalculate_all calls update_tournament() with the
+tournament's new player points. Only the parts that changed are written,
+and only the careers of those players are rebuilt (from their parts, an
+indexed read), so recalculating one tournament never reads another's
+points.
+
+Players are keyed by Cricinfo id (by normalised name if they have none),
+so the same player is one career across tournaments.
+"""
+
+import os
+
+from storage import normalise_name
+
+# Matches in a player's recent-form window
+FORM_MATCHES = int(os.environ.get("CAREER_FORM_MATCHES", "5"))
+
+_POINT_FIELDS = ("batting_points", "bowling_points", "fielding_points", "mom")
+
+
+def career_key(player):
+    """A player's career key: their Cricinfo id, else their normalised name."""
+    player_id = player.get("player_id")
+    return normalise_name(player["player_name"]) if player_id is None else str(player_id)
+
+
+def _form_order(entry):
+    # Dated matches by start time; undated ones (scraped before start times
+    # were recorded) first, in the order they were played
+    return entry.get("start_time") or ""
+
+
+def _part_order(part):
+    # By the tournament's last match the player played in: the latest part
+    # is their current tournament. Undated ones first, then by id
+    recent = part["recent"]
+    return (recent[-1].get("start_time") or "") if recent else "", part["tournament_id"]
+
+
+def tournament_parts(tournament_id, all_players, start_times):
+    """{career key: part} for a tournament's player points.
+
+    *start_times* maps match_id → start_time for the matches that have one.
+    """
+    parts = {}
+    for p in all_players:
+        part = {
+            "tournament_id": tournament_id,
+            "key": career_key(p),
+            "player_name": p["player_name"],
+            "team": p["team"],
+            "matches": len(p["matches"]),
+            "total_points": p["total_points"],
+        }
+        if "player_id" in p:
+            part["player_id"] = p["player_id"]
+        for field in _POINT_FIELDS:
+            part[field] = sum(m[field] for m in p["matches"])
+        recent = []
+        for m in p["matches"][-FORM_MATCHES:]:
+            entry = {"tournament_id": tournament_id, "match_id": m["match_id"],
+                     "match_name": m["match_name"], "total": m["total"]}
+            if m["match_id"] in start_times:
+                entry["start_time"] = start_times[m["match_id"]]
+            recent.append(entry)
+        part["recent"] = recent
+        parts[part["key"]] = part
+    return parts
+
+
+def build_career(parts):
+    """A player_careers row from all of one player's parts (oldest tournament first)."""
+    latest = parts[-1]
+    career = {
+        "key": latest["key"],
+        "player_name": latest["player_name"],
+        "tournaments": [{"tournament_id": p["tournament_id"], "team": p["team"],
+                         "matches": p["matches"], "total_points": p["total_points"]}
+                        for p in parts],
+        "matches": sum(p["matches"] for p in parts),
+        "total_points": sum(p["total_points"] for p in parts),
+    }
+    if "player_id" in latest:
+        career["player_id"] = latest["player_id"]
+    for field in _POINT_FIELDS:
+        career[field] = sum(p[field] for p in parts)
+    career["average"] = career["total_points"] / career["matches"] if career["matches"] else 0
+    recent = sorted((e for p in parts for e in p["recent"]), key=_form_order)[-FORM_MATCHES:]
+    career["recent_form"] = recent
+    career["form_average"] = sum(e["total"] for e in recent) / len(recent) if recent else 0
+    return career
+
+
+def _rebuild(keys):
+    """Rebuild (or drop) the careers of *keys* from their stored parts."""
+    from db import get_career_parts, save_player_careers
+
+    by_key = {}
+    for part in sorted(get_career_parts(keys=keys), key=_part_order):
+        by_key.setdefault(part["key"], []).append(part)
+    save_player_careers([build_career(parts) for parts in by_key.values()],
+                        [k for k in keys if k not in by_key])
+
+
+def update_tournament(tournament_id, all_players, start_times):
+    """Bring the careers up to date with a tournament's new player points.
+
+    Returns how many careers were rebuilt.
+    """
+    from db import get_career_parts, save_career_parts
+
+    old = {p["key"]: p for p in get_career_parts(tournament_id=tournament_id)}
+    new = tournament_parts(tournament_id, all_players, start_times)
+    changed = {key: part for key, part in new.items() if old.get(key) != part}
+    removed = [key for key in old if key not in new]
+    if not changed and not removed:
+        return 0
+    save_career_parts(tournament_id, changed, removed)
+    _rebuild(list(changed) + removed)
+    return len(changed) + len(removed)
+
+
+def drop_tournament(tournament_id):
+    """Take a (deleted) tournament out of every career."""
+    from db import get_career_parts, save_career_parts
+
+    keys = [p["key"] for p in get_career_parts(tournament_id=tournament_id)]
+    if keys:
+        save_career_parts(tournament_id, {}, keys)
+        _rebuild(keys)
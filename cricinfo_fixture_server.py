@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""Local stand-in for espncricinfo.com, for offline scraper benchmarking.
+
+Serves series-results and full-scorecard pages (with their __NEXT_DATA__
+payloads) from either:
+
+    recorded fixtures   pages captured from the live site with --record, stored
+                        under the fixtures dir mirroring the URL path
+                        (series/<slug>-<id>/<match>-<id>/full-scorecard.html)
+    synthetic matches   --synthetic N generates a seeded series of N completed
+                        matches (see synthetic_tournament.py)
+
+Recorded pages win when both exist. Latency, errors and throttling are
+configurable, so fetch concurrency, retries and the whole auto-scrape
+pipeline can be exercised without the network. Point the scrapers at it
+with CRICINFO_BASE_URL:
+
+    python cricinfo_fixture_server.py --record "https://www.espncricinfo.com/series/.../match-schedule-fixtures-and-results"
+    python cricinfo_fixture_server.py --port 8765 --latency-ms 150 --error-rate 0.02
+    CRICINFO_BASE_URL=http://127.0.0.1:8765 python auto_scrape.py --tournament wt20_2026
+
+    # time auto_scrape.check_tournament end to end against an in-memory datastore
+    python cricinfo_fixture_server.py --synthetic 200 --bench
+
+GET /__stats returns request, error and throttle counts.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "cricinfo")
+
+SYNTHETIC_SERIES = {"slug": "synthetic-t20-series", "objectId": 1000001}
+SYNTHETIC_SERIES_PATH = "/series/{slug}-{objectId}/match-schedule-fixtures-and-results".format(
+    **SYNTHETIC_SERIES)
+
+
+# ---------------------------------------------------------------------------
+# Pages
+# ---------------------------------------------------------------------------
+
+def _page(title, data):
+    return ('<!DOCTYPE html><html><head><title>{}</title></head><body>'
+            '<script id="__NEXT_DATA__" type="application/json">{}</script>'
+            '</body></html>').format(title, json.dumps({"props": {"appPageProps": {"data": data}}}))
+
+
+def _next_data(html):
+    """Return props.appPageProps.data from a page's __NEXT_DATA__, or None."""
+    marker_pos = html.find("__NEXT_DATA__")
+    if marker_pos < 0:
+        return None
+    script_start = html.rfind("<script", 0, marker_pos)
+    content_start = html.find(">", script_start) + 1
+    content_end = html.find("</script>", content_start)
+    return json.loads(html[content_start:content_end]).get("props", {}).get("appPageProps", {}).get("data")
+
+
+def _match_slug(match):
+    return re.sub(r"[^a-z0-9]+", "-", match["match_name"].lower()).strip("-")
+
+
+def scorecard_path(match, series=SYNTHETIC_SERIES):
+    """URL path of a synthetic match's full scorecard."""
+    return "/series/{}-{}/{}-{}/full-scorecard".format(
+        series["slug"], series["objectId"], _match_slug(match), match["match_id"])
+
+
+def render_series_page(matches, series=SYNTHETIC_SERIES):
+    """Render a series-results page listing *matches* as completed."""
+    listed = []
+    for m in matches:
+        home, _, away = m["match_name"].partition(" vs ")
+        listed.append({
+            "objectId": int(m["match_id"]),
+            "slug": _match_slug(m),
+            "title": m["match_name"],
+            "status": "RESULT",
+            "teams": [{"team": {"abbreviation": home[:3].upper()}},
+                      {"team": {"abbreviation": away[:3].upper()}}],
+        })
+    return _page(series["slug"], {"series": series, "content": {"matches": listed}})
+
+
+def synthetic_pages(matches):
+    """Map URL path → HTML for a synthetic series and its scorecards."""
+    from synthetic_tournament import render_scorecard_page
+    pages = {SYNTHETIC_SERIES_PATH: render_series_page(matches)}
+    for m in matches:
+        pages[scorecard_path(m)] = render_scorecard_page(m)
+    return pages
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+def _fixture_file(fixtures_dir, path):
+    path = urlsplit(path).path.strip("/")
+    return os.path.join(fixtures_dir, *path.split("/")) + ".html"
+
+
+def record(urls, fixtures_dir=FIXTURES_DIR, follow=True):
+    """Fetch live pages into *fixtures_dir*; series pages pull in their completed scorecards."""
+    from curl_cffi import requests as cffi_requests
+    from auto_scrape import _build_scorecard_url
+
+    queue = list(urls)
+    saved = 0
+    while queue:
+        url = queue.pop(0)
+        print(f"  Recording {url}")
+        resp = cffi_requests.get(url, impersonate="chrome", timeout=30)
+        resp.raise_for_status()
+        path = _fixture_file(fixtures_dir, url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(resp.text)
+        saved += 1
+
+        if follow and "/full-scorecard" not in url:
+            data = _next_data(resp.text) or {}
+            series = data.get("series", {})
+            for match in data.get("content", {}).get("matches", []):
+                if match.get("status") == "RESULT":
+                    queue.append(_build_scorecard_url(series, match))
+    print(f"Recorded {saved} pages into {fixtures_dir}")
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class FixtureServer(ThreadingHTTPServer):
+    """Replays pages with simulated latency, 503s and 429 throttling."""
+
+    daemon_threads = True
+
+    def __init__(self, address, pages=None, fixtures_dir=FIXTURES_DIR, latency_ms=0,
+                 jitter_ms=0, error_rate=0.0, throttle_rps=0, seed=None):
+        super().__init__(address, _Handler)
+        self.pages = pages or {}
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rps = throttle_rps
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "served": 0, "not_found": 0, "errors": 0, "throttled": 0}
+        self._tokens = float(throttle_rps)
+        self._refilled = time.monotonic()
+
+    @property
+    def base_url(self):
+        return "http://{}:{}".format(*self.server_address[:2])
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def take_token(self):
+        """Token bucket allowing *throttle_rps* requests/second (bursts up to the same)."""
+        if not self.throttle_rps:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.throttle_rps),
+                               self._tokens + (now - self._refilled) * self.throttle_rps)
+            self._refilled = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def delay(self):
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+            fail = self.error_rate and self.rng.random() < self.error_rate
+        seconds = max(0.0, self.latency_ms + jitter) / 1000.0
+        return seconds, fail
+
+    def lookup(self, path):
+        path = urlsplit(path).path.rstrip("/")
+        file_path = _fixture_file(self.fixtures_dir, path)
+        if os.path.isfile(file_path):
+            with open(file_path, encoding="utf-8") as f:
+                return f.read()
+        return self.pages.get(path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "CricinfoFixture/1.0"
+
+    def do_GET(self):
+        server = self.server
+        server.count("requests")
+        if self.path == "/__stats":
+            with server.lock:
+                return self._send(200, json.dumps(server.stats), "application/json")
+
+        if not server.take_token():
+            server.count("throttled")
+            return self._send(429, "Too Many Requests", headers={"Retry-After": "1"})
+        seconds, fail = server.delay()
+        if seconds:
+            time.sleep(seconds)
+        if fail:
+            server.count("errors")
+            return self._send(503, "Service Unavailable")
+
+        html = server.lookup(self.path)
+        if html is None:
+            server.count("not_found")
+            return self._send(404, "Not Found")
+        server.count("served")
+        self._send(200, html)
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port=0, **kwargs):
+    """Start a FixtureServer on a background thread and return it."""
+    server = FixtureServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Offline auto-scrape benchmark
+# ---------------------------------------------------------------------------
+
+def bench_auto_scrape(server, matches):
+    """Time auto_scrape.check_tournament for the synthetic series against *server*."""
+    import contextlib
+    import io
+    from bench_pipeline import use_inmemory_datastore
+
+    use_inmemory_datastore()
+    os.environ["CRICINFO_BASE_URL"] = server.base_url
+    from db import create_tournament
+    from auto_scrape import check_tournament
+    from synthetic_tournament import generate
+
+    roster = generate(seed=7, matches=1)["roster"]
+    create_tournament("fixture_bench", "Fixture bench", roster)
+    series_url = "https://www.espncricinfo.com" + SYNTHETIC_SERIES_PATH
+
+    start_s = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = check_tournament("fixture_bench", series_url)
+    elapsed = time.perf_counter() - start_s
+
+    new = len(result["new_matches"])
+    print(f"check_tournament: {new}/{len(matches)} matches scraped, "
+          f"{len(result['errors'])} errors in {elapsed:.2f}s "
+          f"({new / elapsed if elapsed else 0:.1f} matches/s)")
+    print(f"server: {json.dumps(server.stats)}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded/synthetic Cricinfo pages locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Recorded pages directory")
+    parser.add_argument("--record", nargs="+", metavar="URL",
+                        help="Record live pages into --fixtures and exit")
+    parser.add_argument("--no-follow", action="store_true",
+                        help="With --record, don't record a series page's scorecards")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N",
+                        help="Also serve a synthetic series of N matches at " + SYNTHETIC_SERIES_PATH)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 503")
+    parser.add_argument("--throttle-rps", type=float, default=0,
+                        help="Answer 429 above this many requests/second (0 = off)")
+    parser.add_argument("--bench", action="store_true",
+                        help="Run auto_scrape.check_tournament against the synthetic series and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.fixtures, follow=not args.no_follow)
+        return
+
+    matches = []
+    if args.synthetic:
+        from synthetic_tournament import generate
+        matches = generate(seed=args.seed, matches=args.synthetic)["matches"]
+    elif args.bench:
+        parser.error("--bench needs --synthetic N")
+
+    server = start(args.port if not args.bench else 0, pages=synthetic_pages(matches),
+                   fixtures_dir=args.fixtures, latency_ms=args.latency_ms,
+                   jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                   throttle_rps=args.throttle_rps, seed=args.seed)
+
+    if args.bench:
+        bench_auto_scrape(server, matches)
+        return
+
+    print(f"Serving Cricinfo fixtures at {server.base_url}")
+    if matches:
+        print(f"  synthetic series: {server.base_url}{SYNTHETIC_SERIES_PATH}")
+    print(f"  export CRICINFO_BASE_URL={server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
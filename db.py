@@ -1,45 +1,81 @@
-"""MongoDB persistence layer for T20 Fantasy Hub.
-
-Multi-tournament support: every document is scoped by tournament_id.
-Connection string from MONGODB_URI env var (or .env file).
-
-Collections:
-    tournaments      — one doc per tournament (metadata + player roster)
-    matches          — one doc per match (keyed by tournament_id + match_id)
-    player_points    — one doc per player per tournament
-    leaderboard      — one doc per tournament
-    team_leaderboard — one doc per tournament
+"""Persistence layer for T20 Fantasy Hub.
+
+Multi-tournament support: every record is scoped by tournament_id.
+The functions below delegate to a pluggable backend (see storage.py),
+chosen by STORAGE_BACKEND (or .env):
+
+    mongo   MongoDB at MONGODB_URI (default; MONGODB_URI=mongomock:// for an
+            in-memory stand-in)                       storage_mongo.py
+    sqlite  embedded SQLite file at SQLITE_PATH       storage_sqlite.py
+    memory  SQLite in memory, for tests and demos
+
+Records:
+    tournaments      — one per tournament (metadata)
+    rosters          — one per player per tournament (keyed by normalised name)
+    matches          — one per match (keyed by tournament_id + match_id)
+    player_points    — one per player per tournament
+    leaderboard      — one per player per tournament, indexed by rank
+    team_leaderboard — one per tournament
+    response_bodies  — pre-rendered (and pre-compressed) read responses
+    player_match_stats — per player per match: raw scoring inputs
+    match_scores     — per-match scores, keyed by content hash + rules version
+    standings_history — per team / per player: totals and ranks after each match
+    career_parts     — per player per tournament: totals and recent matches
+    player_careers   — per player: totals across all tournaments
 """
 
 import os
-import copy
-import certifi
+
 from dotenv import load_dotenv
-from pymongo import MongoClient
+
+from storage import open_storage
 
 # Load .env file (if present) so you don't need to export vars manually
 load_dotenv()
 
-_client = None
-_db = None
+_storage = None
+
+
+def get_storage():
+    """Return the configured storage backend, opening it on first call."""
+    global _storage
+    if _storage is None:
+        _storage = open_storage()
+    return _storage
+
+
+def reset_storage():
+    """Forget the open backend; the next call re-reads the environment."""
+    global _storage
+    _storage = None
+
+
+def warm_up():
+    """Open (and check) this process's datastore connections now."""
+    get_storage().warm_up()
+
+
+def close_storage():
+    """Close this process's datastore connections (reopened on next use)."""
+    if _storage is not None:
+        _storage.close()
 
-DB_NAME = os.environ.get("MONGODB_DB_NAME", "wt20")
+
+def _after_fork_in_child():
+    if _storage is not None:
+        _storage.after_fork()
+
+
+# gunicorn --preload (or any fork) must not share connections with the parent
+os.register_at_fork(after_in_child=_after_fork_in_child)
 
 
 def get_db():
-    """Return the MongoDB database handle, creating the connection on first call."""
-    global _client, _db
-    if _db is not None:
-        return _db
-    uri = os.environ.get("MONGODB_URI")
-    if not uri:
-        raise RuntimeError(
-            "MONGODB_URI environment variable is not set. "
-            "Set it to your MongoDB Atlas connection string."
-        )
-    _client = MongoClient(uri, tlsCAFile=certifi.where())
-    _db = _client[DB_NAME]
-    return _db
+    """Return the MongoDB database handle (mongo backend only)."""
+    storage = get_storage()
+    if storage.name != "mongo":
+        raise RuntimeError("get_db() needs STORAGE_BACKEND=mongo (using '{}')".format(storage.name))
+    return storage.db
 
 
 # ---------------------------------------------------------------------------
@@ -48,115 +84,97 @@ def get_db():
 
 def create_tournament(tournament_id, name, players=None, series_url=""):
     """Create a new tournament. players is a list of {player_name, team} dicts."""
-    db = get_db()
-    if db.tournaments.find_one({"tournament_id": tournament_id}):
-        raise ValueError("Tournament '{}' already exists".format(tournament_id))
-    doc = {
-        "tournament_id": tournament_id,
-        "name": name,
-        "players": players or [],
-        "series_url": series_url or "",
-    }
-    db.tournaments.insert_one(doc)
-    return doc
+    return get_storage().create_tournament(tournament_id, name, players, series_url)
 
 
 def get_tournament(tournament_id):
-    """Return a tournament document or None."""
-    db = get_db()
-    return db.tournaments.find_one({"tournament_id": tournament_id}, {"_id": 0})
+    """Return a tournament document (metadata, without the roster) or None.
+
+    Includes "scoring_rules" if the tournament has its own.
+    """
+    return get_storage().get_tournament(tournament_id)
 
 
 def list_tournaments():
     """Return all tournaments (summary: id, name, player count, series_url)."""
-    db = get_db()
-    docs = db.tournaments.find({}, {"_id": 0, "tournament_id": 1, "name": 1, "players": 1, "series_url": 1})
-    results = []
-    for doc in docs:
-        results.append({
-            "tournament_id": doc["tournament_id"],
-            "name": doc.get("name", doc["tournament_id"]),
-            "player_count": len(doc.get("players", [])),
-            "series_url": doc.get("series_url", ""),
-        })
-    return results
+    return get_storage().list_tournaments()
 
 
 def update_tournament_series_url(tournament_id, series_url):
     """Update the Cricinfo series URL for a tournament."""
-    db = get_db()
-    db.tournaments.update_one(
-        {"tournament_id": tournament_id},
-        {"$set": {"series_url": series_url}},
-    )
+    get_storage().update_tournament_series_url(tournament_id, series_url)
 
 
 def update_tournament_name(tournament_id, name):
     """Update tournament display name."""
-    db = get_db()
-    db.tournaments.update_one(
-        {"tournament_id": tournament_id},
-        {"$set": {"name": name}},
-    )
+    get_storage().update_tournament_name(tournament_id, name)
+
+
+def bump_data_version(tournament_id):
+    """Increment and return the tournament's data version.
+
+    Called once per recalculation; cached responses are keyed by it.
+    """
+    return get_storage().bump_data_version(tournament_id)
+
+
+def get_data_version(tournament_id):
+    """Return the tournament's data version (0 if never recalculated, None if missing)."""
+    return get_storage().get_data_version(tournament_id)
 
 
 def delete_tournament(tournament_id):
     """Delete a tournament and ALL its associated data."""
-    db = get_db()
-    if not db.tournaments.find_one({"tournament_id": tournament_id}):
-        return False
-    db.tournaments.delete_one({"tournament_id": tournament_id})
-    db.matches.delete_many({"tournament_id": tournament_id})
-    db.player_points.delete_many({"tournament_id": tournament_id})
-    db.leaderboard.delete_many({"tournament_id": tournament_id})
-    db.team_leaderboard.delete_many({"tournament_id": tournament_id})
-    return True
+    return get_storage().delete_tournament(tournament_id)
+
+
+def rename_tournament(tournament_id, new_id):
+    """Move a tournament and ALL its associated data to *new_id* (which must be free)."""
+    return get_storage().rename_tournament(tournament_id, new_id)
+
+
+def set_scoring_rules(tournament_id, rules):
+    """Store a tournament's scoring rule set (see scoring.validate_rules); None resets it."""
+    get_storage().set_scoring_rules(tournament_id, rules)
+
+
+def list_scoring_rules():
+    """Return the scoring rule set of every tournament that has its own."""
+    return get_storage().list_scoring_rules()
 
 
 # ---------------------------------------------------------------------------
-# Player roster helpers (stored inside tournament doc)
+# Player roster helpers (one record per player, keyed by normalised name)
 # ---------------------------------------------------------------------------
 
 def get_players(tournament_id):
-    """Return the player roster [{player_name, team}, ...] for a tournament."""
-    doc = get_tournament(tournament_id)
-    if not doc:
-        return []
-    return doc.get("players", [])
+    """Return the player roster [{player_name, team[, player_id]}, ...] for a tournament."""
+    return get_storage().get_players(tournament_id)
+
+
+def count_players(tournament_id):
+    """Return how many players are on a tournament's roster."""
+    return get_storage().count_players(tournament_id)
 
 
 def set_players(tournament_id, players):
     """Replace the entire roster for a tournament."""
-    db = get_db()
-    db.tournaments.update_one(
-        {"tournament_id": tournament_id},
-        {"$set": {"players": players}},
-    )
-
-
-def add_player(tournament_id, player_name, team):
-    """Add or update a single player in the roster."""
-    db = get_db()
-    # Remove existing entry for this player (if any)
-    db.tournaments.update_one(
-        {"tournament_id": tournament_id},
-        {"$pull": {"players": {"player_name": player_name}}},
-    )
-    # Add the new/updated entry
-    db.tournaments.update_one(
-        {"tournament_id": tournament_id},
-        {"$push": {"players": {"player_name": player_name, "team": team}}},
-    )
+    get_storage().set_players(tournament_id, players)
+
+
+def add_player(tournament_id, player_name, team, player_id=None):
+    """Add or update a single player in the roster (player_id: Cricinfo id, if known)."""
+    get_storage().add_player(tournament_id, player_name, team, player_id)
+
+
+def set_player_ids(tournament_id, player_ids):
+    """Record Cricinfo ids ({name_key: player_id}) on existing roster entries."""
+    get_storage().set_player_ids(tournament_id, player_ids)
 
 
 def remove_player(tournament_id, player_name):
     """Remove a player from the roster."""
-    db = get_db()
-    result = db.tournaments.update_one(
-        {"tournament_id": tournament_id},
-        {"$pull": {"players": {"player_name": player_name}}},
-    )
-    return result.modified_count > 0
+    return get_storage().remove_player(tournament_id, player_name)
 
 
 # ---------------------------------------------------------------------------
@@ -164,58 +182,85 @@ def remove_player(tournament_id, player_name):
 # ---------------------------------------------------------------------------
 
 def save_match(tournament_id, match_data):
-    """Upsert a match document (keyed by tournament_id + match_id)."""
-    db = get_db()
-    match_id = str(match_data.get("match_id", ""))
-    if not match_id:
-        raise ValueError("match_data must contain a 'match_id' field")
-    match_data["tournament_id"] = tournament_id
-    db.matches.update_one(
-        {"tournament_id": tournament_id, "match_id": match_id},
-        {"$set": match_data},
-        upsert=True,
-    )
+    """Upsert a match document (keyed by tournament_id + match_id).
+
+    Returns False (and writes nothing) if the stored match has the same
+    content hash, i.e. the scorecard hasn't changed.
+    """
+    return get_storage().save_match(tournament_id, match_data)
 
 
 def get_match(tournament_id, match_id):
     """Return a single match document or None."""
-    db = get_db()
-    return db.matches.find_one(
-        {"tournament_id": tournament_id, "match_id": str(match_id)},
-        {"_id": 0},
-    )
+    return get_storage().get_match(tournament_id, match_id)
 
 
 def get_all_matches(tournament_id):
     """Return every match document for a tournament."""
-    db = get_db()
-    return list(db.matches.find({"tournament_id": tournament_id}, {"_id": 0}))
+    return get_storage().get_all_matches(tournament_id)
+
+
+def count_matches(tournament_id):
+    """Return how many matches a tournament has."""
+    return get_storage().count_matches(tournament_id)
 
 
 def delete_match(tournament_id, match_id):
-    """Delete a match. Returns True if something was deleted."""
-    db = get_db()
-    result = db.matches.delete_one(
-        {"tournament_id": tournament_id, "match_id": str(match_id)}
-    )
-    return result.deleted_count > 0
+    """Delete a match (and its stats). Returns True if something was deleted."""
+    return get_storage().delete_match(tournament_id, match_id)
 
 
 def get_match_summaries(tournament_id):
     """Return lightweight list of matches for a tournament."""
-    db = get_db()
-    docs = db.matches.find(
-        {"tournament_id": tournament_id},
-        {"_id": 0, "match_id": 1, "match_name": 1, "cricinfo_url": 1},
-    )
-    return [
-        {
-            "match_id": d.get("match_id", ""),
-            "match_name": d.get("match_name", ""),
-            "cricinfo_url": d.get("cricinfo_url", ""),
-        }
-        for d in docs
-    ]
+    return get_storage().get_match_summaries(tournament_id)
+
+
+def get_match_hashes(tournament_id):
+    """Return [(match_id, content_hash)] for a tournament's matches, in stored order."""
+    return get_storage().get_match_hashes(tournament_id)
+
+
+def get_matches(tournament_id, match_ids):
+    """Return the match documents with these ids."""
+    return get_storage().get_matches(tournament_id, match_ids)
+
+
+def save_matches(tournament_id, matches):
+    """Upsert whole match documents in one batch (replacing stored ones with the same id)."""
+    get_storage().save_matches(tournament_id, matches)
+
+
+# ---------------------------------------------------------------------------
+# Per-player match stats (raw scoring inputs, see calculate_points.match_stats)
+# ---------------------------------------------------------------------------
+
+def save_player_match_stats(tournament_id, stats):
+    """Replace the stored stats of matches ({match_id: stats with content_hash})."""
+    get_storage().save_player_match_stats(tournament_id, stats)
+
+
+def get_player_match_stats(tournament_id, match_ids=None):
+    """Return {match_id: stats} for these matches (default: all)."""
+    return get_storage().get_player_match_stats(tournament_id, match_ids)
+
+
+# ---------------------------------------------------------------------------
+# Per-match score cache (keyed by match content hash + scoring rules version)
+# ---------------------------------------------------------------------------
+
+def get_match_scores(rules_version, content_hashes):
+    """Return {content_hash: scores} for the cached ones of *content_hashes*."""
+    return get_storage().get_match_scores(rules_version, content_hashes)
+
+
+def save_match_scores(rules_version, scores):
+    """Cache per-match scores ({content_hash: scores}) under *rules_version*."""
+    get_storage().save_match_scores(rules_version, scores)
+
+
+def evict_match_scores(rules_versions):
+    """Delete scores cached under any rules version not in *rules_versions*; return how many."""
+    return get_storage().evict_match_scores(rules_versions)
 
 
 # ---------------------------------------------------------------------------
@@ -224,46 +269,103 @@ def get_match_summaries(tournament_id):
 
 def save_all_player_points(tournament_id, player_points_list):
     """Replace all player points for a tournament."""
-    db = get_db()
-    db.player_points.delete_many({"tournament_id": tournament_id})
-    if player_points_list:
-        docs = copy.deepcopy(player_points_list)
-        for d in docs:
-            d["tournament_id"] = tournament_id
-        db.player_points.insert_many(docs)
+    get_storage().save_all_player_points(tournament_id, player_points_list)
 
 
 def get_all_player_points(tournament_id):
     """Return every player-points document for a tournament."""
-    db = get_db()
-    return list(db.player_points.find({"tournament_id": tournament_id}, {"_id": 0, "tournament_id": 0}))
+    return get_storage().get_all_player_points(tournament_id)
 
 
 def save_leaderboard(tournament_id, leaderboard):
-    """Replace the leaderboard for a tournament."""
-    db = get_db()
-    db.leaderboard.delete_many({"tournament_id": tournament_id})
-    if leaderboard:
-        db.leaderboard.insert_one({"tournament_id": tournament_id, "data": leaderboard})
+    """Replace the leaderboard for a tournament.
+
+    Each row is stored as its own record; rows must carry a 1-based "rank".
+    """
+    get_storage().save_leaderboard(tournament_id, leaderboard)
 
 
 def get_leaderboard(tournament_id):
-    """Return the leaderboard list for a tournament."""
-    db = get_db()
-    doc = db.leaderboard.find_one({"tournament_id": tournament_id}, {"_id": 0})
-    return doc.get("data", []) if doc else []
+    """Return the leaderboard list for a tournament, ordered by rank."""
+    return get_leaderboard_page(tournament_id, limit=0)
+
+
+def get_leaderboard_page(tournament_id, after_rank=0, limit=50, max_rank=None,
+                         team=None, fields=None):
+    """Return one page of leaderboard rows, ordered by rank.
+
+    after_rank — cursor: only rows ranked below this one
+    limit      — page size (0 = no limit)
+    max_rank   — only rows ranked at or above this one (top-N)
+    team       — only rows for this team
+    fields     — row fields to return (default: all)
+    """
+    return get_storage().get_leaderboard_page(tournament_id, after_rank, limit, max_rank,
+                                              team, fields)
 
 
 def save_team_leaderboard(tournament_id, team_leaderboard):
     """Replace the team leaderboard for a tournament."""
-    db = get_db()
-    db.team_leaderboard.delete_many({"tournament_id": tournament_id})
-    if team_leaderboard:
-        db.team_leaderboard.insert_one({"tournament_id": tournament_id, "data": team_leaderboard})
+    get_storage().save_team_leaderboard(tournament_id, team_leaderboard)
 
 
 def get_team_leaderboard(tournament_id):
     """Return the team leaderboard list for a tournament."""
-    db = get_db()
-    doc = db.team_leaderboard.find_one({"tournament_id": tournament_id}, {"_id": 0})
-    return doc.get("data", []) if doc else []
+    return get_storage().get_team_leaderboard(tournament_id)
+
+
+# ---------------------------------------------------------------------------
+# Standings history (cumulative totals and ranks after each match)
+# ---------------------------------------------------------------------------
+
+def save_standings_history(tournament_id, history):
+    """Replace the standings history (see calculate_points.recalculate_all)."""
+    get_storage().save_standings_history(tournament_id, history)
+
+
+def get_standings_history(tournament_id, kind, keys=None):
+    """Return {"matches": [...], kind: rows} for kind "teams" or "players" (only *keys*, if given)."""
+    return get_storage().get_standings_history(tournament_id, kind, keys)
+
+
+# ---------------------------------------------------------------------------
+# Player careers across tournaments (see careers.py)
+# ---------------------------------------------------------------------------
+
+def get_career_parts(tournament_id=None, keys=None):
+    """Return the career parts of a tournament and/or of these career keys."""
+    return get_storage().get_career_parts(tournament_id, keys)
+
+
+def save_career_parts(tournament_id, parts, removed_keys):
+    """Upsert a tournament's career parts ({key: part}) and delete those of *removed_keys*."""
+    get_storage().save_career_parts(tournament_id, parts, removed_keys)
+
+
+def save_player_careers(careers, removed_keys):
+    """Upsert career rows and delete those of *removed_keys*."""
+    get_storage().save_player_careers(careers, removed_keys)
+
+
+def get_player_careers(limit=50, offset=0):
+    """Return career rows by total points (highest first), *offset* rows in."""
+    return get_storage().get_player_careers(limit, offset)
+
+
+def get_player_career(key):
+    """Return one player's career (key: careers.career_key) or None."""
+    return get_storage().get_player_career(key)
+
+
+# ---------------------------------------------------------------------------
+# Pre-rendered response bodies (scoped by tournament_id)
+# ---------------------------------------------------------------------------
+
+def save_response_bodies(tournament_id, version, bodies):
+    """Upsert rendered bodies ({name: bytes}) for a tournament at *version*."""
+    get_storage().save_response_bodies(tournament_id, version, bodies)
+
+
+def get_response_bodies(tournament_id):
+    """Return (version, {name: bytes}) for the latest rendered bodies, or (None, {})."""
+    return get_storage().get_response_bodies(tournament_id)
@@ -0,0 +1,300 @@
+"""Asyncio mirror of db.py, for the ASGI server (asgi.py).
+
+Same functions and return values as db.py, as coroutines. The MongoDB
+backend uses pymongo's native asyncio client, so a slow query suspends the
+request instead of holding a thread. Backends without an asyncio driver
+(SQLite, mongomock) run on asyncio's thread pool against the very same
+storage instance db.py uses.
+"""
+
+from storage import ThreadedAsyncStorage
+
+_storage = None
+_source = None  # the db.py storage _storage was opened for
+
+
+def get_storage():
+    """Return the async view of db.py's storage backend."""
+    global _storage, _source
+    import db
+    sync = db.get_storage()
+    if _source is not sync:
+        if sync.name == "mongo" and not sync.uri.startswith("mongomock://"):
+            from storage_mongo import AsyncMongoStorage
+            _storage = AsyncMongoStorage(sync.uri)
+        else:
+            _storage = ThreadedAsyncStorage(sync)
+        _source = sync
+    return _storage
+
+
+# ---------------------------------------------------------------------------
+# Tournament helpers
+# ---------------------------------------------------------------------------
+
+async def create_tournament(tournament_id, name, players=None, series_url=""):
+    """Create a new tournament. players is a list of {player_name, team} dicts."""
+    return await get_storage().create_tournament(tournament_id, name, players, series_url)
+
+
+async def get_tournament(tournament_id):
+    """Return a tournament document or None."""
+    return await get_storage().get_tournament(tournament_id)
+
+
+async def list_tournaments():
+    """Return all tournaments (summary: id, name, player count, series_url)."""
+    return await get_storage().list_tournaments()
+
+
+async def update_tournament_series_url(tournament_id, series_url):
+    """Update the Cricinfo series URL for a tournament."""
+    await get_storage().update_tournament_series_url(tournament_id, series_url)
+
+
+async def update_tournament_name(tournament_id, name):
+    """Update tournament display name."""
+    await get_storage().update_tournament_name(tournament_id, name)
+
+
+async def bump_data_version(tournament_id):
+    """Increment and return the tournament's data version."""
+    return await get_storage().bump_data_version(tournament_id)
+
+
+async def get_data_version(tournament_id):
+    """Return the tournament's data version (0 if never recalculated, None if missing)."""
+    return await get_storage().get_data_version(tournament_id)
+
+
+async def delete_tournament(tournament_id):
+    """Delete a tournament and ALL its associated data."""
+    return await get_storage().delete_tournament(tournament_id)
+
+
+async def set_scoring_rules(tournament_id, rules):
+    """Store a tournament's scoring rule set (see scoring.validate_rules); None resets it."""
+    await get_storage().set_scoring_rules(tournament_id, rules)
+
+
+async def list_scoring_rules():
+    """Return the scoring rule set of every tournament that has its own."""
+    return await get_storage().list_scoring_rules()
+
+
+# ---------------------------------------------------------------------------
+# Player roster helpers
+# ---------------------------------------------------------------------------
+
+async def get_players(tournament_id):
+    """Return the player roster [{player_name, team[, player_id]}, ...] for a tournament."""
+    return await get_storage().get_players(tournament_id)
+
+
+async def count_players(tournament_id):
+    """Return how many players are on a tournament's roster."""
+    return await get_storage().count_players(tournament_id)
+
+
+async def set_players(tournament_id, players):
+    """Replace the entire roster for a tournament."""
+    await get_storage().set_players(tournament_id, players)
+
+
+async def add_player(tournament_id, player_name, team, player_id=None):
+    """Add or update a single player in the roster (player_id: Cricinfo id, if known)."""
+    await get_storage().add_player(tournament_id, player_name, team, player_id)
+
+
+async def set_player_ids(tournament_id, player_ids):
+    """Record Cricinfo ids ({name_key: player_id}) on existing roster entries."""
+    await get_storage().set_player_ids(tournament_id, player_ids)
+
+
+async def remove_player(tournament_id, player_name):
+    """Remove a player from the roster."""
+    return await get_storage().remove_player(tournament_id, player_name)
+
+
+# ---------------------------------------------------------------------------
+# Match helpers
+# ---------------------------------------------------------------------------
+
+async def save_match(tournament_id, match_data):
+    """Upsert a match document (keyed by tournament_id + match_id).
+
+    Returns False (and writes nothing) if the stored match has the same
+    content hash, i.e. the scorecard hasn't changed.
+    """
+    return await get_storage().save_match(tournament_id, match_data)
+
+
+async def get_match(tournament_id, match_id):
+    """Return a single match document or None."""
+    return await get_storage().get_match(tournament_id, match_id)
+
+
+async def get_all_matches(tournament_id):
+    """Return every match document for a tournament."""
+    return await get_storage().get_all_matches(tournament_id)
+
+
+async def count_matches(tournament_id):
+    """Return how many matches a tournament has."""
+    return await get_storage().count_matches(tournament_id)
+
+
+async def delete_match(tournament_id, match_id):
+    """Delete a match (and its stats). Returns True if something was deleted."""
+    return await get_storage().delete_match(tournament_id, match_id)
+
+
+async def get_match_summaries(tournament_id):
+    """Return lightweight list of matches for a tournament."""
+    return await get_storage().get_match_summaries(tournament_id)
+
+
+async def get_match_hashes(tournament_id):
+    """Return [(match_id, content_hash)] for a tournament's matches, in stored order."""
+    return await get_storage().get_match_hashes(tournament_id)
+
+
+async def get_matches(tournament_id, match_ids):
+    """Return the match documents with these ids."""
+    return await get_storage().get_matches(tournament_id, match_ids)
+
+
+async def save_matches(tournament_id, matches):
+    """Upsert whole match documents in one batch (replacing stored ones with the same id)."""
+    await get_storage().save_matches(tournament_id, matches)
+
+
+# ---------------------------------------------------------------------------
+# Per-player match stats (raw scoring inputs, see calculate_points.match_stats)
+# ---------------------------------------------------------------------------
+
+async def save_player_match_stats(tournament_id, stats):
+    """Replace the stored stats of matches ({match_id: stats with content_hash})."""
+    await get_storage().save_player_match_stats(tournament_id, stats)
+
+
+async def get_player_match_stats(tournament_id, match_ids=None):
+    """Return {match_id: stats} for these matches (default: all)."""
+    return await get_storage().get_player_match_stats(tournament_id, match_ids)
+
+
+# ---------------------------------------------------------------------------
+# Per-match score cache (keyed by match content hash + scoring rules version)
+# ---------------------------------------------------------------------------
+
+async def get_match_scores(rules_version, content_hashes):
+    """Return {content_hash: scores} for the cached ones of *content_hashes*."""
+    return await get_storage().get_match_scores(rules_version, content_hashes)
+
+
+async def save_match_scores(rules_version, scores):
+    """Cache per-match scores ({content_hash: scores}) under *rules_version*."""
+    await get_storage().save_match_scores(rules_version, scores)
+
+
+async def evict_match_scores(rules_versions):
+    """Delete scores cached under any rules version not in *rules_versions*; return how many."""
+    return await get_storage().evict_match_scores(rules_versions)
+
+
+# ---------------------------------------------------------------------------
+# Player-points / leaderboard helpers
+# ---------------------------------------------------------------------------
+
+async def save_all_player_points(tournament_id, player_points_list):
+    """Replace all player points for a tournament."""
+    await get_storage().save_all_player_points(tournament_id, player_points_list)
+
+
+async def get_all_player_points(tournament_id):
+    """Return every player-points document for a tournament."""
+    return await get_storage().get_all_player_points(tournament_id)
+
+
+async def save_leaderboard(tournament_id, leaderboard):
+    """Replace the leaderboard for a tournament."""
+    await get_storage().save_leaderboard(tournament_id, leaderboard)
+
+
+async def get_leaderboard(tournament_id):
+    """Return the leaderboard list for a tournament, ordered by rank."""
+    return await get_leaderboard_page(tournament_id, limit=0)
+
+
+async def get_leaderboard_page(tournament_id, after_rank=0, limit=50, max_rank=None,
+                               team=None, fields=None):
+    """Return one page of leaderboard rows, ordered by rank."""
+    return await get_storage().get_leaderboard_page(tournament_id, after_rank, limit, max_rank,
+                                                    team, fields)
+
+
+async def save_team_leaderboard(tournament_id, team_leaderboard):
+    """Replace the team leaderboard for a tournament."""
+    await get_storage().save_team_leaderboard(tournament_id, team_leaderboard)
+
+
+async def get_team_leaderboard(tournament_id):
+    """Return the team leaderboard list for a tournament."""
+    return await get_storage().get_team_leaderboard(tournament_id)
+
+
+# ---------------------------------------------------------------------------
+# Standings history (cumulative totals and ranks after each match)
+# ---------------------------------------------------------------------------
+
+async def save_standings_history(tournament_id, history):
+    """Replace the standings history (see calculate_points.recalculate_all)."""
+    await get_storage().save_standings_history(tournament_id, history)
+
+
+async def get_standings_history(tournament_id, kind, keys=None):
+    """Return {"matches": [...], kind: rows} for kind "teams" or "players" (only *keys*, if given)."""
+    return await get_storage().get_standings_history(tournament_id, kind, keys)
+
+
+# ---------------------------------------------------------------------------
+# Player careers across tournaments (see careers.py)
+# ---------------------------------------------------------------------------
+
+async def get_career_parts(tournament_id=None, keys=None):
+    """Return the career parts of a tournament and/or of these career keys."""
+    return await get_storage().get_career_parts(tournament_id, keys)
+
+
+async def save_career_parts(tournament_id, parts, removed_keys):
+    """Upsert a tournament's career parts ({key: part}) and delete those of *removed_keys*."""
+    await get_storage().save_career_parts(tournament_id, parts, removed_keys)
+
+
+async def save_player_careers(careers, removed_keys):
+    """Upsert career rows and delete those of *removed_keys*."""
+    await get_storage().save_player_careers(careers, removed_keys)
+
+
+async def get_player_careers(limit=50, offset=0):
+    """Return career rows by total points (highest first), *offset* rows in."""
+    return await get_storage().get_player_careers(limit, offset)
+
+
+async def get_player_career(key):
+    """Return one player's career (key: careers.career_key) or None."""
+    return await get_storage().get_player_career(key)
+
+
+# ---------------------------------------------------------------------------
+# Pre-rendered response bodies
+# ---------------------------------------------------------------------------
+
+async def save_response_bodies(tournament_id, version, bodies):
+    """Upsert rendered bodies ({name: bytes}) for a tournament at *version*."""
+    await get_storage().save_response_bodies(tournament_id, version, bodies)
+
+
+async def get_response_bodies(tournament_id):
+    """Return (version, {name: bytes}) for the latest rendered bodies, or (None, {})."""
+    return await get_storage().get_response_bodies(tournament_id)
@@ -0,0 +1,219 @@
+"""Columnar export of scoring data for analysis.
+
+One row per player per match: match metadata, the player's raw stats (as
+stored in player_match_stats) and their points under the tournament's
+scoring rules. Written per tournament, Hive-partitioned, so any Parquet
+reader can load one tournament or all of them:
+
+    <out>/tournament_id=wt20_2026/part-0.parquet
+    <out>/tournament_id=ipl_2026/part-0.parquet
+
+    python export.py exports/                        # every tournament
+    python export.py exports/ -t wt20_2026 -f arrow  # one, as Arrow IPC
+
+Matches are read EXPORT_MATCHES_PER_READ at a time and written in record
+batches of EXPORT_BATCH_ROWS rows, so memory stays bounded however big the
+tournament. "csv" is there for spreadsheets.
+"""
+
+import argparse
+import contextlib
+import csv
+import os
+import tempfile
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BATCH_ROWS = int(os.environ.get("EXPORT_BATCH_ROWS", "10000"))
+MATCHES_PER_READ = int(os.environ.get("EXPORT_MATCHES_PER_READ", "50"))
+
+# format → (file suffix, MIME type)
+FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file"),
+    "csv": (".csv", "text/csv"),
+}
+
+# (column, type); tournament_id is the partition key, not a column
+COLUMNS = (
+    ("match_id", "string"),
+    ("match_name", "string"),
+    ("start_time", "string"),
+    ("player", "string"),
+    ("player_id", "int"),
+    ("team", "string"),
+    # batting (null if they didn't bat)
+    ("runs", "int"), ("balls", "int"), ("fours", "int"), ("sixes", "int"), ("out", "bool"),
+    # bowling (null if they didn't bowl)
+    ("balls_bowled", "int"), ("maidens", "int"), ("runs_conceded", "int"),
+    ("wickets", "int"), ("dots", "int"),
+    # fielding (null if no fielding entry)
+    ("catches", "int"), ("runouts", "int"), ("stumpings", "int"),
+    ("mom", "bool"),
+    ("batting_points", "float"), ("bowling_points", "float"), ("fielding_points", "float"),
+    ("mom_points", "float"), ("total_points", "float"),
+)
+
+# stats component → (stat field, column) pairs
+_STAT_COLUMNS = {
+    "batting": (("runs", "runs"), ("balls", "balls"), ("fours", "fours"), ("sixes", "sixes")),
+    "bowling": (("balls", "balls_bowled"), ("maidens", "maidens"), ("runs", "runs_conceded"),
+                ("wickets", "wickets"), ("dots", "dots")),
+    "fielding": (("catches", "catches"), ("runout", "runouts"), ("stumpings", "stumpings")),
+}
+
+
+def _arrow_schema():
+    types = {"string": pa.string(), "int": pa.int64(), "bool": pa.bool_(), "float": pa.float64()}
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+# ---------------------------------------------------------------------------
+# Rows
+# ---------------------------------------------------------------------------
+
+def iter_rows(tournament_id):
+    """Yield a tournament's export rows, match by match in stored order."""
+    from calculate_points import _current_stats, load_rule_set, score_stats
+    from db import get_all_player_points, get_match_hashes
+    from storage import normalise_name
+
+    # Fantasy teams as of the last recalculation
+    by_id, by_name = {}, {}
+    for p in get_all_player_points(tournament_id):
+        if p.get("player_id") is not None:
+            by_id[p["player_id"]] = p["team"]
+        by_name[normalise_name(p["player_name"])] = p["team"]
+    rule_set = load_rule_set(tournament_id)
+
+    index = get_match_hashes(tournament_id)
+    for start in range(0, len(index), MATCHES_PER_READ):
+        chunk = dict(index[start:start + MATCHES_PER_READ])
+        stats, _ = _current_stats(tournament_id, chunk)
+        for match_id in chunk:
+            match = stats[match_id]
+            scored = score_stats(match, rule_set)
+            for stat_row, score_row in zip(match["players"], scored["players"]):
+                player_id = stat_row["player_id"]
+                row = {
+                    "match_id": match_id,
+                    "match_name": match["match_name"],
+                    "start_time": match.get("start_time"),
+                    "player": stat_row["player"],
+                    "player_id": player_id,
+                    "team": by_id.get(player_id) or by_name.get(normalise_name(stat_row["player"])),
+                }
+                for component, columns in _STAT_COLUMNS.items():
+                    values = stat_row.get(component)
+                    for field, column in columns:
+                        row[column] = values[field] if values else None
+                batting = stat_row.get("batting")
+                row["out"] = None if batting is None else "dismissal" in batting
+                row["mom"] = bool(stat_row.get("mom"))
+                row["batting_points"] = score_row["batting_points"]
+                row["bowling_points"] = score_row["bowling_points"]
+                row["fielding_points"] = score_row["fielding_points"]
+                row["mom_points"] = score_row["mom"]
+                row["total_points"] = score_row["total"]
+                yield row
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def write_tournament(tournament_id, path, fmt="parquet"):
+    """Write one tournament's rows to *path* in *fmt*; return the row count."""
+    if fmt not in FORMATS:
+        raise ValueError("format '{}' is not available (choose from {})".format(
+            fmt, ", ".join(FORMATS)))
+    rows = iter_rows(tournament_id)
+    count = 0
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, [name for name, _ in COLUMNS])
+            writer.writeheader()
+            for batch in _batches(rows):
+                writer.writerows(batch)
+                count += len(batch)
+        return count
+
+    schema = _arrow_schema()
+    writer = pq.ParquetWriter(path, schema) if fmt == "parquet" else pa.ipc.new_file(path, schema)
+    with contextlib.closing(writer):
+        for batch in _batches(rows):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def partition_path(out_dir, tournament_id, fmt="parquet"):
+    """Where a tournament's file goes in a partitioned export."""
+    return os.path.join(out_dir, "tournament_id={}".format(tournament_id),
+                        "part-0" + FORMATS[fmt][0])
+
+
+def export(out_dir, tournament_ids=None, fmt="parquet"):
+    """Write a partitioned export of these tournaments (default: all); return {id: rows}.
+
+    Each file is written next to its final name and renamed into place, so
+    readers never see a partial one.
+    """
+    from db import list_tournaments
+
+    if tournament_ids is None:
+        tournament_ids = [t["tournament_id"] for t in list_tournaments()]
+    counts = {}
+    for tid in tournament_ids:
+        path = partition_path(out_dir, tid, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            counts[tid] = write_tournament(tid, tmp, fmt)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return counts
+
+
+def export_zip(zip_path, tournament_ids=None, fmt="parquet"):
+    """export() into a temporary directory, then zip the partitions into *zip_path*."""
+    with tempfile.TemporaryDirectory(prefix="t20-export-") as out_dir:
+        counts = export(out_dir, tournament_ids, fmt)
+        # Parquet is already compressed; store the files as they are
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zf:
+            for tid in counts:
+                path = partition_path(out_dir, tid, fmt)
+                zf.write(path, os.path.relpath(path, out_dir))
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export per-player per-match scoring rows.")
+    parser.add_argument("out_dir", help="Output directory (partitioned by tournament_id)")
+    parser.add_argument("-t", "--tournament", action="append",
+                        help="Tournament ID (repeatable; default: all)")
+    parser.add_argument("-f", "--format", default="parquet",
+                        choices=list(FORMATS))
+    args = parser.parse_args()
+    for tid, rows in export(args.out_dir, args.tournament, args.format).items():
+        print("{}: {} rows -> {}".format(tid, rows, partition_path(args.out_dir, tid, args.format)))
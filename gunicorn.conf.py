@@ -0,0 +1,46 @@
+"""Gunicorn settings for T20 Fantasy Hub (gunicorn -c gunicorn.conf.py main:app).
+
+With preload (GUNICORN_PRELOAD=1, the default) the app is imported once in
+the master and forked into workers; the master warms the shared response
+cache, then closes its datastore connections so no worker inherits them.
+Each worker reopens its own pool (see db.py / storage_mongo.py) and checks
+it before it accepts traffic.
+
+Env: PORT, WEB_CONCURRENCY (workers), GUNICORN_THREADS, GUNICORN_PRELOAD,
+GUNICORN_TIMEOUT, plus the MONGODB_* pool settings.
+"""
+
+import os
+
+bind = "0.0.0.0:{}".format(os.environ.get("PORT", "10000"))
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# Threaded workers keep long-lived SSE streams (/t/<slug>/fantasy/stream)
+# from pinning a whole worker each.
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+
+def when_ready(server):
+    """Master, after preloading: warm the shared cache once for all workers."""
+    if not preload_app:
+        return
+    import db
+    from main import warm_up
+    try:
+        warmed = warm_up()
+        server.log.info("Warm-up: published %d tournaments to the shared cache", warmed)
+    except Exception as e:
+        server.log.warning("Warm-up failed: %s", e)
+    finally:
+        db.close_storage()
+
+
+def post_worker_init(worker):
+    """Worker, before it accepts connections: open and check its own pool."""
+    from main import warm_up
+    try:
+        warm_up()
+    except Exception as e:
+        worker.log.warning("Worker warm-up failed: %s", e)
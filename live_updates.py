@@ -0,0 +1,202 @@
+"""Server-Sent Events stream of standings changes.
+
+Recalculation publishes a compact ``diff.json`` (changed leaderboard rows and
+team totals) next to the other pre-rendered bodies in the shared cache. Each
+worker runs a single watcher thread that polls the cache's CURRENT pointer —
+a read of a tmpfs file — for tournaments that have listeners, and wakes the
+streams waiting on it. An idle connection therefore costs one sleeping
+thread and no datastore reads, however many browsers are watching; since
+that thread comes out of the server's pool, a worker holds at most
+MAX_STREAMS streams open and turns further ones away with a 503.
+
+Event protocol (``id`` is always the data version the client is now at):
+
+    event: diff    data: {"from_version", "version", "players", "removed", "teams", "teams_removed"}
+    event: reset   data: {"version"}   client is too far behind; refetch the dashboard
+
+stream_async() is the same protocol for the ASGI server (asgi.py): one
+watcher task per event loop, and a waiting stream costs no thread at all.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import shared_cache
+
+POLL_SECONDS = float(os.environ.get("SSE_POLL_SECONDS", "1"))
+HEARTBEAT_SECONDS = 15
+# Streams end after this long; EventSource reconnects with Last-Event-ID,
+# which keeps long-lived connections spread across workers.
+MAX_STREAM_SECONDS = float(os.environ.get("SSE_MAX_STREAM_SECONDS", "300"))
+# Open streams per worker process. Under gunicorn gthread each one holds a
+# request thread, so keep this well below GUNICORN_THREADS; past it the
+# endpoint answers 503 with Retry-After. asgi.py streams are not capped.
+MAX_STREAMS = int(os.environ.get("SSE_MAX_STREAMS", "16"))
+RETRY_SECONDS = 5
+
+_cond = threading.Condition()
+_versions = {}   # tournament_id -> latest published version seen by the watcher
+_listeners = {}  # tournament_id -> number of open streams
+_watcher = None
+
+
+def _ensure_watcher():
+    """Start the watcher thread (again, in a forked worker) if it isn't running."""
+    global _watcher
+    with _cond:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = threading.Thread(target=_watch, name="sse-watcher", daemon=True)
+            _watcher.start()
+
+
+def _watch():
+    while True:
+        time.sleep(POLL_SECONDS)
+        with _cond:
+            watched = [tid for tid, n in _listeners.items() if n]
+        changed = {}
+        for tid in watched:
+            version = shared_cache.current_version(tid)
+            if version != _versions.get(tid):
+                changed[tid] = version
+        if changed:
+            with _cond:
+                _versions.update(changed)
+                _cond.notify_all()
+
+
+def streams_full():
+    """Whether this worker already has MAX_STREAMS streams open."""
+    with _cond:
+        return sum(_listeners.values()) >= MAX_STREAMS
+
+
+def _event(name, version, data):
+    return "event: {}\nid: {}\ndata: {}\n\n".format(
+        name, version, json.dumps(data, separators=(",", ":")))
+
+
+def _load_diff(tournament_id, version):
+    """Return the published diff leading to *version*, or None."""
+    hit = shared_cache.open_body(tournament_id, "diff.json")
+    if hit is None:
+        return None
+    f, published = hit
+    with f:
+        if published != version:
+            return None
+        return json.loads(f.read())
+
+
+def stream(tournament_id, last_version=None):
+    """Yield SSE frames for a tournament until the stream's time is up.
+
+    *last_version* is the data version the client already has (from the
+    X-Data-Version header or Last-Event-ID); None sends a reset first.
+    """
+    _ensure_watcher()
+    # Re-read rather than trust _versions: nobody polls a tournament without
+    # listeners, so what is there may be long out of date
+    current = shared_cache.current_version(tournament_id)
+    with _cond:
+        _listeners[tournament_id] = _listeners.get(tournament_id, 0) + 1
+        if _versions.get(tournament_id) != current:
+            _versions[tournament_id] = current
+            _cond.notify_all()
+    try:
+        yield "retry: {}\n\n".format(RETRY_SECONDS * 1000)
+        if current is not None and current != last_version:
+            yield _event("reset", current, {"version": current})
+        sent = current
+
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            with _cond:
+                _cond.wait_for(lambda: _versions.get(tournament_id) != sent,
+                               timeout=HEARTBEAT_SECONDS)
+                version = _versions.get(tournament_id)
+            if version == sent:
+                yield ": keep-alive\n\n"
+                continue
+            yield _frame(tournament_id, sent, version)
+            sent = version
+    finally:
+        with _cond:
+            _listeners[tournament_id] -= 1
+
+
+def _frame(tournament_id, sent, version):
+    """The event taking a client from data version *sent* to *version*."""
+    diff = _load_diff(tournament_id, version) if version is not None else None
+    if diff is not None and diff.get("from_version") == sent:
+        return _event("diff", version, diff)
+    return _event("reset", version, {"version": version})
+
+
+# ---------------------------------------------------------------------------
+# asyncio variant
+# ---------------------------------------------------------------------------
+
+_async_cond = None
+_async_versions = {}
+_async_listeners = {}
+_async_watcher = None
+
+
+def _ensure_async_watcher():
+    global _async_cond, _async_watcher
+    if _async_cond is None:
+        _async_cond = asyncio.Condition()
+    if _async_watcher is None or _async_watcher.done():
+        _async_watcher = asyncio.get_running_loop().create_task(_watch_async())
+
+
+async def _watch_async():
+    while True:
+        await asyncio.sleep(POLL_SECONDS)
+        changed = {}
+        for tid in [tid for tid, n in _async_listeners.items() if n]:
+            version = shared_cache.current_version(tid)
+            if version != _async_versions.get(tid):
+                changed[tid] = version
+        if changed:
+            async with _async_cond:
+                _async_versions.update(changed)
+                _async_cond.notify_all()
+
+
+async def stream_async(tournament_id, last_version=None):
+    """Async generator version of stream()."""
+    _ensure_async_watcher()
+    current = shared_cache.current_version(tournament_id)
+    _async_listeners[tournament_id] = _async_listeners.get(tournament_id, 0) + 1
+    try:
+        if _async_versions.get(tournament_id) != current:
+            async with _async_cond:
+                _async_versions[tournament_id] = current
+                _async_cond.notify_all()
+        yield "retry: {}\n\n".format(RETRY_SECONDS * 1000)
+        if current is not None and current != last_version:
+            yield _event("reset", current, {"version": current})
+        sent = current
+
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            async with _async_cond:
+                try:
+                    await asyncio.wait_for(
+                        _async_cond.wait_for(lambda: _async_versions.get(tournament_id) != sent),
+                        timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                version = _async_versions.get(tournament_id)
+            if version == sent:
+                yield ": keep-alive\n\n"
+                continue
+            yield _frame(tournament_id, sent, version)
+            sent = version
+    finally:
+        _async_listeners[tournament_id] -= 1
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""HTTP load-test harness for the Flask API.
+
+Boots main.app in-process on a threaded WSGI server against an in-memory
+datastore (mongomock, or --backend memory for SQLite), seeds it from
+match_results/ and PlayersWithTeam.csv, and drives a weighted mix of match-day traffic from concurrent clients:
+
+    leaderboard   GET  /t/<slug>/fantasy/leaderboard
+    dashboard     GET  /t/<slug>/fantasy/dashboard
+    teams         GET  /t/<slug>/fantasy/teams
+    player        GET  /t/<slug>/fantasy/player/<name>
+    matches       GET  /t/<slug>/fantasy/matches
+    ingest        GET  /t/<slug>/match/auto?scorecard_url=...   (scrape + save + recalc)
+    recalculate   POST /t/<slug>/fantasy/recalculate
+
+Ingests scrape synthetic scorecard pages from a local Cricinfo stand-in
+(cricinfo_fixture_server.py), so the real scraper, persistence and
+recalculation paths run without network.
+
+Reports throughput and p50/p95/p99 latency per route, and optionally
+writes them as JSON:
+
+    python loadtest.py --clients 16 --duration 30 --output loadtest_report.json
+    python loadtest.py --mix leaderboard=80,player=20      # read-only
+    python loadtest.py --server asgi --backend memory                  # asgi.py on uvicorn
+    python loadtest.py --url http://127.0.0.1:10000 --slug wt20_2026   # existing server
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+DEFAULT_MIX = {
+    "leaderboard": 35,
+    "dashboard": 20,
+    "teams": 15,
+    "player": 20,
+    "matches": 5,
+    "ingest": 3,
+    "recalculate": 2,
+}
+
+
+# ---------------------------------------------------------------------------
+# Local server
+# ---------------------------------------------------------------------------
+
+def _start_app(port=0, backend="mongomock", server="wsgi"):
+    """Seed the in-memory datastore and serve the app; returns (base URL, slug).
+
+    server — "wsgi": main.app on werkzeug's threaded server;
+             "asgi": asgi.app on uvicorn (see asgi.py)
+    """
+    from werkzeug.serving import make_server
+    from bench_pipeline import use_inmemory_datastore
+
+    use_inmemory_datastore(backend)
+    from migrate_to_mongo import migrate
+    from calculate_points import recalculate_all
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate("loadtest", "Load test")
+        recalculate_all("loadtest")
+
+    if server == "asgi":
+        import socket
+        import uvicorn
+        from asgi import app
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", port))
+        config = uvicorn.Config(app, log_level="warning")
+        uv = uvicorn.Server(config)
+        threading.Thread(target=uv.run, kwargs={"sockets": [sock]}, daemon=True).start()
+        while not uv.started:
+            time.sleep(0.05)
+        return "http://127.0.0.1:{}".format(sock.getsockname()[1]), "loadtest"
+
+    from main import app
+    httpd = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return "http://127.0.0.1:{}".format(httpd.server_port), "loadtest"
+
+
+# ---------------------------------------------------------------------------
+# Traffic
+# ---------------------------------------------------------------------------
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+class _Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, route, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+
+def run(base_url, slug, clients=8, duration=20.0, mix=None, seed=1, ingest_pool=200):
+    """Drive traffic for *duration* seconds and return the report dict."""
+    import requests
+    import cricinfo_fixture_server
+    from synthetic_tournament import generate
+
+    mix = mix or DEFAULT_MIX
+    routes, weights = zip(*[(r, w) for r, w in mix.items() if w > 0])
+
+    players = [p["player_name"] for p in requests.get(
+        "{}/t/{}/fantasy/leaderboard".format(base_url, slug), timeout=30).json()]
+    if not players:
+        sys.exit("Tournament '{}' has no leaderboard to drill into".format(slug))
+
+    fresh = generate(seed=seed, matches=ingest_pool)["matches"] if "ingest" in routes else []
+    pages = cricinfo_fixture_server.start(pages=cricinfo_fixture_server.synthetic_pages(fresh)) \
+        if fresh else None
+    next_ingest = iter(fresh)
+    ingest_lock = threading.Lock()
+
+    def _request(session, route, rng):
+        t = "{}/t/{}".format(base_url, slug)
+        if route == "leaderboard":
+            return session.get(t + "/fantasy/leaderboard")
+        if route == "dashboard":
+            return session.get(t + "/fantasy/dashboard")
+        if route == "teams":
+            return session.get(t + "/fantasy/teams")
+        if route == "player":
+            return session.get(t + "/fantasy/player/" + quote(rng.choice(players), safe=""))
+        if route == "matches":
+            return session.get(t + "/fantasy/matches")
+        if route == "recalculate":
+            return session.post(t + "/fantasy/recalculate")
+        if route == "ingest":
+            with ingest_lock:
+                match = next(next_ingest, None)
+            if match is None:  # pool exhausted: fall back to re-reading a stored match
+                return session.get(t + "/fantasy/matches")
+            url = pages.base_url + cricinfo_fixture_server.scorecard_path(match)
+            return session.get(t + "/match/auto", params={"scorecard_url": url})
+        raise ValueError(route)
+
+    recorder = _Recorder()
+    deadline = time.monotonic() + duration
+
+    def _client(n):
+        rng = random.Random(seed * 1000 + n)
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            route = rng.choices(routes, weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = _request(session, route, rng).status_code < 500
+            except requests.RequestException:
+                ok = False
+            recorder.record(route, time.perf_counter() - start, ok)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=_client, args=(n,), daemon=True) for n in range(clients)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.monotonic() - started
+
+    results = {}
+    for route in routes:
+        lat = sorted(recorder.latencies.get(route, []))
+        results[route] = _route_summary(lat, recorder.errors.get(route, 0), elapsed)
+    everything = sorted(x for lat in recorder.latencies.values() for x in lat)
+    results["ALL"] = _route_summary(everything, sum(recorder.errors.values()), elapsed)
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "base_url": base_url,
+        "params": {"clients": clients, "duration_s": duration, "mix": dict(mix), "seed": seed},
+        "elapsed_s": round(elapsed, 3),
+        "results": results,
+    }
+
+
+def _route_summary(latencies, errors, elapsed):
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(_percentile(latencies, 50)),
+        "p95_ms": ms(_percentile(latencies, 95)),
+        "p99_ms": ms(_percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def _print_report(report):
+    print(f"\n{'route':<12} {'reqs':>7} {'errs':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in report["results"].items():
+        print(f"{route:<12} {r['requests']:>7} {r['errors']:>5} {r['rps'] or 0:>8.1f} "
+              f"{r['p50_ms'] or 0:>9.2f} {r['p95_ms'] or 0:>9.2f} {r['p99_ms'] or 0:>9.2f}")
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        route, _, weight = part.partition("=")
+        route = route.strip()
+        if route not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError("unknown route '{}' (choose from {})".format(
+                route, ", ".join(DEFAULT_MIX)))
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the T20 Fantasy Hub API.")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of traffic")
+    parser.add_argument("--mix", type=_parse_mix, default=None,
+                        help="Route weights, e.g. leaderboard=50,player=30,ingest=5")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", default="",
+                        help="Target an already-running server instead of booting one")
+    parser.add_argument("--slug", default="",
+                        help="Tournament to hit (required with --url)")
+    parser.add_argument("--backend", choices=("mongomock", "memory"), default="mongomock",
+                        help="Datastore for the in-process server")
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi",
+                        help="In-process server: threaded Flask, or the asyncio app (asgi.py)")
+    parser.add_argument("--output", default="", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.slug:
+            parser.error("--slug is required with --url")
+        base_url, slug = args.url.rstrip("/"), args.slug
+    else:
+        base_url, slug = _start_app(backend=args.backend, server=args.server)
+        print(f"Serving {args.server} app at {base_url} ({args.backend} datastore, tournament '{slug}')")
+
+    print(f"Driving {args.clients} clients for {args.duration:.0f}s...")
+    # The in-process app logs every request and scrape; keep the report readable
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = run(base_url, slug, clients=args.clients, duration=args.duration,
+                     mix=args.mix, seed=args.seed)
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
 import csv
+import functools
 import io
+import os
 import threading
 from datetime import datetime
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, jsonify, render_template, request, url_for
+from werkzeug.wsgi import wrap_file
 
-from calculate_points import recalculate_all
+import prerender
+import resilience
+import shared_cache
+import static_publish
+from calculate_points import evict_stale_scores, recalculate_all
+from storage import HISTORY_KINDS
 
 app = Flask(__name__)
 
@@ -13,11 +21,148 @@ app = Flask(__name__)
 _last_auto_scrape = {"results": [], "timestamp": None}
 
 
+def _cached_response(slug, name):
+    """Response for a body in the cross-worker shared cache, or None on a miss.
+
+    Never touches the datastore, so it can answer while the datastore is down.
+    """
+    encoding = prerender.pick_encoding(request.accept_encodings)
+    variant = prerender.variant_name(name, encoding)
+    hit = shared_cache.open_body(slug, variant)
+    if hit is None:
+        return None
+    f, version = hit
+    resp = _body_response(wrap_file(request.environ, f), encoding, direct_passthrough=True)
+    resp.content_length = os.fstat(f.fileno()).st_size
+    resp.headers["X-Data-Version"] = str(version)
+    # Let clients revalidate cheaply (the ETag is a hash of the body)
+    etag = shared_cache.body_etag(slug, version, variant)
+    if etag is not None:
+        resp.set_etag(etag)
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
+
+
+def _serve_cached(slug, name, loader):
+    """Serve a pre-rendered body, compressed to match Accept-Encoding.
+
+    Lookup order: the cross-worker shared cache, then the bodies persisted
+    at recalculation time (which are published to the shared cache for the
+    other workers), then *loader* for tournaments never rendered yet.
+    """
+    resp = _cached_response(slug, name)
+    if resp is not None:
+        return resp
+
+    from db import get_data_version, get_response_bodies
+    encoding = prerender.pick_encoding(request.accept_encodings)
+    variant = prerender.variant_name(name, encoding)
+    version, bodies = get_response_bodies(slug)
+    if variant not in bodies:
+        version = get_data_version(slug)  # read before the data, never newer than it
+        if version is None:
+            return _body_response(prerender.render({name: loader(slug)})[variant], encoding)
+        bodies = prerender.render({name: loader(slug)})
+    try:
+        shared_cache.publish(slug, version, bodies)
+    except OSError as e:
+        print("Warning: warming shared cache failed: {}".format(e))
+    resp = _body_response(bodies[variant], encoding)
+    resp.headers["X-Data-Version"] = str(version)
+    return resp
+
+
+def _read_query(args, params):
+    """The *params* set in query *args*, as a hashable ((name, (values...)), ...).
+
+    Stale copies are keyed on these rather than the raw query string, so
+    params an endpoint ignores can't push real entries out of the cache.
+    """
+    return tuple((p, tuple(args.getlist(p))) for p in params if p in args)
+
+
+def _resilient_read(view=None, cached=None, params=()):
+    """Run a read endpoint under resilience.py's deadline, stale fallback and circuit breaker.
+
+    *params* are the query params the view reads. *cached* names the body a
+    view serves through _serve_cached when none of them are set: while the
+    datastore is failing (or the breaker is open) that body is still served
+    from the shared cache before falling back to a stale copy.
+    """
+    if view is None:
+        return functools.partial(_resilient_read, cached=cached, params=params)
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        query = _read_query(request.args, params)
+        key = (request.path, query, prerender.pick_encoding(request.accept_encodings))
+        if resilience.breaker.allow():
+            try:
+                with resilience.deadline():
+                    resp = app.make_response(view(*args, **kwargs))
+            except resilience.DATASTORE_ERRORS as e:
+                resilience.breaker.record_failure()
+                print("Warning: datastore read failed for {}: {}".format(request.path, e))
+            else:
+                resilience.breaker.record_success()
+                if resp.status_code == 200 and not resp.direct_passthrough:
+                    resilience.keep(key, resp.get_data(), {
+                        h: resp.headers[h] for h in resilience.KEPT_HEADERS if h in resp.headers})
+                return resp
+
+        if cached and not query:
+            resp = _cached_response(kwargs["slug"], cached)
+            if resp is not None:
+                return resp
+        stale = resilience.last_known_good(key)
+        if stale is None:
+            return jsonify({"error": "Datastore unavailable, try again shortly"}), 503, \
+                resilience.unavailable_headers()
+        body, headers = stale
+        return app.response_class(body, headers=headers)
+    return wrapper
+
+
+def warm_up():
+    """Prime this process before it takes traffic.
+
+    Opens the datastore connections and loads every tournament's persisted
+    pre-rendered bodies into the shared cache, so the first requests after
+    a deploy or restart are cache hits. Safe to call from every worker.
+    """
+    from db import get_response_bodies, list_tournaments, warm_up as warm_up_storage
+    warm_up_storage()
+    warmed = 0
+    for t in list_tournaments():
+        tid = t["tournament_id"]
+        if shared_cache.current_version(tid) is not None:
+            continue
+        version, bodies = get_response_bodies(tid)
+        if version is None:
+            continue
+        try:
+            shared_cache.publish(tid, version, bodies)
+            warmed += 1
+        except OSError as e:
+            print("Warning: warming shared cache for {} failed: {}".format(tid, e))
+    return warmed
+
+
+def _body_response(body, encoding, **kwargs):
+    """JSON response for an already-encoded body."""
+    resp = app.response_class(body, mimetype="application/json", **kwargs)
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
 # ---------------------------------------------------------------------------
 # Tournament endpoints
 # ---------------------------------------------------------------------------
 
 @app.route('/tournaments', methods=['GET'])
+@_resilient_read
 def list_tournaments_endpoint():
     """List all tournaments."""
     from db import list_tournaments
@@ -58,17 +203,89 @@ def update_tournament_endpoint(slug):
 @app.route('/tournaments/<slug>', methods=['DELETE'])
 def delete_tournament_endpoint(slug):
     """Delete a tournament and all its data."""
+    import careers
     from db import delete_tournament
+    careers.drop_tournament(slug)  # a no-op for unknown tournaments
     if delete_tournament(slug):
+        shared_cache.invalidate(slug)
+        if static_publish.PUBLISH_DIR:
+            static_publish.drop_tournament(slug)
         return jsonify({"status": "ok", "tournament_id": slug})
     return jsonify({"error": "Tournament not found"}), 404
 
 
+@app.route('/t/<slug>/scoring-rules', methods=['GET'])
+@_resilient_read
+def get_scoring_rules_endpoint(slug):
+    """Return the tournament's scoring rule set (the defaults unless it has its own)."""
+    from db import get_tournament
+    from scoring import get_rule_set
+    t = get_tournament(slug)
+    if not t:
+        return jsonify({"error": "Tournament not found"}), 404
+    rule_set = get_rule_set(t.get("scoring_rules"))
+    return jsonify({"rules": rule_set["rules"], "version": rule_set["version"],
+                    "custom": "scoring_rules" in t})
+
+
+@app.route('/t/<slug>/scoring-rules', methods=['PUT', 'DELETE'])
+def set_scoring_rules_endpoint(slug):
+    """Set the scoring rule set (PUT: overrides of scoring.DEFAULT_RULES) or reset it (DELETE)."""
+    from db import get_tournament, set_scoring_rules
+    from scoring import get_rule_set
+    if not get_tournament(slug):
+        return jsonify({"error": "Tournament not found"}), 404
+    try:
+        rule_set = get_rule_set(request.get_json(force=True) if request.method == 'PUT' else None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    set_scoring_rules(slug, rule_set["rules"] if request.method == 'PUT' else None)
+    try:
+        evict_stale_scores()
+        recalculate_all(slug)
+    except Exception as e:
+        print("Warning: Fantasy recalculation failed: {}".format(e))
+    return jsonify({"status": "ok", "rules": rule_set["rules"], "version": rule_set["version"]})
+
+
+# ---------------------------------------------------------------------------
+# Player careers (across tournaments)
+# ---------------------------------------------------------------------------
+
+@app.route('/careers')
+@_resilient_read(params=("limit", "offset"))
+def careers_endpoint():
+    """Player careers by total points across all tournaments. ?limit= (default 50), ?offset="""
+    from db import get_player_careers
+    try:
+        limit = int(request.args.get("limit", 50))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({"error": "limit must be positive, offset non-negative"}), 400
+    return jsonify(get_player_careers(min(limit, LEADERBOARD_MAX_PAGE), offset))
+
+
+@app.route('/careers/<player>')
+@_resilient_read
+def career_endpoint(player):
+    """One player's career, by Cricinfo player id (or name, for players without one)."""
+    from careers import career_key
+    from db import get_player_career
+    career = get_player_career(career_key({"player_name": player, "player_id": None})
+                               if not player.isdigit() else player)
+    if career is None:
+        return jsonify({"error": "Player not found"}), 404
+    return jsonify(career)
+
+
 # ---------------------------------------------------------------------------
 # Player roster endpoints
 # ---------------------------------------------------------------------------
 
 @app.route('/t/<slug>/players', methods=['GET'])
+@_resilient_read
 def get_players_endpoint(slug):
     """Return the player roster for a tournament."""
     from db import get_players
@@ -91,8 +308,12 @@ def set_players_endpoint(slug):
         for row in reader:
             name = (row.get("Player Name") or row.get("player_name") or "").strip()
             team = (row.get("Team") or row.get("team") or "").strip()
+            player_id = (row.get("Player ID") or row.get("player_id") or "").strip()
             if name and team:
-                players.append({"player_name": name, "team": team})
+                player = {"player_name": name, "team": team}
+                if player_id:
+                    player["player_id"] = player_id
+                players.append(player)
         set_players(slug, players)
         return jsonify({"status": "ok", "players_count": len(players)})
 
@@ -106,8 +327,9 @@ def set_players_endpoint(slug):
 
 @app.route('/t/<slug>/players', methods=['PUT'])
 def add_player_endpoint(slug):
-    """Add or update a single player. Body: {player_name, team}."""
+    """Add or update a single player. Body: {player_name, team, player_id?}."""
     from db import add_player, get_tournament
+    from storage import parse_player_id
     if not get_tournament(slug):
         return jsonify({"error": "Tournament not found"}), 404
     data = request.get_json(force=True)
@@ -115,7 +337,10 @@ def add_player_endpoint(slug):
     team = (data.get("team") or "").strip()
     if not name or not team:
         return jsonify({"error": "player_name and team are required"}), 400
-    add_player(slug, name, team)
+    player_id = parse_player_id(data.get("player_id"))
+    if data.get("player_id") not in (None, "") and player_id is None:
+        return jsonify({"error": "player_id must be a Cricinfo player id (integer)"}), 400
+    add_player(slug, name, team, player_id)
     return jsonify({"status": "ok", "player_name": name, "team": team})
 
 
@@ -134,11 +359,15 @@ def remove_player_endpoint(slug, player_name):
 
 @app.route('/t/<slug>/match/<match_id>', methods=['GET'])
 def get_match_endpoint(slug, match_id):
-    """Return match data. If not found, scrape from Cricinfo scorecard URL."""
+    """Return match data. If not found (or ?refresh=1), scrape from Cricinfo scorecard URL.
+
+    A re-scrape that finds the scorecard unchanged writes nothing and skips
+    the recalculation.
+    """
     from db import get_match, save_match
 
     doc = get_match(slug, match_id)
-    if doc:
+    if doc and request.args.get("refresh") != "1":
         return jsonify(doc)
 
     # Need a scorecard URL to scrape
@@ -153,12 +382,12 @@ def get_match_endpoint(slug, match_id):
         # Override match_id if user provided one in the URL path
         if match_id:
             match_data["match_id"] = str(match_id)
-        save_match(slug, match_data)
-        # Auto-recalculate
-        try:
-            recalculate_all(slug)
-        except Exception as e:
-            print("Warning: recalculate failed: {}".format(e))
+        if save_match(slug, match_data):
+            # Auto-recalculate
+            try:
+                recalculate_all(slug)
+            except Exception as e:
+                print("Warning: recalculate failed: {}".format(e))
         return jsonify(match_data)
     except Exception as e:
         return jsonify({"error": "Scrape failed: {}".format(str(e))}), 500
@@ -202,21 +431,162 @@ def auto_scrape_match(slug):
 # Fantasy Scoring Endpoints (tournament-scoped)
 # ---------------------------------------------------------------------------
 
+LEADERBOARD_FIELDS = ("rank", "player_name", "team", "matches_played", "total_points")
+LEADERBOARD_MAX_PAGE = 500
+LEADERBOARD_PARAMS = ("limit", "cursor", "top", "team", "fields")
+
+
+def _parse_leaderboard_args(args):
+    """Validate leaderboard query params.
+
+    Returns (query, None) — query holding the get_leaderboard_page arguments
+    plus the "fields" the client asked for — or (None, (error body, status)).
+    """
+    try:
+        limit = int(args.get("limit", 50))
+        after_rank = int(args.get("cursor", 0))
+        top = args.get("top")
+        top = int(top) if top is not None else None
+    except ValueError:
+        return None, ({"error": "limit, cursor and top must be integers"}, 400)
+    if limit < 1 or after_rank < 0 or (top is not None and top < 1):
+        return None, ({"error": "limit and top must be positive, cursor non-negative"}, 400)
+    limit = min(limit, LEADERBOARD_MAX_PAGE)
+
+    fields = None
+    if args.get("fields"):
+        fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+        unknown = [f for f in fields if f not in LEADERBOARD_FIELDS]
+        if unknown:
+            return None, ({"error": "Unknown fields: {}".format(", ".join(unknown)),
+                           "allowed": list(LEADERBOARD_FIELDS)}, 400)
+
+    from calculate_points import _normalise_team
+    team = args.get("team", "").strip()
+    team = _normalise_team(team) if team else None
+
+    # Always fetch rank so the cursor can be built, even if not requested
+    query_fields = fields if not fields or "rank" in fields else fields + ["rank"]
+    return {"after_rank": after_rank, "limit": limit, "max_rank": top, "team": team,
+            "query_fields": query_fields, "fields": fields}, None
+
+
+def _finish_leaderboard_page(rows, query):
+    """Return the next cursor (or None), dropping rank if it wasn't asked for."""
+    next_cursor = None
+    top = query["max_rank"]
+    if len(rows) == query["limit"] and (top is None or rows[-1]["rank"] < top):
+        next_cursor = rows[-1]["rank"]
+    if query["fields"] and "rank" not in query["fields"]:
+        for row in rows:
+            row.pop("rank", None)
+    return next_cursor
+
+
 @app.route('/t/<slug>/fantasy/leaderboard')
+@_resilient_read(cached="leaderboard.json", params=LEADERBOARD_PARAMS)
 def fantasy_leaderboard(slug):
-    """Player leaderboard for a tournament."""
-    from db import get_leaderboard
-    return jsonify(get_leaderboard(slug))
+    """Player leaderboard for a tournament.
+
+    Without these query params the full pre-rendered list is returned:
+        limit=N      page size (default 50, max 500)
+        cursor=C     continue after a previous page (see X-Next-Cursor)
+        top=N        only the top N ranks
+        team=T       only players in team T
+        fields=a,b   only these row fields
+    """
+    from db import get_leaderboard, get_leaderboard_page
+    if not _read_query(request.args, LEADERBOARD_PARAMS):
+        return _serve_cached(slug, "leaderboard.json", get_leaderboard)
+
+    query, error = _parse_leaderboard_args(request.args)
+    if error:
+        return jsonify(error[0]), error[1]
+    rows = get_leaderboard_page(slug, after_rank=query["after_rank"], limit=query["limit"],
+                                max_rank=query["max_rank"], team=query["team"],
+                                fields=query["query_fields"])
+    next_cursor = _finish_leaderboard_page(rows, query)
+
+    resp = jsonify(rows)
+    if next_cursor is not None:
+        args = {p: request.args[p] for p in LEADERBOARD_PARAMS if p in request.args}
+        args["cursor"] = str(next_cursor)
+        resp.headers["X-Next-Cursor"] = str(next_cursor)
+        resp.headers["Link"] = '<{}>; rel="next"'.format(url_for(
+            "fantasy_leaderboard", slug=slug, **args))
+    return resp
 
 
 @app.route('/t/<slug>/fantasy/teams')
+@_resilient_read(cached="teams.json")
 def fantasy_teams(slug):
     """Team leaderboard for a tournament."""
     from db import get_team_leaderboard
-    return jsonify(get_team_leaderboard(slug))
+    return _serve_cached(slug, "teams.json", get_team_leaderboard)
+
+
+@app.route('/t/<slug>/fantasy/dashboard')
+@_resilient_read(cached="dashboard.json")
+def fantasy_dashboard(slug):
+    """Standings view in one payload: teams, top-N leaderboard, per-player breakdowns."""
+    def _load(tid):
+        from calculate_points import build_dashboard
+        from db import get_all_player_points, get_leaderboard, get_team_leaderboard
+        return build_dashboard(get_leaderboard(tid), get_team_leaderboard(tid),
+                               get_all_player_points(tid))
+    return _serve_cached(slug, "dashboard.json", _load)
+
+
+@app.route('/t/<slug>/fantasy/stream')
+def fantasy_stream(slug):
+    """Server-Sent Events: standings diffs each time the tournament is recalculated.
+
+    Pass the X-Data-Version of the data already loaded as ?version= (EventSource
+    reconnects send it back as Last-Event-ID).
+    """
+    import live_updates
+    if live_updates.streams_full():
+        return jsonify({"error": "Too many live streams, try again shortly"}), 503, \
+            {"Retry-After": str(live_updates.RETRY_SECONDS)}
+    last = request.headers.get("Last-Event-ID") or request.args.get("version")
+    try:
+        last = int(last) if last else None
+    except ValueError:
+        last = None
+    return app.response_class(
+        live_updates.stream(slug, last),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+HISTORY_PARAMS = ("kind", "key")
+
+
+def _parse_history_args(args):
+    """(kind, keys) from the history query string, or (None, (body, status)) if invalid."""
+    kind = args.get("kind", "teams")
+    if kind not in HISTORY_KINDS:
+        return None, ({"error": "kind must be one of: {}".format(", ".join(HISTORY_KINDS))}, 400)
+    return (kind, args.getlist("key") or None), None
+
+
+@app.route('/t/<slug>/fantasy/history')
+@_resilient_read(params=HISTORY_PARAMS)
+def fantasy_history(slug):
+    """Cumulative totals and ranks after each match, per team (or ?kind=players).
+
+    ?key=<team name / player id or name> (repeatable) limits it to those.
+    """
+    from db import get_standings_history
+    query, error = _parse_history_args(request.args)
+    if error:
+        return jsonify(error[0]), error[1]
+    return jsonify(get_standings_history(slug, *query))
 
 
 @app.route('/t/<slug>/fantasy/player/<player_name>')
+@_resilient_read
 def fantasy_player(slug, player_name):
     """Per-match point breakdown for a player in a tournament."""
     from db import get_all_player_points
@@ -242,7 +612,144 @@ def fantasy_recalculate(slug):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/t/<slug>/fantasy/what-if', methods=['POST'])
+def fantasy_what_if(slug):
+    """Standings under candidate scoring rule sets, next to the current ones. Saves nothing.
+
+    Body: {"rule_sets": {name: rules} or [rules, ...], "limit": 50}; each
+    rules object is as for PUT /t/<slug>/scoring-rules.
+    """
+    from calculate_points import WHAT_IF_MAX_RULE_SETS, what_if
+    from db import get_tournament
+    if not get_tournament(slug):
+        return jsonify({"error": "Tournament not found"}), 404
+
+    body = request.get_json(force=True, silent=True) or {}
+    rule_sets = body.get("rule_sets") if isinstance(body, dict) else None
+    if isinstance(rule_sets, list):
+        rule_sets = {str(i): rules for i, rules in enumerate(rule_sets, 1)}
+    if not isinstance(rule_sets, dict) or not rule_sets:
+        return jsonify({"error": "rule_sets must be a non-empty object or array"}), 400
+    if len(rule_sets) > WHAT_IF_MAX_RULE_SETS:
+        return jsonify({"error": "at most {} rule sets".format(WHAT_IF_MAX_RULE_SETS)}), 400
+    limit = body.get("limit", 50)
+    if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+
+    try:
+        return jsonify(what_if(slug, rule_sets, min(limit, LEADERBOARD_MAX_PAGE)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route('/t/<slug>/fantasy/projection')
+def fantasy_projection(slug):
+    """Each team's chance of finishing in each position (Monte Carlo, see projection.py).
+
+    ?remaining=<matches left> (required), ?simulations=, ?budget=<seconds>, ?seed=
+    """
+    import projection
+    from db import get_tournament
+    if not get_tournament(slug):
+        return jsonify({"error": "Tournament not found"}), 404
+    try:
+        remaining = int(request.args["remaining"])
+        simulations = int(request.args.get("simulations", projection.DEFAULT_SIMULATIONS))
+        budget = float(request.args.get("budget", projection.MAX_BUDGET_SECONDS))
+        seed = int(request.args["seed"]) if "seed" in request.args else None
+    except (KeyError, ValueError):
+        return jsonify({"error": "remaining (integer) is required; simulations, budget and seed "
+                                 "must be numbers"}), 400
+    if not 0 <= remaining <= projection.MAX_REMAINING or simulations < 1 or not budget > 0:
+        return jsonify({"error": "remaining must be 0 to {}, simulations and budget positive".format(
+            projection.MAX_REMAINING)}), 400
+    return jsonify(projection.project(
+        slug, remaining, min(simulations, projection.MAX_SIMULATIONS),
+        min(budget, projection.MAX_BUDGET_SECONDS), seed))
+
+
+def _send_export(write, filename, mimetype):
+    """Run write(path) into a temporary file and send it as an attachment."""
+    import tempfile
+    from flask import send_file
+    fd, path = tempfile.mkstemp(prefix="t20-export-")
+    os.close(fd)
+    try:
+        write(path)
+        f = open(path, "rb")
+    finally:
+        # The open file stays readable until the response has been sent
+        os.unlink(path)
+    return send_file(f, mimetype=mimetype, as_attachment=True, download_name=filename)
+
+
+def _export_format():
+    import export
+    fmt = request.args.get("format") or "parquet"
+    if fmt not in export.FORMATS:
+        return None
+    return fmt
+
+
+@app.route('/t/<slug>/export')
+def export_tournament(slug):
+    """Per-player per-match scoring rows of one tournament (see export.py). ?format=parquet|arrow|csv"""
+    import export
+    from db import get_tournament
+    if not get_tournament(slug):
+        return jsonify({"error": "Tournament not found"}), 404
+    fmt = _export_format()
+    if fmt is None:
+        return jsonify({"error": "format must be one of: " + ", ".join(export.FORMATS)}), 400
+    suffix, mimetype = export.FORMATS[fmt]
+    return _send_export(lambda path: export.write_tournament(slug, path, fmt), slug + suffix, mimetype)
+
+
+@app.route('/export')
+def export_all():
+    """Every tournament's rows: a zip of tournament_id=<id>/ partitions. ?format=parquet|arrow|csv"""
+    import export
+    fmt = _export_format()
+    if fmt is None:
+        return jsonify({"error": "format must be one of: " + ", ".join(export.FORMATS)}), 400
+    return _send_export(lambda path: export.export_zip(path, fmt=fmt), "t20-fantasy-export.zip",
+                        "application/zip")
+
+
+@app.route('/t/<slug>/snapshot')
+def snapshot_tournament(slug):
+    """The whole tournament as one snapshot file (see snapshot.py)."""
+    import snapshot
+    from db import get_tournament
+    if not get_tournament(slug):
+        return jsonify({"error": "Tournament not found"}), 404
+    return _send_export(lambda path: snapshot.write_snapshot(slug, path), slug + ".t20snap",
+                        "application/octet-stream")
+
+
+@app.route('/tournaments/import', methods=['POST'])
+def import_snapshot_endpoint():
+    """Load an uploaded snapshot (multipart "file"). ?as=<tournament id>, ?replace=1"""
+    import tempfile
+    import snapshot
+    if 'file' not in request.files:
+        return jsonify({"error": "upload the snapshot as multipart field 'file'"}), 400
+    fd, path = tempfile.mkstemp(prefix="t20-snapshot-")
+    os.close(fd)
+    try:
+        request.files['file'].save(path)
+        result = snapshot.import_snapshot(path, request.args.get("as") or None,
+                                          replace=request.args.get("replace") == "1")
+    except ValueError as e:
+        status = 409 if "already exists" in str(e) else 400
+        return jsonify({"error": str(e)}), status
+    finally:
+        os.unlink(path)
+    return jsonify(dict(result, status="ok"))
+
+
 @app.route('/t/<slug>/fantasy/team/<team_name>')
+@_resilient_read
 def fantasy_team_players(slug, team_name):
     """All players for a team in a tournament."""
     from db import get_all_player_points
@@ -254,6 +761,7 @@ def fantasy_team_players(slug, team_name):
 
 
 @app.route('/t/<slug>/fantasy/matches')
+@_resilient_read
 def fantasy_matches(slug):
     """List scraped matches for a tournament."""
     from db import get_match_summaries
@@ -6,6 +6,8 @@ Usage:
 
 Creates the tournament (if needed), uploads the player roster from
 PlayersWithTeam.csv, and upserts all match JSON files into MongoDB.
+Re-running it is cheap: files whose content hash matches the stored match
+aren't rewritten, and --recalculate is skipped when nothing changed.
 """
 
 import csv
@@ -38,32 +40,46 @@ def load_players_from_csv():
 
 
 def migrate(tournament_id, tournament_name):
-    from db import create_tournament, get_tournament, set_players, save_match, get_db
+    """Upload the roster and match files.
 
+    Returns how many changes were made: new or changed matches, plus one if
+    the roster was created or changed. 0 means a recalculation can be skipped.
+    """
+    from db import (count_matches, create_tournament, get_players, get_tournament,
+                    set_players, save_match)
+
+    changed = 0
     # Create tournament if needed
     if not get_tournament(tournament_id):
         players = load_players_from_csv()
         create_tournament(tournament_id, tournament_name, players)
+        changed += 1
         print(f"Created tournament '{tournament_id}' with {len(players)} players.")
     else:
         # Update roster from CSV
         players = load_players_from_csv()
-        if players:
+        stored = [{"player_name": p["player_name"], "team": p["team"]}
+                  for p in get_players(tournament_id)]
+        if players and players != stored:
             set_players(tournament_id, players)
+            changed += 1
             print(f"Updated roster for '{tournament_id}' with {len(players)} players.")
+        elif players:
+            print(f"Roster for '{tournament_id}' unchanged ({len(players)} players).")
 
     # Migrate match files
     if not os.path.isdir(MATCH_RESULTS_DIR):
         print(f"No match_results/ directory found at {MATCH_RESULTS_DIR}")
-        return 0
+        return changed
 
     files = sorted(f for f in os.listdir(MATCH_RESULTS_DIR) if f.endswith(".json"))
     if not files:
         print("No JSON files found in match_results/")
-        return 0
+        return changed
 
     print(f"\nMigrating {len(files)} match files...\n")
 
+    matches_changed = 0
     for fname in files:
         fpath = os.path.join(MATCH_RESULTS_DIR, fname)
         with open(fpath, encoding="utf-8") as f:
@@ -73,14 +89,17 @@ def migrate(tournament_id, tournament_name):
             match_name = fname.replace(".json", "").rsplit("_", 1)[0] if "_" in fname else fname.replace(".json", "")
             data["match_name"] = match_name
 
-        save_match(tournament_id, data)
-        print(f"  ✅  {fname} → match_id={data.get('match_id', '')}")
+        if save_match(tournament_id, data):
+            matches_changed += 1
+            print(f"  ✅  {fname} → match_id={data.get('match_id', '')}")
+        else:
+            print(f"  =   {fname} → match_id={data.get('match_id', '')} (unchanged)")
 
     # Verify
-    db = get_db()
-    count = db.matches.count_documents({"tournament_id": tournament_id})
-    print(f"\nMigrated {len(files)} matches. {count} docs in collection for '{tournament_id}'.")
-    return len(files)
+    count = count_matches(tournament_id)
+    print(f"\nMigrated {len(files)} matches ({matches_changed} new or changed). "
+          f"{count} stored for '{tournament_id}'.")
+    return changed + matches_changed
 
 
 def main():
@@ -94,14 +113,16 @@ def main():
                         help="Recalculate fantasy points after migration")
     args = parser.parse_args()
 
-    if not os.environ.get("MONGODB_URI"):
+    if os.environ.get("STORAGE_BACKEND", "mongo") == "mongo" and not os.environ.get("MONGODB_URI"):
         print("Error: MONGODB_URI not set. Add it to .env or export it.", file=sys.stderr)
         sys.exit(1)
 
     tournament_name = args.name or args.tournament
-    migrate(args.tournament, tournament_name)
+    changed = migrate(args.tournament, tournament_name)
 
-    if args.recalculate:
+    if args.recalculate and not changed:
+        print("\nNothing changed, skipping recalculation.")
+    elif args.recalculate:
         print("\nRecalculating fantasy points...")
         from calculate_points import recalculate_all
         recalculate_all(args.tournament)
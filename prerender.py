@@ -0,0 +1,53 @@
+"""Final response bodies for the hot read endpoints.
+
+Leaderboard and team standings only change when a tournament is
+recalculated, so they are serialized and compressed once at that point
+instead of on every request. Each payload is rendered in three variants:
+
+    leaderboard.json        identity
+    leaderboard.json.gz     Content-Encoding: gzip
+    leaderboard.json.br     Content-Encoding: br   (needs the brotli package)
+"""
+
+import gzip
+
+from shared_cache import dumps
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content-Encoding → file suffix, in server preference order
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+if brotli is None:
+    del ENCODINGS["br"]
+
+
+def render(payloads):
+    """Serialize and compress every payload.
+
+    *payloads* maps body name → JSON-serializable object. Returns a dict of
+    body name (with encoding suffix for compressed variants) → bytes.
+    """
+    bodies = {}
+    for name, obj in payloads.items():
+        raw = dumps(obj)
+        bodies[name] = raw
+        bodies[name + ".gz"] = gzip.compress(raw, compresslevel=9, mtime=0)
+        if brotli is not None:
+            bodies[name + ".br"] = brotli.compress(raw, quality=11)
+    return bodies
+
+
+def pick_encoding(accept_encodings):
+    """Return the best Content-Encoding we have for a werkzeug Accept header, or None."""
+    for encoding in ENCODINGS:
+        if accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def variant_name(name, encoding):
+    """Body name for *name* under *encoding* (None → identity)."""
+    return name + ENCODINGS[encoding] if encoding else name
@@ -0,0 +1,213 @@
+"""Monte Carlo projection of final fantasy-team standings.
+
+Each player's remaining points are drawn from their own season so far: per
+remaining match, one of the tournament's matches at random, scoring what
+the player scored in it (0 if they didn't play). A fantasy team finishes on
+its current total plus its players' draws. Repeating that many times gives
+each team's chance of finishing in each position.
+
+Simulations run in chunks on a process pool (PROJECTION_WORKERS processes;
+1 runs them in-process) until the requested number is done or the time
+budget is spent, whichever comes first, so a request always answers in
+about the budget. Each chunk is sampled as NumPy arrays.
+
+    python projection.py wt20_2026 --remaining 10
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+DEFAULT_SIMULATIONS = int(os.environ.get("PROJECTION_SIMULATIONS", "10000"))
+MAX_SIMULATIONS = 200000
+# Longest tournament we project (an IPL season is 74 matches); the endpoint
+# rejects ?remaining above it
+MAX_REMAINING = int(os.environ.get("PROJECTION_MAX_REMAINING", "100"))
+# Seconds a projection may take (the endpoint caps ?budget at this)
+MAX_BUDGET_SECONDS = float(os.environ.get("PROJECTION_BUDGET_SECONDS", "2"))
+WORKERS = int(os.environ.get("PROJECTION_WORKERS") or min(4, os.cpu_count() or 1))
+# Simulations per chunk: small enough that the last ones overrun the budget
+# by little, large enough to amortise shipping the pools to a worker
+CHUNK_SIMULATIONS = 500
+# Draws (simulation x remaining match x player) per chunk at most, so one
+# chunk of a long season with big squads still finishes well inside the budget
+CHUNK_DRAWS = 1000000
+
+_pool = None
+
+
+# ---------------------------------------------------------------------------
+# Model
+# ---------------------------------------------------------------------------
+
+def team_pools(team_leaderboard, all_player_points, match_count):
+    """[(team, current total, [per-player pool])] in standings order.
+
+    A player's pool has one entry per tournament match: their points in it,
+    0 for the ones they missed. Players with no points at all are left out.
+    """
+    pools = {t["team"]: [] for t in team_leaderboard}
+    for p in all_player_points:
+        if p.get("team") not in pools:
+            continue
+        pool = [m["total"] for m in p["matches"]]
+        pool += [0] * (match_count - len(pool))
+        if any(pool):
+            pools[p["team"]].append(pool)
+    return [(t["team"], t["total_points"], pools[t["team"]]) for t in team_leaderboard]
+
+
+def _simulate(teams, remaining, simulations, seed):
+    """Finish-position counts [team][position] over *simulations* runs.
+
+    Ties finish in standings order.
+    """
+    rng = np.random.default_rng(seed)
+    totals = np.empty((simulations, len(teams)))
+    for i, (_, current, pools) in enumerate(teams):
+        column = np.full(simulations, float(current))
+        for pool in pools:
+            pool = np.asarray(pool, dtype=float)
+            column += pool[rng.integers(0, len(pool), size=(simulations, remaining))].sum(axis=1)
+        totals[:, i] = column
+    order = np.argsort(-totals, axis=1, kind="stable")  # [simulation, position] → team
+    counts = np.zeros((len(teams), len(teams)), dtype=np.int64)
+    np.add.at(counts, (order, np.arange(len(teams))), 1)
+    return counts.tolist()
+
+
+def _get_pool():
+    """The shared worker pool (spawned: never a fork of a threaded server)."""
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _chunk_size(teams, remaining):
+    """CHUNK_SIMULATIONS, or fewer if that many would be over CHUNK_DRAWS draws."""
+    players = sum(len(pools) for _, _, pools in teams)
+    return max(1, min(CHUNK_SIMULATIONS, CHUNK_DRAWS // max(1, players * remaining)))
+
+
+def simulate(teams, remaining, simulations=DEFAULT_SIMULATIONS, budget=MAX_BUDGET_SECONDS,
+             seed=None, workers=None):
+    """Run up to *simulations* within *budget* seconds; return (counts, simulations run).
+
+    The same *seed* and simulation count give the same counts, however the
+    chunks are spread over workers.
+    """
+    deadline = time.monotonic() + budget
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    size = _chunk_size(teams, remaining)
+    chunks = [(i, min(size, simulations - start))
+              for i, start in enumerate(range(0, simulations, size))]
+    counts = [[0] * len(teams) for _ in teams]
+    done = 0
+
+    def _add(chunk_counts, n):
+        nonlocal done
+        for row, chunk_row in zip(counts, chunk_counts):
+            for position, c in enumerate(chunk_row):
+                row[position] += c
+        done += n
+
+    workers = WORKERS if workers is None else workers
+    if workers <= 1 or len(chunks) == 1:
+        for i, n in chunks:
+            _add(_simulate(teams, remaining, n, seed + i), n)
+            if time.monotonic() >= deadline:
+                break
+        return counts, done
+
+    # Keep every worker busy with one chunk in flight, and stop handing out
+    # chunks once the budget is spent
+    pool = _get_pool()
+    pending, queued = {}, iter(chunks)
+    for i, n in queued:
+        pending[pool.submit(_simulate, teams, remaining, n, seed + i)] = n
+        if len(pending) == workers:
+            break
+    while pending:
+        # The first chunk is waited for whatever the budget: never answer empty
+        finished, _ = concurrent.futures.wait(
+            pending, timeout=max(0, deadline - time.monotonic()) if done else None,
+            return_when=concurrent.futures.FIRST_COMPLETED)
+        if not finished:
+            break
+        for future in finished:
+            _add(future.result(), pending.pop(future))
+            if time.monotonic() < deadline:
+                for i, n in queued:
+                    pending[pool.submit(_simulate, teams, remaining, n, seed + i)] = n
+                    break
+    for future in pending:
+        future.cancel()
+    return counts, done
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def project(tournament_id, remaining, simulations=DEFAULT_SIMULATIONS, budget=MAX_BUDGET_SECONDS,
+            seed=None):
+    """Each fantasy team's finish-position probabilities after *remaining* more matches.
+
+    Returns {remaining_matches, simulations, elapsed_s, teams}: teams in
+    current standings order, each {team, total_points, win_probability,
+    expected_position, positions: [P(1st), P(2nd), ...]}. "simulations" is
+    how many fit in *budget*, up to *simulations*.
+    """
+    from db import count_matches, get_all_player_points, get_team_leaderboard
+
+    started = time.monotonic()
+    team_leaderboard = get_team_leaderboard(tournament_id)
+    teams = team_pools(team_leaderboard, get_all_player_points(tournament_id),
+                       count_matches(tournament_id))
+    if remaining and teams:
+        counts, done = simulate(teams, remaining, simulations, budget, seed)
+    else:
+        # Nothing left to play: the standings are final
+        counts = [[int(i == position) for position in range(len(teams))] for i in range(len(teams))]
+        done = 1
+
+    result = []
+    for (team, total, _), row in zip(teams, counts):
+        positions = [c / done for c in row] if done else []
+        result.append({
+            "team": team,
+            "total_points": total,
+            "win_probability": positions[0] if positions else None,
+            "expected_position": (sum(p * c for p, c in enumerate(row, 1)) / done) if done else None,
+            "positions": positions,
+        })
+    return {
+        "remaining_matches": remaining,
+        "simulations": done,
+        "elapsed_s": round(time.monotonic() - started, 3),
+        "teams": result,
+    }
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project final fantasy-team standings.")
+    parser.add_argument("tournament", help="Tournament ID")
+    parser.add_argument("--remaining", type=int, required=True, help="Matches left to play")
+    parser.add_argument("--simulations", type=int, default=DEFAULT_SIMULATIONS)
+    parser.add_argument("--budget", type=float, default=MAX_BUDGET_SECONDS, help="Seconds")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    print(json.dumps(project(args.tournament, args.remaining, args.simulations, args.budget,
+                             args.seed), indent=2))
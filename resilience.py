@@ -0,0 +1,161 @@
+"""Keep the read endpoints answering when the datastore is slow or down.
+
+main.py (@_resilient_read) and asgi.py (_resilient) wrap every read
+endpoint in three things:
+
+    deadline          a request's datastore calls share READ_DEADLINE_MS
+                      between them (pymongo.timeout: server selection,
+                      pool checkout and the queries), so an Atlas hiccup
+                      fails a read quickly instead of after pymongo's 30s
+                      server-selection timeout
+    last known good   successful responses are kept per process (the newest
+                      STALE_CACHE_ENTRIES, by path, the query params the
+                      endpoint reads and encoding); when the
+                      datastore fails, the kept one is served instead,
+                      marked with "X-Stale: <age in seconds>"
+    circuit breaker   BREAKER_FAILURES datastore failures in a row open the
+                      breaker: for BREAKER_RESET_SECONDS reads don't touch
+                      the datastore at all (stale copy, else 503 with
+                      Retry-After), so blocked workers don't pile up. Then
+                      one read probes it; success closes the breaker.
+
+Only datastore errors count (DATASTORE_ERRORS); any other exception is a
+bug and propagates as before. The endpoints backed by the shared cache
+(leaderboard, teams, dashboard) never need the datastore for a cached body:
+with the breaker open or the datastore failing, they serve it from there,
+current rather than stale, before trying a kept copy.
+"""
+
+import collections
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+import pymongo
+from pymongo.errors import PyMongoError
+
+READ_DEADLINE_SECONDS = int(os.environ.get("READ_DEADLINE_MS", "2000")) / 1000
+STALE_CACHE_ENTRIES = int(os.environ.get("STALE_CACHE_ENTRIES", "512"))
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", "10"))
+
+# What a failing datastore raises (timeouts included)
+DATASTORE_ERRORS = (PyMongoError, sqlite3.OperationalError)
+
+# Response headers kept with a last-known-good body
+KEPT_HEADERS = ("Content-Type", "Content-Encoding", "Vary", "X-Data-Version", "X-Next-Cursor", "Link")
+
+
+def deadline():
+    """Context manager bounding the datastore calls made inside it by READ_DEADLINE_MS."""
+    if READ_DEADLINE_SECONDS <= 0:
+        return contextlib.nullcontext()
+    return pymongo.timeout(READ_DEADLINE_SECONDS)
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+class CircuitBreaker:
+    """Closed until *failures* failures in a row, then open for *reset_seconds*.
+
+    Once that has passed, allow() lets one call through to probe (and
+    re-arms the wait for everyone else); its success closes the breaker,
+    its failure keeps it open.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failed = 0
+        self._opened_at = None
+
+    @property
+    def state(self):
+        """"closed", "open" or "half-open" (open, but due a probe)."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "open" if time.monotonic() - self._opened_at < self.reset_seconds else "half-open"
+
+    def allow(self):
+        """Whether a call may go to the datastore now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_seconds:
+                return False
+            self._opened_at = now  # this call is the probe
+            return True
+
+    def retry_after(self):
+        """Whole seconds until the next probe (0 if closed)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+            return max(1, int(self._opened_at + self.reset_seconds - time.monotonic() + 0.999))
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                print("Datastore is answering again: circuit breaker closed")
+            self._failed = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failed += 1
+            if self._opened_at is not None or self._failed >= self.failures:
+                if self._opened_at is None:
+                    print("Datastore failed {} reads in a row: circuit breaker open for {}s".format(
+                        self._failed, self.reset_seconds))
+                self._opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker()
+
+
+# ---------------------------------------------------------------------------
+# Last-known-good responses
+# ---------------------------------------------------------------------------
+
+_kept = collections.OrderedDict()  # key → (monotonic time, body, headers)
+_kept_lock = threading.Lock()
+
+
+def keep(key, body, headers):
+    """Remember a successful response (*headers*: the KEPT_HEADERS it has)."""
+    if STALE_CACHE_ENTRIES <= 0:
+        return
+    with _kept_lock:
+        _kept[key] = (time.monotonic(), body, headers)
+        _kept.move_to_end(key)
+        while len(_kept) > STALE_CACHE_ENTRIES:
+            _kept.popitem(last=False)
+
+
+def last_known_good(key):
+    """(body, headers) of the kept response for *key*, marked stale, or None."""
+    with _kept_lock:
+        entry = _kept.get(key)
+    if entry is None:
+        return None
+    stored_at, body, headers = entry
+    return body, dict(headers, **{"X-Stale": str(int(time.monotonic() - stored_at))})
+
+
+def unavailable_headers():
+    """Headers for a 503 when there is nothing to fall back on."""
+    return {"Retry-After": str(breaker.retry_after() or int(BREAKER_RESET_SECONDS))}
+
+
+def clear():
+    """Forget every kept response and close the breaker (tests, benchmarks)."""
+    with _kept_lock:
+        _kept.clear()
+    breaker.record_success()
@@ -2,54 +2,125 @@
 
 Every function is pure (no file I/O) and works on the match-result dicts
 already produced by the WT20 scraper (batting.py, bowling.py, fielding.py).
+
+The point values are a rule set: DEFAULT_RULES (fipl's) unless a tournament
+stores its own. get_rule_set() validates a rule-set document and compiles it
+once into scoring functions with the values written in, cached by its
+version, so a custom league scores as fast as the defaults.
 """
 
+import copy
+import hashlib
+import json
 import math
 
+# Bump whenever a formula below changes. It is part of every rule set's
+# version, so cached per-match scores (see calculate_points.score_match) are
+# evicted and every match is re-scored on the next recalculation.
+RULES_VERSION = 1
+
+# fipl's point values. A tournament's rule-set document overrides any of
+# these; a "wicket_bonuses" given there replaces the default one.
+DEFAULT_RULES = {
+    "batting": {
+        "run": 1,
+        "four": 2,                # on top of the runs
+        "six": 3,
+        "milestone_runs": 25,     # bonus every N runs (0: none)
+        "milestone_bonus": 10,
+        "strike_rate": 1,         # × (runs − balls)
+        "duck": -10,              # out for 0
+    },
+    "bowling": {
+        "wicket": 25,
+        "maiden": 15,
+        "dot": 1,
+        "economy": 1,             # × (overs × economy_par − runs conceded)
+        "economy_par": 12,
+        "wicket_bonuses": {"3": 25, "5": 50, "7": 100},  # cumulative
+    },
+    "fielding": {
+        "catch": 15,
+        "runout": 10,             # per involvement (counted in fielding.py)
+        "stumping": 10,
+    },
+    "mom": 25,
+}
+
+
+# ---------------------------------------------------------------------------
+# Compiling a rule set
+# ---------------------------------------------------------------------------
+#
+# Each scoring function is generated as source with the rule values written
+# in as literals, then compiled: it runs exactly like a hand-written one, no
+# lookups into the rules per record. Only validated numbers (see
+# validate_rules) are ever formatted into the source.
+
+def _term(expr, points):
+    """Source for *expr* × *points*, simplified where that can't change the result."""
+    if isinstance(points, int) and points in (0, 1):
+        return expr if points else "0"
+    return "({} * {!r})".format(expr, points)
+
+
+def _compile(name, source):
+    namespace = {"math": math}
+    exec(compile(source, "<scoring rules: {}>".format(name), "exec"), namespace)
+    return namespace[name]
+
 
 # ---------------------------------------------------------------------------
 # Batting
 # ---------------------------------------------------------------------------
 
-def calculate_batting_points(record):
-    """Calculate batting points for a single batting record dict.
+def _compile_batting(rules):
+    """Batting points for a single batting record dict.
 
-    Formula (from fipl):
-        runs + (fours * 2) + (sixes * 3)
-        + floor(runs / 25) * 10              # milestone bonus every 25 runs
-        + (runs - balls)                      # strike-rate bonus / penalty
-        - 10 if duck (0 runs & out)
+    runs × run + fours × four + sixes × six
+    + floor(runs / milestone_runs) × milestone_bonus
+    + (runs − balls) × strike_rate
+    + duck if out for 0 (fipl: −10)
     """
+    every = rules["milestone_runs"]
+    milestone = _term("math.floor(runs / {!r})".format(every), rules["milestone_bonus"]) if every else "0"
+    return _compile("batting_points", """
+def batting_points(record):
     runs  = record.get("runs", 0)
     balls = record.get("balls", 0)
     fours = record.get("fours", 0)
     sixes = record.get("sixes", 0)
     dismissal = record.get("dismissal", "")
 
-    duck_penalty = -10 if (runs == 0 and dismissal and "not out" not in dismissal.lower()) else 0
-
-    runs_pts      = runs
-    boundary_pts  = (fours * 2) + (sixes * 3)
-    milestone_pts = math.floor(runs / 25) * 10
-    sr_pts        = runs - balls
+    duck_penalty = {duck!r} if (runs == 0 and dismissal and "not out" not in dismissal.lower()) else 0
 
-    return runs_pts + boundary_pts + milestone_pts + sr_pts + duck_penalty
+    return {runs} + ({fours} + {sixes}) + {milestone} + {strike_rate} + duck_penalty
+""".format(duck=rules["duck"], runs=_term("runs", rules["run"]),
+           fours=_term("fours", rules["four"]), sixes=_term("sixes", rules["six"]),
+           milestone=milestone, strike_rate=_term("(runs - balls)", rules["strike_rate"])))
 
 
 # ---------------------------------------------------------------------------
 # Bowling
 # ---------------------------------------------------------------------------
 
-def calculate_bowling_points(record):
-    """Calculate bowling points for a single bowling record dict.
+def _compile_bowling(rules):
+    """Bowling points for a single bowling record dict (0 if no balls bowled).
 
-    Formula (from fipl):
-        wickets * 25
-        + maidens * 15
-        + (overs * 12 - runs_conceded)        # economy bonus
-        + dots * 1                             # dot-ball bonus
-        + milestone bonuses (3W +25, 5W +50, 7W +100  – cumulative)
+    wickets × wicket + maidens × maiden
+    + (overs × economy_par − runs_conceded) × economy
+    + dots × dot
+    + wicket_bonuses, cumulative (fipl: 3W +25, 5W +50, 7W +100, so a
+      7-fer earns 175)
     """
+    # Highest threshold first, each with the bonuses at or below it
+    bonus, total = "0", 0
+    for threshold, points in sorted((int(k), v) for k, v in rules["wicket_bonuses"].items()):
+        total += points
+        bonus = "{!r} if wickets >= {} else {}".format(total, threshold, bonus)
+    economy = _term("((overs * {!r}) - runs)".format(rules["economy_par"]), rules["economy"])
+    return _compile("bowling_points", """
+def bowling_points(record):
     balls   = record.get("balls", 0)
     if balls == 0:
         return 0
@@ -60,44 +131,130 @@ def calculate_bowling_points(record):
     dots    = record.get("dots", 0)
 
     overs = balls / 6.0
+    bonus = {bonus}
 
-    wicket_pts  = wickets * 25
-    maiden_pts  = maidens * 15
-    economy_pts = (overs * 12) - runs
-    dot_pts     = dots * 1
-
-    bonus = 0
-    if wickets >= 7:
-        bonus = 25 + 50 + 100          # 3-fer + 5-fer + 7-fer
-    elif wickets >= 5:
-        bonus = 25 + 50                # 3-fer + 5-fer
-    elif wickets >= 3:
-        bonus = 25                     # 3-fer
-
-    return wicket_pts + maiden_pts + economy_pts + dot_pts + bonus
+    return {wickets} + {maidens} + {economy} + {dots} + bonus
+""".format(bonus=bonus, wickets=_term("wickets", rules["wicket"]),
+           maidens=_term("maidens", rules["maiden"]), economy=economy,
+           dots=_term("dots", rules["dot"])))
 
 
 # ---------------------------------------------------------------------------
 # Fielding
 # ---------------------------------------------------------------------------
 
-def calculate_fielding_points(fielding_entry):
-    """Calculate fielding points for a single player's fielding dict.
+def _compile_fielding(rules):
+    """Fielding points for a single player's fielding dict.
 
-    Points (from fipl):
-        catch   = 15
-        runout  = 10  (already counted per involvement in fielding.py)
-        stumping = 10
+    catches × catch + runout × runout + stumpings × stumping
     """
+    return _compile("fielding_points", """
+def fielding_points(fielding_entry):
     catches   = fielding_entry.get("catches", 0)
     runout    = fielding_entry.get("runout", 0)
     stumpings = fielding_entry.get("stumpings", 0)
 
-    return (catches * 15) + (runout * 10) + (stumpings * 10)
+    return {catches} + {runout} + {stumpings}
+""".format(catches=_term("catches", rules["catch"]), runout=_term("runout", rules["runout"]),
+           stumpings=_term("stumpings", rules["stumping"])))
+
+
+# ---------------------------------------------------------------------------
+# Rule sets
+# ---------------------------------------------------------------------------
+#
+# A compiled rule set is a dict of:
+#
+#     version        rules version (cache key for per-match scores)
+#     rules          the full, validated rule-set document
+#     batting        record → points (and bowling, fielding)
+#     mom            Man of the Match bonus
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def validate_rules(doc):
+    """Return the full rule set for a rule-set document (None: the defaults).
+
+    Values missing from *doc* come from DEFAULT_RULES. Raises ValueError
+    naming the first bad key.
+    """
+    rules = copy.deepcopy(DEFAULT_RULES)
+    if doc is None:
+        return rules
+    if not isinstance(doc, dict):
+        raise ValueError("scoring rules must be an object")
+    for section, values in doc.items():
+        if section not in rules:
+            raise ValueError("unknown scoring rule '{}'".format(section))
+        if section == "mom":
+            if not _is_number(values):
+                raise ValueError("scoring rule 'mom' must be a number")
+            rules["mom"] = values
+            continue
+        if not isinstance(values, dict):
+            raise ValueError("scoring rules '{}' must be an object".format(section))
+        for key, value in values.items():
+            name = "{}.{}".format(section, key)
+            if key not in rules[section]:
+                raise ValueError("unknown scoring rule '{}'".format(name))
+            if key == "wicket_bonuses":
+                if not isinstance(value, dict) or not all(
+                        str(k).isdigit() and int(k) > 0 and _is_number(v) for k, v in value.items()):
+                    raise ValueError("scoring rule '{}' must map wicket counts to points".format(name))
+                value = {str(int(k)): v for k, v in value.items()}
+            elif key == "milestone_runs":
+                if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                    raise ValueError("scoring rule '{}' must be a whole number of runs".format(name))
+            elif not _is_number(value):
+                raise ValueError("scoring rule '{}' must be a number".format(name))
+            rules[section][key] = value
+    return rules
+
+
+def rules_version(rules):
+    """Version of a full rule set: changes with any value or with RULES_VERSION."""
+    canonical = json.dumps(rules, sort_keys=True, separators=(",", ":"))
+    return "{}-{}".format(RULES_VERSION, hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16])
+
+
+_compiled = {}  # version → compiled rule set
+
+
+def get_rule_set(doc=None, cache=True):
+    """Validate and compile a rule-set document (None: the defaults), cached by version.
+
+    With *cache* False a rule set that isn't cached yet is compiled but not
+    kept: for one-off rule sets (what-ifs) that must not grow the cache.
+    """
+    rules = validate_rules(doc)
+    version = rules_version(rules)
+    rule_set = _compiled.get(version)
+    if rule_set is None:
+        rule_set = {
+            "version": version,
+            "rules": rules,
+            "batting": _compile_batting(rules["batting"]),
+            "bowling": _compile_bowling(rules["bowling"]),
+            "fielding": _compile_fielding(rules["fielding"]),
+            "mom": rules["mom"],
+        }
+        if cache:
+            _compiled[version] = rule_set
+    return rule_set
+
+
+DEFAULT_RULE_SET = get_rule_set()
+
+# fipl's scoring, as plain functions
+calculate_batting_points = DEFAULT_RULE_SET["batting"]
+calculate_bowling_points = DEFAULT_RULE_SET["bowling"]
+calculate_fielding_points = DEFAULT_RULE_SET["fielding"]
 
 
 # ---------------------------------------------------------------------------
 # Man of the Match
 # ---------------------------------------------------------------------------
 
-MOM_BONUS = 25
+MOM_BONUS = DEFAULT_RULES["mom"]
@@ -25,6 +25,17 @@ load_dotenv()
 
 MATCH_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "match_results")
 
+CRICINFO_ORIGIN = re.compile(r"^https?://(www\.)?espncricinfo\.com")
+
+
+def cricinfo_url(url):
+    """Rewrite an espncricinfo.com URL onto CRICINFO_BASE_URL, if set.
+
+    Lets the scrapers run against a stand-in such as cricinfo_fixture_server.py.
+    """
+    base = os.environ.get("CRICINFO_BASE_URL", "").rstrip("/")
+    return CRICINFO_ORIGIN.sub(base, url) if base else url
+
 
 # ---------------------------------------------------------------------------
 # Data loading
@@ -39,14 +50,33 @@ def _fetch_from_page(scorecard_url):
     """
     from curl_cffi import requests as cffi_requests
 
-    if "/full-scorecard" not in scorecard_url:
-        scorecard_url = scorecard_url.rstrip("/") + "/full-scorecard"
-
+    scorecard_url = _scorecard_page_url(scorecard_url)
     print(f"Fetching Cricinfo scorecard page: {scorecard_url}")
     resp = cffi_requests.get(scorecard_url, impersonate="chrome", timeout=30)
     resp.raise_for_status()
+    return _parse_next_data(resp.text)
+
+
+async def _fetch_from_page_async(scorecard_url):
+    """Async _fetch_from_page: awaits the page instead of blocking a thread on it."""
+    from curl_cffi.requests import AsyncSession
+
+    scorecard_url = _scorecard_page_url(scorecard_url)
+    print(f"Fetching Cricinfo scorecard page: {scorecard_url}")
+    async with AsyncSession() as session:
+        resp = await session.get(scorecard_url, impersonate="chrome", timeout=30)
+    resp.raise_for_status()
+    return _parse_next_data(resp.text)
+
 
-    html = resp.text
+def _scorecard_page_url(scorecard_url):
+    if "/full-scorecard" not in scorecard_url:
+        scorecard_url = scorecard_url.rstrip("/") + "/full-scorecard"
+    return cricinfo_url(scorecard_url)
+
+
+def _parse_next_data(html):
+    """Return the match data embedded in a scorecard page's __NEXT_DATA__."""
     if "__NEXT_DATA__" not in html:
         raise RuntimeError("Could not find __NEXT_DATA__ in page HTML. "
                            "ESPN Cricinfo may have changed their page structure.")
@@ -92,6 +122,14 @@ def _load_json_file(path):
 # ESPN Cricinfo data extraction
 # ---------------------------------------------------------------------------
 
+def _player_id(player_obj):
+    """Cricinfo's numeric player objectId (the one in profile URLs), or None."""
+    try:
+        return int(player_obj["objectId"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
 def _extract_batting(innings_data):
     """Extract batting records from all innings (<=2)."""
     batting = []
@@ -102,9 +140,10 @@ def _extract_batting(innings_data):
         for b in inning.get("inningBatsmen", []):
             player_obj = b.get("player", {})
             player_name = player_obj.get("longName", "").strip()
-            if not player_name or player_name in seen:
+            player_id = _player_id(player_obj)
+            if not player_name or (player_id or player_name) in seen:
                 continue
-            seen.add(player_name)
+            seen.add(player_id or player_name)
 
             # Build dismissal string for duck detection in scoring.py
             is_out = b.get("isOut", False)
@@ -117,6 +156,7 @@ def _extract_batting(innings_data):
 
             batting.append({
                 "player": player_name,
+                "player_id": player_id,
                 "dismissal": dismissal_text,
                 "runs": b.get("runs", 0) or 0,
                 "balls": b.get("balls", 0) or 0,
@@ -136,12 +176,14 @@ def _extract_bowling(innings_data):
         for bw in inning.get("inningBowlers", []):
             player_obj = bw.get("player", {})
             player_name = player_obj.get("longName", "").strip()
-            if not player_name or player_name in seen:
+            player_id = _player_id(player_obj)
+            if not player_name or (player_id or player_name) in seen:
                 continue
-            seen.add(player_name)
+            seen.add(player_id or player_name)
 
             bowling.append({
                 "player": player_name,
+                "player_id": player_id,
                 "balls": bw.get("balls", 0) or 0,
                 "maidens": bw.get("maidens", 0) or 0,
                 "runs": bw.get("conceded", 0) or 0,
@@ -154,16 +196,16 @@ def _extract_bowling(innings_data):
 def _extract_fielding(innings_data):
     """Extract fielding stats from structured inningWickets data.
 
-    Returns dict: { player_name: { catches, runout, stumpings } }
+    Returns dict: { player_name: { catches, runout, stumpings, player_id } }
 
     dismissalType codes (from Cricinfo):
         1 = caught, 4 = run out, 5 = stumped
     """
     fielding = {}
 
-    def _ensure(name):
+    def _ensure(name, player_id):
         if name and name not in fielding:
-            fielding[name] = {"catches": 0, "runout": 0, "stumpings": 0}
+            fielding[name] = {"catches": 0, "runout": 0, "stumpings": 0, "player_id": player_id}
 
     for inning in innings_data:
         if inning.get("inningNumber", 99) > 2:
@@ -179,7 +221,7 @@ def _extract_fielding(innings_data):
                 name = player_obj.get("longName", "").strip()
                 if not name:
                     continue
-                _ensure(name)
+                _ensure(name, _player_id(player_obj))
 
                 if d_type == 1:          # caught
                     fielding[name]["catches"] += 1
@@ -192,12 +234,13 @@ def _extract_fielding(innings_data):
 
 
 def _extract_man_of_the_match(content):
-    """Extract Man of the Match from matchPlayerAwards."""
+    """Extract Man of the Match (name, player id) from matchPlayerAwards."""
     awards = content.get("matchPlayerAwards", [])
     if awards:
         player = awards[0].get("player", {})
-        return player.get("longName", "").strip() or None
-    return None
+        name = player.get("longName", "").strip() or None
+        return name, (_player_id(player) if name else None)
+    return None, None
 
 
 def _extract_match_name(data):
@@ -211,6 +254,12 @@ def _extract_match_name(data):
     return title or None
 
 
+def _extract_start_time(data):
+    """Extract the scheduled start (ISO 8601, UTC) from match.startTime, else startDate."""
+    match = data.get("match", {})
+    return match.get("startTime") or match.get("startDate") or None
+
+
 def _extract_match_id(data):
     """Extract match ID from the data."""
     return str(data.get("match", {}).get("id", ""))
@@ -229,6 +278,12 @@ def scrape_match(scorecard_url):
     return _process_raw(raw)
 
 
+async def scrape_match_async(scorecard_url):
+    """Async scrape_match, for the ASGI server (asgi.py)."""
+    raw = await _fetch_from_page_async(scorecard_url)
+    return _process_raw(raw)
+
+
 def scrape_from_file(json_path):
     """Load match data from a JSON file. Returns (match_dict, match_name)."""
     raw = _load_json_file(json_path)
@@ -243,9 +298,10 @@ def _process_raw(raw):
     batting_records = _extract_batting(innings)
     bowling_records = _extract_bowling(innings)
     fielding = _extract_fielding(innings)
-    man_of_the_match = _extract_man_of_the_match(content)
+    man_of_the_match, man_of_the_match_id = _extract_man_of_the_match(content)
     match_name = _extract_match_name(raw)
     match_id = _extract_match_id(raw)
+    start_time = _extract_start_time(raw)
 
     out = {
         "match_id": match_id,
@@ -254,7 +310,10 @@ def _process_raw(raw):
         "bowling": bowling_records,
         "fielding": fielding,
         "man_of_the_match": man_of_the_match,
+        "man_of_the_match_id": man_of_the_match_id,
     }
+    if start_time:
+        out["start_time"] = start_time
 
     print(f"\nScraped: {match_name or match_id}")
     print(f"  Batters: {len(batting_records)}, Bowlers: {len(bowling_records)}, "
@@ -280,10 +339,16 @@ def save_to_disk(match_data, match_id, vs_portion):
 
 
 def save_to_mongo(tournament_id, match_data):
-    """Save match JSON to MongoDB Atlas under a tournament."""
+    """Save match JSON to MongoDB Atlas under a tournament.
+
+    Returns False if the stored match was already identical.
+    """
     from db import save_match
-    save_match(tournament_id, match_data)
+    if not save_match(tournament_id, match_data):
+        print(f"Unchanged in MongoDB: tournament={tournament_id}, match_id={match_data['match_id']}")
+        return False
     print(f"Saved to MongoDB: tournament={tournament_id}, match_id={match_data['match_id']}")
+    return True
 
 
 def main():
@@ -320,13 +385,16 @@ def main():
     save_to_disk(match_data, match_id, vs_portion)
 
     # Save to MongoDB unless --local-only
+    changed = True
     if not args.local_only:
         try:
-            save_to_mongo(args.tournament, match_data)
+            changed = save_to_mongo(args.tournament, match_data)
         except Exception as e:
             print(f"Warning: MongoDB save failed: {e}", file=sys.stderr)
 
-    if args.recalculate:
+    if args.recalculate and not changed:
+        print("\nScorecard unchanged, skipping recalculation.")
+    elif args.recalculate:
         print("\nRecalculating fantasy points...")
         from calculate_points import recalculate_all
         recalculate_all(args.tournament)
@@ -0,0 +1,146 @@
+"""Cross-worker cache of pre-serialized API responses.
+
+Gunicorn runs every worker as a separate process, so an in-process dict would
+be warmed (and go stale) once per worker. Instead the serialized JSON bodies
+live as files in a shared-memory directory (``/dev/shm`` on Linux), laid out
+per tournament and data version:
+
+    <SHARED_CACHE_DIR>/<tournament>/<version>/<name>
+    <SHARED_CACHE_DIR>/<tournament>/<version>/<name>.etag   # hash of the body
+    <SHARED_CACHE_DIR>/<tournament>/CURRENT          # "<version>"
+
+The worker that recalculates a tournament publishes a complete version
+directory and then atomically swaps ``CURRENT``. Readers never see a
+half-written version, and bodies are handed to the WSGI server as open files
+so gunicorn can ``sendfile`` them straight from the page cache.
+
+ETags are the bodies' content hashes rather than their versions: the
+version count starts over when a tournament is deleted and recreated.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from urllib.parse import quote
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: publishing is unlocked, still atomic
+    fcntl = None
+
+
+def _default_cache_dir():
+    """Prefer tmpfs so every worker maps the same physical pages."""
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return os.path.join("/dev/shm", "t20fantasy-cache")
+    return os.path.join(tempfile.gettempdir(), "t20fantasy-cache")
+
+
+CACHE_DIR = os.environ.get("SHARED_CACHE_DIR") or _default_cache_dir()
+ETAG_SUFFIX = ".etag"
+
+
+def dumps(obj):
+    """Serialize *obj* to compact UTF-8 JSON bytes."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _tournament_dir(tournament_id):
+    # Prefix so slugs like ".." can never escape CACHE_DIR
+    return os.path.join(CACHE_DIR, "t_" + quote(str(tournament_id), safe=""))
+
+
+def current_version(tournament_id):
+    """Return the published data version for a tournament, or None."""
+    try:
+        with open(os.path.join(_tournament_dir(tournament_id), "CURRENT"), encoding="ascii") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def open_body(tournament_id, name):
+    """Open the current body *name* for a tournament.
+
+    Returns (binary file object, version) or None if nothing is published.
+    The caller owns the file; it stays readable even if a newer version is
+    published and the old directory pruned while it is being streamed.
+    """
+    version = current_version(tournament_id)
+    if version is None:
+        return None
+    path = os.path.join(_tournament_dir(tournament_id), str(version), name)
+    try:
+        return open(path, "rb"), version
+    except OSError:
+        return None
+
+
+def body_etag(tournament_id, version, name):
+    """Return the content hash published with body *name* at *version*, or None."""
+    path = os.path.join(_tournament_dir(tournament_id), str(version), name + ETAG_SUFFIX)
+    try:
+        with open(path, encoding="ascii") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def publish(tournament_id, version, payloads):
+    """Publish serialized bodies for a tournament at *version*.
+
+    *payloads* maps body name → bytes (or a JSON-serializable object).
+    A version older than the one already published is ignored, so a slow
+    worker can never roll the cache back. Returns True if *version* is now
+    current.
+    """
+    tdir = _tournament_dir(tournament_id)
+    os.makedirs(tdir, exist_ok=True)
+
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=tdir)
+    try:
+        for name, body in payloads.items():
+            if not isinstance(body, (bytes, bytearray)):
+                body = dumps(body)
+            with open(os.path.join(staging, name), "wb") as f:
+                f.write(body)
+            with open(os.path.join(staging, name + ETAG_SUFFIX), "w", encoding="ascii") as f:
+                f.write(hashlib.blake2b(body, digest_size=12).hexdigest())
+
+        with open(os.path.join(tdir, ".lock"), "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            current = current_version(tournament_id)
+            if current is not None and current > version:
+                return False
+            target = os.path.join(tdir, str(version))
+            if os.path.isdir(target):
+                # Same version warmed piecemeal by readers: merge bodies in
+                for name in os.listdir(staging):
+                    os.replace(os.path.join(staging, name), os.path.join(target, name))
+            else:
+                os.rename(staging, target)
+
+            fd, tmp_pointer = tempfile.mkstemp(prefix=".current-", dir=tdir)
+            with os.fdopen(fd, "w", encoding="ascii") as f:
+                f.write(str(version))
+            os.replace(tmp_pointer, os.path.join(tdir, "CURRENT"))
+            _prune(tdir, keep=str(version))
+        return True
+    finally:
+        if os.path.isdir(staging):
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+def _prune(tdir, keep):
+    """Remove every version directory except *keep*."""
+    for entry in os.listdir(tdir):
+        if entry != keep and entry.isdigit():
+            shutil.rmtree(os.path.join(tdir, entry), ignore_errors=True)
+
+
+def invalidate(tournament_id):
+    """Drop everything cached for a tournament (e.g. after it is deleted)."""
+    shutil.rmtree(_tournament_dir(tournament_id), ignore_errors=True)
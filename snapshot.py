@@ -0,0 +1,293 @@
+"""Single-file tournament snapshots: move a tournament between environments
+or restore one after a mistaken delete.
+
+A snapshot holds the tournament document (with its scoring rules), the
+roster, every match document, the per-player match stats and the computed
+points and leaderboards:
+
+    python snapshot.py export wt20_2026 wt20_2026.t20snap
+    python snapshot.py import wt20_2026.t20snap [--as wt20_copy] [--replace]
+
+File layout: an 8-byte magic, one byte naming the compression and one the
+record codec, then the compressed stream of length-prefixed records
+[kind, data]. The stream starts with a "tournament" record and ends with an
+"end" record carrying the record counts, so a truncated file is detected.
+An import is loaded under a temporary id and renamed into place only once
+it is complete, so a bad file never replaces (or half-creates) a tournament.
+Matches and stats are written and read SNAPSHOT_BATCH_MATCHES at a time and
+stored with one bulk write per batch, so neither side holds the whole
+tournament in memory.
+
+Records are msgpack, compressed with zstd (the header bytes leave room for
+other formats later).
+"""
+
+import argparse
+import os
+import struct
+import time
+
+import msgpack
+import zstandard
+
+MAGIC = b"T20SNAP1"
+BATCH_MATCHES = int(os.environ.get("SNAPSHOT_BATCH_MATCHES", "200"))
+ZSTD_LEVEL = 10
+
+_LENGTH = struct.Struct(">I")
+# What a damaged or cut-off compressed stream raises
+_STREAM_ERRORS = (EOFError, OSError, zstandard.ZstdError)
+
+
+# ---------------------------------------------------------------------------
+# Encoding
+# ---------------------------------------------------------------------------
+
+def _codec(name):
+    """(encode, decode) for a codec byte: b"m" msgpack."""
+    if name == b"m":
+        return (lambda obj: msgpack.packb(obj, use_bin_type=True, default=str),
+                lambda raw: msgpack.unpackb(raw, raw=False, strict_map_key=False))
+    raise ValueError("unknown snapshot codec {!r}".format(name))
+
+
+def _open_compressed(f, name, mode):
+    """Wrap file *f* in the compression stream for a compression byte: b"z" zstd."""
+    if name == b"z":
+        if mode == "wb":
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(f, closefd=False)
+        return zstandard.ZstdDecompressor().stream_reader(f, closefd=False)
+    raise ValueError("unknown snapshot compression {!r}".format(name))
+
+
+def _read_exact(stream, n):
+    chunks = []
+    while n:
+        try:
+            chunk = stream.read(n)
+        except _STREAM_ERRORS as e:
+            raise ValueError("snapshot is truncated or corrupt ({})".format(e))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def _records(stream, decode):
+    """Yield [kind, data] records until the end of the stream."""
+    while True:
+        head = _read_exact(stream, _LENGTH.size)
+        if not head:
+            return
+        if len(head) < _LENGTH.size:
+            raise ValueError("snapshot is truncated")
+        size = _LENGTH.unpack(head)[0]
+        body = _read_exact(stream, size)
+        if len(body) < size:
+            raise ValueError("snapshot is truncated")
+        yield decode(body)
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def write_snapshot(tournament_id, path):
+    """Write a tournament's snapshot to *path*; return {kind: rows written}.
+
+    Raises ValueError if the tournament doesn't exist.
+    """
+    from db import (
+        get_all_player_points, get_leaderboard, get_match_hashes, get_matches, get_player_match_stats,
+        get_players, get_team_leaderboard, get_tournament,
+    )
+
+    tournament = get_tournament(tournament_id)
+    if tournament is None:
+        raise ValueError("tournament '{}' not found".format(tournament_id))
+
+    compression, codec = b"z", b"m"
+    encode, _ = _codec(codec)
+    counts = {"matches": 0, "player_match_stats": 0}
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + compression + codec)
+        with _open_compressed(f, compression, "wb") as stream:
+            def _write(kind, data):
+                body = encode([kind, data])
+                stream.write(_LENGTH.pack(len(body)))
+                stream.write(body)
+
+            _write("tournament", tournament)
+            players = get_players(tournament_id)
+            _write("players", players)
+            counts["players"] = len(players)
+            match_ids = [match_id for match_id, _ in get_match_hashes(tournament_id)]
+            for start in range(0, len(match_ids), BATCH_MATCHES):
+                batch = match_ids[start:start + BATCH_MATCHES]
+                # get_matches is unordered: keep the stored (fixture) order
+                docs = {d["match_id"]: d for d in get_matches(tournament_id, batch)}
+                _write("matches", [docs[m] for m in batch if m in docs])
+                counts["matches"] += len(docs)
+                stats = get_player_match_stats(tournament_id, batch)
+                if stats:
+                    _write("player_match_stats", stats)
+                    counts["player_match_stats"] += len(stats)
+            for kind, loader in (("player_points", get_all_player_points),
+                                 ("leaderboard", get_leaderboard),
+                                 ("team_leaderboard", get_team_leaderboard)):
+                rows = loader(tournament_id)
+                _write(kind, rows)
+                counts[kind] = len(rows)
+            _write("end", counts)
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Import
+# ---------------------------------------------------------------------------
+
+def read_header(f):
+    """(compression, codec) bytes from an open snapshot file; ValueError if it isn't one."""
+    header = f.read(len(MAGIC) + 2)
+    if len(header) < len(MAGIC) + 2 or not header.startswith(MAGIC):
+        raise ValueError("not a tournament snapshot")
+    return header[-2:-1], header[-1:]
+
+
+def import_snapshot(path, tournament_id=None, replace=False, recalculate=True):
+    """Load a snapshot as tournament *tournament_id* (default: the one it was taken from).
+
+    The records go into a temporary tournament, which takes the target id
+    only once the whole file has been read and its counts check out: a
+    truncated or corrupt snapshot leaves the datastore as it was. An
+    existing tournament with that id is an error unless *replace*, which
+    deletes it at that point. With *recalculate* the standings history,
+    careers and rendered responses are rebuilt afterwards (from the imported
+    stats, so nothing is re-scored from scratch); without it only the
+    careers are, from the imported points. Returns {tournament_id, counts}.
+    """
+    import careers
+    from calculate_points import recalculate_all
+    from db import (
+        create_tournament, delete_tournament, get_tournament, rename_tournament,
+        save_all_player_points, save_leaderboard, save_matches, save_player_match_stats,
+        save_team_leaderboard, set_players, set_scoring_rules,
+    )
+
+    with open(path, "rb") as f:
+        compression, codec = read_header(f)
+        _, decode = _codec(codec)
+        with _open_compressed(f, compression, "rb") as stream:
+            records = _records(stream, decode)
+            kind, tournament = next(records, (None, None))
+            if kind is None:
+                raise ValueError("snapshot is truncated")
+            if kind != "tournament":
+                raise ValueError("snapshot has no tournament record")
+            tid = tournament_id or tournament["tournament_id"]
+            if not replace and get_tournament(tid) is not None:
+                raise ValueError("tournament '{}' already exists".format(tid))
+
+            start_times, player_points = {}, []
+
+            def _save_stats(tournament_id, stats):
+                save_player_match_stats(tournament_id, stats)
+                start_times.update((match_id, s["start_time"]) for match_id, s in stats.items()
+                                   if s.get("start_time"))
+
+            def _save_points(tournament_id, rows):
+                save_all_player_points(tournament_id, rows)
+                player_points.extend(rows)
+
+            staging = "{}.importing-{}".format(tid, os.urandom(4).hex())
+            create_tournament(staging, tournament["name"], None, tournament.get("series_url", ""))
+            try:
+                if tournament.get("scoring_rules") is not None:
+                    set_scoring_rules(staging, tournament["scoring_rules"])
+                expected = _load_records(records, staging, {
+                    "players": set_players,
+                    "matches": save_matches,
+                    "player_match_stats": _save_stats,
+                    "player_points": _save_points,
+                    "leaderboard": save_leaderboard,
+                    "team_leaderboard": save_team_leaderboard,
+                })
+                if get_tournament(tid) is not None:
+                    if not replace:
+                        raise ValueError("tournament '{}' already exists".format(tid))
+                    _drop(tid)
+                    delete_tournament(tid)
+                rename_tournament(staging, tid)
+            except BaseException:
+                delete_tournament(staging)
+                raise
+
+    if recalculate:
+        recalculate_all(tid)
+    else:
+        # A replace dropped the old tournament's careers: put the new one in
+        careers.update_tournament(tid, player_points, start_times)
+    return {"tournament_id": tid, "counts": expected}
+
+
+def _load_records(records, tournament_id, writers):
+    """Store the records after the tournament one; return the end record's counts.
+
+    Raises ValueError on an unknown record, a missing end record or a count
+    that doesn't match it.
+    """
+    counts = {}
+    for kind, data in records:
+        if kind == "end":
+            if any(counts.get(k, 0) != n for k, n in data.items()):
+                break
+            return data
+        if kind not in writers:
+            raise ValueError("unknown snapshot record '{}'".format(kind))
+        writers[kind](tournament_id, data)
+        counts[kind] = counts.get(kind, 0) + len(data)
+    raise ValueError("snapshot is truncated or incomplete: nothing was imported")
+
+
+def _drop(tournament_id):
+    """Clear what a tournament left outside its own records before it is replaced."""
+    import careers
+    import shared_cache
+    import static_publish
+
+    careers.drop_tournament(tournament_id)
+    shared_cache.invalidate(tournament_id)
+    if static_publish.PUBLISH_DIR:
+        static_publish.drop_tournament(tournament_id)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a tournament snapshot.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="Write a tournament to a snapshot file")
+    p_export.add_argument("tournament", help="Tournament ID")
+    p_export.add_argument("path", help="Snapshot file to write")
+    p_import = sub.add_parser("import", help="Load a snapshot file")
+    p_import.add_argument("path", help="Snapshot file to read")
+    p_import.add_argument("--as", dest="tournament", help="Import under this tournament ID")
+    p_import.add_argument("--replace", action="store_true",
+                          help="Delete an existing tournament with the same ID first")
+    p_import.add_argument("--no-recalculate", action="store_true",
+                          help="Skip rebuilding history and rendered responses")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "export":
+        counts = write_snapshot(args.tournament, args.path)
+        print("{}: {} matches -> {} ({} bytes)".format(
+            args.tournament, counts["matches"], args.path, os.path.getsize(args.path)))
+    else:
+        result = import_snapshot(args.path, args.tournament, args.replace, not args.no_recalculate)
+        print("{}: {} matches imported".format(result["tournament_id"], result["counts"]["matches"]))
+    print("Done in {:.2f}s".format(time.perf_counter() - started))
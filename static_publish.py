@@ -0,0 +1,228 @@
+"""Static snapshots of the read endpoints, for a plain file server or CDN.
+
+With STATIC_PUBLISH_DIR set, every recalculation also writes the
+tournament's read responses there as versioned files, with the same gzip
+(and brotli) variants the app serves, and updates a manifest:
+
+    <dir>/manifest.json                      what is current (short cache)
+    <dir>/tournaments.json[.gz|.br]          GET /tournaments
+    <dir>/t/<slug>/<version>/
+        leaderboard.json[.gz|.br]            GET /t/<slug>/fantasy/leaderboard
+        teams.json                           GET /t/<slug>/fantasy/teams
+        dashboard.json                       GET /t/<slug>/fantasy/dashboard
+        matches.json                         GET /t/<slug>/fantasy/matches
+        players.json                         every player's per-match points
+        history-teams.json                   GET /t/<slug>/fantasy/history
+        history-players.json                 GET /t/<slug>/fantasy/history?kind=players
+
+A version directory never changes once written, so it can be cached
+forever; clients read the manifest to find the current one. The last
+STATIC_PUBLISH_KEEP versions of each tournament are kept, so a client
+holding a slightly stale manifest still finds its files.
+
+    python static_publish.py [--dir DIR] [-t wt20_2026]   # publish now, from the datastore
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+import prerender
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: publishing is unlocked, still atomic
+    fcntl = None
+
+PUBLISH_DIR = os.environ.get("STATIC_PUBLISH_DIR") or None
+# Versions kept per tournament (the current one included)
+KEEP_VERSIONS = max(1, int(os.environ.get("STATIC_PUBLISH_KEEP", "3")))
+
+MANIFEST = "manifest.json"
+
+
+def _tournament_path(tournament_id):
+    # Relative to the publish directory; quoted so slugs can't escape it
+    return "t/" + quote(str(tournament_id), safe="")
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _write_atomic(path, body):
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def _file_entries(bodies):
+    """Manifest entries {name: {bytes, sha256, encodings}} for rendered *bodies*."""
+    entries = {}
+    for name, body in bodies.items():
+        if name.endswith(tuple(prerender.ENCODINGS.values())):
+            continue
+        entries[name] = {
+            "bytes": len(body),
+            "sha256": hashlib.sha256(body).hexdigest(),
+            "encodings": [e for e, suffix in prerender.ENCODINGS.items() if name + suffix in bodies],
+        }
+    return entries
+
+
+def _update_manifest(out_dir, update):
+    """Apply update(manifest) under the publish lock and rewrite the manifest atomically.
+
+    update() may return False to leave the manifest untouched.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, ".lock"), "a") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {"tournaments": {}}
+        if update(manifest) is False:
+            return False
+        manifest["generated_at"] = _now()
+        _write_atomic(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=1).encode("utf-8"))
+        return True
+
+
+def _publish_tournament_list(out_dir):
+    from db import list_tournaments
+    bodies = prerender.render({"tournaments.json": list_tournaments()})
+    for name, body in bodies.items():
+        _write_atomic(os.path.join(out_dir, name), body)
+    return _file_entries(bodies)
+
+
+def _prune(tdir, keep):
+    """Remove every version directory of a tournament except the *keep* newest."""
+    versions = sorted((int(e) for e in os.listdir(tdir) if e.isdigit()), reverse=True)
+    for version in versions[keep:]:
+        shutil.rmtree(os.path.join(tdir, str(version)), ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def extra_payloads(tournament_id, all_players):
+    """The read payloads that prerender doesn't already render, from the datastore."""
+    from db import get_match_summaries, get_standings_history
+    return {
+        "matches.json": get_match_summaries(tournament_id),
+        "players.json": all_players,
+        "history-teams.json": get_standings_history(tournament_id, "teams"),
+        "history-players.json": get_standings_history(tournament_id, "players"),
+    }
+
+
+def publish_tournament(tournament_id, version, bodies, all_players, out_dir=None):
+    """Publish a tournament's read responses at data *version*.
+
+    *bodies* are the prerender.render() bodies of the recalculation; the
+    remaining endpoints are rendered here. A version older than the one in
+    the manifest is ignored. Returns True if *version* is now current.
+    """
+    out_dir = out_dir or PUBLISH_DIR
+    bodies = dict(bodies)
+    bodies.update(prerender.render(extra_payloads(tournament_id, all_players)))
+
+    rel = _tournament_path(tournament_id)
+    tdir = os.path.join(out_dir, rel)
+    target = os.path.join(tdir, str(version))
+    created = not os.path.isdir(target)
+    if created:
+        os.makedirs(tdir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=tdir)
+        try:
+            for name, body in bodies.items():
+                with open(os.path.join(staging, name), "wb") as f:
+                    f.write(body)
+            os.rename(staging, target)
+        finally:
+            if os.path.isdir(staging):
+                shutil.rmtree(staging, ignore_errors=True)
+
+    def _update(manifest):
+        current = manifest["tournaments"].get(str(tournament_id))
+        if current is not None and current["version"] > version:
+            return False
+        manifest["tournaments"][str(tournament_id)] = {
+            "version": version,
+            "published_at": _now(),
+            "path": "{}/{}/".format(rel, version),
+            "files": _file_entries(bodies),
+        }
+        manifest["files"] = _publish_tournament_list(out_dir)
+        _prune(tdir, KEEP_VERSIONS)
+
+    if _update_manifest(out_dir, _update):
+        return True
+    if created:
+        shutil.rmtree(target, ignore_errors=True)
+    return False
+
+
+def drop_tournament(tournament_id, out_dir=None):
+    """Take a (deleted) tournament out of the manifest and delete its files."""
+    out_dir = out_dir or PUBLISH_DIR
+
+    def _update(manifest):
+        manifest["tournaments"].pop(str(tournament_id), None)
+        manifest["files"] = _publish_tournament_list(out_dir)
+        shutil.rmtree(os.path.join(out_dir, _tournament_path(tournament_id)), ignore_errors=True)
+
+    _update_manifest(out_dir, _update)
+
+
+def publish_from_datastore(tournament_id, out_dir=None):
+    """Publish a tournament's stored standings at its current data version.
+
+    Returns the version, or None if it has never been recalculated.
+    """
+    from calculate_points import build_dashboard
+    from db import get_all_player_points, get_data_version, get_leaderboard, get_team_leaderboard
+
+    version = get_data_version(tournament_id)
+    if not version:
+        return None
+    leaderboard = get_leaderboard(tournament_id)
+    team_leaderboard = get_team_leaderboard(tournament_id)
+    all_players = get_all_player_points(tournament_id)
+    bodies = prerender.render({
+        "leaderboard.json": leaderboard,
+        "teams.json": team_leaderboard,
+        "dashboard.json": build_dashboard(leaderboard, team_leaderboard, all_players),
+    })
+    publish_tournament(tournament_id, version, bodies, all_players, out_dir)
+    return version
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish static snapshots of the read endpoints.")
+    parser.add_argument("--dir", default=PUBLISH_DIR, required=PUBLISH_DIR is None,
+                        help="Publish directory (default: STATIC_PUBLISH_DIR)")
+    parser.add_argument("-t", "--tournament", action="append",
+                        help="Tournament ID (repeatable; default: all)")
+    args = parser.parse_args()
+    if args.tournament is None:
+        from db import list_tournaments
+        args.tournament = [t["tournament_id"] for t in list_tournaments()]
+    for tid in args.tournament:
+        version = publish_from_datastore(tid, args.dir)
+        print("{}: {}".format(tid, "version {}".format(version) if version else "never recalculated, skipped"))
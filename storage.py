@@ -0,0 +1,365 @@
+"""Storage backend interface for T20 Fantasy Hub.
+
+db.py's module functions delegate to one Storage instance, picked by the
+STORAGE_BACKEND env var:
+
+    mongo   MongoDB via MONGODB_URI (default)          storage_mongo.MongoStorage
+    sqlite  embedded SQLite file at SQLITE_PATH        storage_sqlite.SqliteStorage
+    memory  SQLite in memory, gone when the process exits
+
+Every record is scoped by tournament_id. Documents come back as plain dicts
+shaped like the MongoDB ones (no _id).
+
+Roster entries are keyed by tournament_id + normalise_name(player_name), so
+"Smriti Mandhana (c)" and "smriti  mandhana" are the same player. An entry
+may also carry the player's Cricinfo player_id, uploaded with the roster or
+learned by calculate_points the first time the name is matched.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import re
+
+BACKENDS = ("mongo", "sqlite", "memory")
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "t20fantasy.sqlite3")
+
+
+def open_storage(backend=None):
+    """Create the Storage for *backend* (default: STORAGE_BACKEND, else mongo)."""
+    backend = (backend or os.environ.get("STORAGE_BACKEND") or "mongo").lower()
+    if backend == "mongo":
+        from storage_mongo import MongoStorage
+        return MongoStorage(os.environ.get("MONGODB_URI"))
+    if backend == "sqlite":
+        from storage_sqlite import SqliteStorage
+        return SqliteStorage(os.environ.get("SQLITE_PATH") or DEFAULT_SQLITE_PATH)
+    if backend == "memory":
+        from storage_sqlite import SqliteStorage
+        return SqliteStorage(":memory:")
+    raise RuntimeError("Unknown STORAGE_BACKEND '{}' (choose from {})".format(
+        backend, ", ".join(BACKENDS)))
+
+
+def normalise_name(name):
+    """Lowercase, collapse whitespace, strip designations."""
+    name = re.sub(r"\s*\(c\)\s*", " ", name, flags=re.IGNORECASE)
+    name = re.sub(r"\s*\(wk\)\s*", " ", name, flags=re.IGNORECASE)
+    return " ".join(name.lower().split())
+
+
+# Set by save_match, not part of a match's content
+MATCH_BOOKKEEPING_FIELDS = ("_id", "tournament_id", "content_hash")
+
+
+def match_content_hash(match_data):
+    """SHA-256 of a match's canonical JSON (sorted keys, no bookkeeping fields).
+
+    Re-scraping an unchanged scorecard gives the same hash.
+    """
+    content = {k: v for k, v in match_data.items() if k not in MATCH_BOOKKEEPING_FIELDS}
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def parse_player_id(value):
+    """A Cricinfo player id as an int, or None if *value* isn't one."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def roster_entries(players):
+    """{name_key: {player_name, team[, player_id]}} for a roster list, in order.
+
+    Later duplicates win.
+    """
+    entries = {}
+    for p in players or []:
+        name = (p.get("player_name") or "").strip()
+        if name:
+            entry = {"player_name": name, "team": p.get("team", "")}
+            player_id = parse_player_id(p.get("player_id"))
+            if player_id is not None:
+                entry["player_id"] = player_id
+            entries[normalise_name(name)] = entry
+    return entries
+
+
+# Standings history kinds: one trajectory per team / per player
+HISTORY_KINDS = ("teams", "players")
+
+
+class ThreadedAsyncStorage:
+    """Async view of a sync Storage: each call runs in asyncio's thread pool.
+
+    db_async.py uses it for backends without an asyncio driver (SQLite,
+    mongomock). SQLite calls are sub-millisecond, so the pool stays free.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.name = storage.name
+
+    def __getattr__(self, method):
+        sync = getattr(self.storage, method)
+
+        @functools.wraps(sync)
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(sync, *args, **kwargs)
+        return call
+
+
+class Storage:
+    """Operations every backend implements; see db.py for the call sites."""
+
+    name = None
+
+    # -- Lifecycle ------------------------------------------------------------
+
+    def warm_up(self):
+        """Connect now (and check the connection) instead of on the first request."""
+
+    def after_fork(self):
+        """Forget connections inherited from the parent process; reconnect lazily."""
+
+    def close(self):
+        """Close this process's connections."""
+
+    # -- Tournaments --------------------------------------------------------
+
+    def create_tournament(self, tournament_id, name, players=None, series_url=""):
+        """Create a tournament (players: [{player_name, team}]); ValueError if it exists."""
+        raise NotImplementedError
+
+    def get_tournament(self, tournament_id):
+        """Return a tournament document (metadata only, no roster) or None.
+
+        Includes "scoring_rules" if the tournament has its own.
+        """
+        raise NotImplementedError
+
+    def list_tournaments(self):
+        """Return all tournaments (summary: id, name, player count, series_url)."""
+        raise NotImplementedError
+
+    def update_tournament_series_url(self, tournament_id, series_url):
+        """Update the Cricinfo series URL for a tournament."""
+        raise NotImplementedError
+
+    def update_tournament_name(self, tournament_id, name):
+        """Update tournament display name."""
+        raise NotImplementedError
+
+    def bump_data_version(self, tournament_id):
+        """Increment and return the tournament's data version (0 if missing)."""
+        raise NotImplementedError
+
+    def get_data_version(self, tournament_id):
+        """Return the tournament's data version (0 if never recalculated, None if missing)."""
+        raise NotImplementedError
+
+    def delete_tournament(self, tournament_id):
+        """Delete a tournament and ALL its associated data; False if it didn't exist."""
+        raise NotImplementedError
+
+    def rename_tournament(self, tournament_id, new_id):
+        """Move a tournament and ALL its associated data to *new_id*.
+
+        False if it didn't exist; ValueError if *new_id* is taken.
+        """
+        raise NotImplementedError
+
+    def set_scoring_rules(self, tournament_id, rules):
+        """Store a tournament's scoring rule set (None: back to the defaults)."""
+        raise NotImplementedError
+
+    def list_scoring_rules(self):
+        """Return the scoring rule set of every tournament that has its own."""
+        raise NotImplementedError
+
+    # -- Roster -------------------------------------------------------------
+
+    def get_players(self, tournament_id):
+        """Return the roster [{player_name, team[, player_id]}, ...] for a tournament, in order."""
+        raise NotImplementedError
+
+    def count_players(self, tournament_id):
+        """Return how many players are on a tournament's roster."""
+        raise NotImplementedError
+
+    def set_players(self, tournament_id, players):
+        """Replace the entire roster; players already on it keep a known player_id."""
+        raise NotImplementedError
+
+    def add_player(self, tournament_id, player_name, team, player_id=None):
+        """Add or update a single player (moved to the end of the roster) in one write."""
+        raise NotImplementedError
+
+    def set_player_ids(self, tournament_id, player_ids):
+        """Record Cricinfo ids ({name_key: player_id}) on existing roster entries."""
+        raise NotImplementedError
+
+    def remove_player(self, tournament_id, player_name):
+        """Remove a player from the roster; True if they were on it."""
+        raise NotImplementedError
+
+    # -- Matches ------------------------------------------------------------
+
+    def save_match(self, tournament_id, match_data):
+        """Upsert a match (keyed by tournament_id + match_id), merging fields.
+
+        Sets match_data["content_hash"]. Returns False, without writing, if
+        the stored match already has that hash.
+        """
+        raise NotImplementedError
+
+    def get_match(self, tournament_id, match_id):
+        """Return a single match document or None."""
+        raise NotImplementedError
+
+    def get_all_matches(self, tournament_id):
+        """Return every match document for a tournament."""
+        raise NotImplementedError
+
+    def count_matches(self, tournament_id):
+        """Return how many matches a tournament has."""
+        raise NotImplementedError
+
+    def delete_match(self, tournament_id, match_id):
+        """Delete a match (and its stats). Returns True if something was deleted."""
+        raise NotImplementedError
+
+    def get_match_summaries(self, tournament_id):
+        """Return [{match_id, match_name, cricinfo_url}] for a tournament."""
+        raise NotImplementedError
+
+    def get_match_hashes(self, tournament_id):
+        """Return [(match_id, content_hash)] for a tournament, in get_all_matches order.
+
+        content_hash is None for a match saved before hashes were recorded.
+        """
+        raise NotImplementedError
+
+    def get_matches(self, tournament_id, match_ids):
+        """Return the match documents with these ids (any order)."""
+        raise NotImplementedError
+
+    def save_matches(self, tournament_id, matches):
+        """Upsert whole match documents in one batch (restores, see snapshot.py).
+
+        Each replaces any stored match with its match_id; new ones are
+        stored in list order. Sets each doc's tournament_id and content_hash.
+        """
+        raise NotImplementedError
+
+    # -- Per-player match stats ----------------------------------------------
+
+    def save_player_match_stats(self, tournament_id, stats):
+        """Replace the stored stats of matches: {match_id: stats}.
+
+        stats is calculate_points.match_stats() plus the match's content_hash.
+        """
+        raise NotImplementedError
+
+    def get_player_match_stats(self, tournament_id, match_ids=None):
+        """Return {match_id: stats} for these matches (default: all), players in saved order."""
+        raise NotImplementedError
+
+    # -- Per-match score cache ------------------------------------------------
+
+    def get_match_scores(self, rules_version, content_hashes):
+        """Return {content_hash: scores} for the cached ones of *content_hashes*."""
+        raise NotImplementedError
+
+    def save_match_scores(self, rules_version, scores):
+        """Cache per-match scores ({content_hash: scores}) under *rules_version*."""
+        raise NotImplementedError
+
+    def evict_match_scores(self, rules_versions):
+        """Delete scores cached under any rules version not in *rules_versions*; return how many."""
+        raise NotImplementedError
+
+    # -- Points and standings -----------------------------------------------
+
+    def save_all_player_points(self, tournament_id, player_points_list):
+        """Replace all player points for a tournament."""
+        raise NotImplementedError
+
+    def get_all_player_points(self, tournament_id):
+        """Return every player-points document for a tournament, in saved order."""
+        raise NotImplementedError
+
+    def save_leaderboard(self, tournament_id, leaderboard):
+        """Replace the leaderboard; rows must carry a 1-based "rank"."""
+        raise NotImplementedError
+
+    def get_leaderboard_page(self, tournament_id, after_rank=0, limit=50, max_rank=None,
+                             team=None, fields=None):
+        """Return one page of leaderboard rows, ordered by rank.
+
+        after_rank — cursor: only rows ranked below this one
+        limit      — page size (0 = no limit)
+        max_rank   — only rows ranked at or above this one (top-N)
+        team       — only rows for this team
+        fields     — row fields to return (default: all)
+        """
+        raise NotImplementedError
+
+    def save_team_leaderboard(self, tournament_id, team_leaderboard):
+        """Replace the team leaderboard for a tournament."""
+        raise NotImplementedError
+
+    def get_team_leaderboard(self, tournament_id):
+        """Return the team leaderboard list for a tournament."""
+        raise NotImplementedError
+
+    # -- Standings history ----------------------------------------------------
+
+    def save_standings_history(self, tournament_id, history):
+        """Replace the standings history: {"matches": [...], "teams": [...], "players": [...]}.
+
+        Team and player rows carry a "key" (team name; player_key) and are
+        kept in the given order.
+        """
+        raise NotImplementedError
+
+    def get_standings_history(self, tournament_id, kind, keys=None):
+        """Return {"matches": [...], kind: rows} (kind in HISTORY_KINDS), only *keys* if given."""
+        raise NotImplementedError
+
+    # -- Player careers (see careers.py) ---------------------------------------
+
+    def get_career_parts(self, tournament_id=None, keys=None):
+        """Return the career parts of a tournament and/or of these career keys."""
+        raise NotImplementedError
+
+    def save_career_parts(self, tournament_id, parts, removed_keys):
+        """Upsert a tournament's parts ({key: part}) and delete those of *removed_keys*."""
+        raise NotImplementedError
+
+    def save_player_careers(self, careers, removed_keys):
+        """Upsert career rows (each with a "key") and delete those of *removed_keys*."""
+        raise NotImplementedError
+
+    def get_player_careers(self, limit=50, offset=0):
+        """Return career rows by total points (highest first), *offset* rows in."""
+        raise NotImplementedError
+
+    def get_player_career(self, key):
+        """Return one career row or None."""
+        raise NotImplementedError
+
+    # -- Pre-rendered response bodies -----------------------------------------
+
+    def save_response_bodies(self, tournament_id, version, bodies):
+        """Upsert rendered bodies ({name: bytes}) for a tournament at *version*."""
+        raise NotImplementedError
+
+    def get_response_bodies(self, tournament_id):
+        """Return (version, {name: bytes}) for the latest rendered bodies, or (None, {})."""
+        raise NotImplementedError
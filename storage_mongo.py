@@ -0,0 +1,1116 @@
+"""MongoDB storage backend (the default).
+
+Connection string from MONGODB_URI. MONGODB_URI=mongomock:// swaps in an
+in-memory stand-in (needs the mongomock package) for benchmarks and
+offline runs.
+
+Pool sizing and timeouts come from MONGODB_* env vars (see POOL_OPTIONS);
+unset ones keep the driver defaults. Clients are per process: one created
+before a fork is dropped in the child, never shared.
+
+Collections:
+    tournaments      — one doc per tournament (metadata)
+    rosters          — one doc per player per tournament, keyed by normalised name
+    matches          — one doc per match (keyed by tournament_id + match_id)
+    player_points    — one doc per player per tournament
+    leaderboard      — one doc per player per tournament, indexed by rank
+    team_leaderboard — one doc per tournament
+    response_bodies  — pre-rendered (and pre-compressed) read responses
+    player_match_stats — one doc per match: each player's raw scoring inputs
+    match_scores     — per-match scores, keyed by content_hash + rules_version
+    standings_history — one doc per team / player trajectory (and one for the
+                       match axis) per tournament, indexed by kind + seq / key
+    career_parts     — one doc per player per tournament (see careers.py)
+    player_careers   — one doc per player, indexed by total_points
+
+Rosters used to be a "players" array on the tournament doc, and
+leaderboards one {tournament_id, data} doc; any still stored that way are
+moved to rosters / split into rank rows on connect.
+"""
+
+import asyncio
+import copy
+import os
+import threading
+import time
+
+import certifi
+from pymongo import MongoClient, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from storage import HISTORY_KINDS, Storage, match_content_hash, normalise_name, roster_entries
+
+DB_NAME = os.environ.get("MONGODB_DB_NAME", "wt20")
+
+# env var → MongoClient option (integers)
+POOL_OPTIONS = (
+    ("MONGODB_MAX_POOL_SIZE", "maxPoolSize"),
+    ("MONGODB_MIN_POOL_SIZE", "minPoolSize"),
+    ("MONGODB_MAX_IDLE_TIME_MS", "maxIdleTimeMS"),
+    ("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS"),
+    ("MONGODB_CONNECT_TIMEOUT_MS", "connectTimeoutMS"),
+    ("MONGODB_SOCKET_TIMEOUT_MS", "socketTimeoutMS"),
+    ("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "serverSelectionTimeoutMS"),
+)
+
+
+def _match_upsert(tournament_id, match_data):
+    """(filter, update) that upserts a match only if its content hash changed.
+
+    When the stored match has the same hash the filter misses and the
+    upsert's insert hits the unique (tournament_id, match_id) index:
+    unchanged costs one round trip and no write.
+    """
+    match_id = str(match_data.get("match_id", ""))
+    if not match_id:
+        raise ValueError("match_data must contain a 'match_id' field")
+    match_data["tournament_id"] = tournament_id
+    match_data["content_hash"] = content_hash = match_content_hash(match_data)
+    return ({"tournament_id": tournament_id, "match_id": match_id,
+             "content_hash": {"$ne": content_hash}},
+            {"$set": match_data})
+
+
+def _match_replace_ops(tournament_id, matches):
+    """ReplaceOne upserts storing each match document whole."""
+    ops = []
+    for match_data in matches:
+        match_id = str(match_data.get("match_id", ""))
+        if not match_id:
+            raise ValueError("match_data must contain a 'match_id' field")
+        match_data["tournament_id"] = tournament_id
+        match_data["content_hash"] = match_content_hash(match_data)
+        ops.append(ReplaceOne({"tournament_id": tournament_id, "match_id": match_id},
+                              match_data, upsert=True))
+    return ops
+
+
+def _roster_ops(tournament_id, entries):
+    """Upserts writing roster_entries() *entries* as the whole roster, in order.
+
+    $set rather than a replace, so an entry keeps a player_id it already has.
+    """
+    return [
+        UpdateOne(
+            {"tournament_id": tournament_id, "name_key": key},
+            {"$set": dict(entry, seq=seq)},
+            upsert=True,
+        )
+        for seq, (key, entry) in enumerate(entries.items())
+    ]
+
+
+def _add_player_update(player_name, team, player_id):
+    # A clock-based seq sorts after every seq set_players hands out (0, 1, ...),
+    # so one upsert moves the player to the end without reading the roster.
+    fields = {"player_name": player_name, "team": team, "seq": time.time_ns()}
+    if player_id is not None:
+        fields["player_id"] = player_id
+    return {"$set": fields}
+
+
+def _player_id_ops(tournament_id, player_ids):
+    return [UpdateOne({"tournament_id": tournament_id, "name_key": key},
+                      {"$set": {"player_id": player_id}})
+            for key, player_id in player_ids.items()]
+
+
+_PLAYER_FIELDS = {"_id": 0, "player_name": 1, "team": 1, "player_id": 1}
+
+
+def _player_stats_ops(tournament_id, stats):
+    """ReplaceOne upserts storing each match's stats as one doc."""
+    return [
+        ReplaceOne(
+            {"tournament_id": tournament_id, "match_id": match_id},
+            dict(match, tournament_id=tournament_id, match_id=match_id),
+            upsert=True,
+        )
+        for match_id, match in stats.items()
+    ]
+
+
+def _player_stats_query(tournament_id, match_ids):
+    query = {"tournament_id": tournament_id}
+    if match_ids is not None:
+        query["match_id"] = {"$in": [str(m) for m in match_ids]}
+    return query
+
+
+def _match_score_ops(rules_version, scores):
+    """ReplaceOne upserts caching {content_hash: scores} under *rules_version*."""
+    return [
+        ReplaceOne(
+            {"content_hash": content_hash, "rules_version": rules_version},
+            dict(doc, content_hash=content_hash, rules_version=rules_version),
+            upsert=True,
+        )
+        for content_hash, doc in scores.items()
+    ]
+
+
+def _history_ops(tournament_id, history):
+    """ReplaceOne upserts storing a standings history, one doc per (kind, seq)."""
+    docs = [{"kind": "matches", "seq": 0, "key": "", "matches": history["matches"]}]
+    docs += [dict(row, kind=kind, seq=seq)
+             for kind in HISTORY_KINDS for seq, row in enumerate(history[kind])]
+    return [
+        ReplaceOne(
+            {"tournament_id": tournament_id, "kind": d["kind"], "seq": d["seq"]},
+            dict(d, tournament_id=tournament_id),
+            upsert=True,
+        )
+        for d in docs
+    ]
+
+
+def _history_trim(tournament_id, history):
+    """Filter for the docs past the end of *history* (left by a longer one)."""
+    return {"tournament_id": tournament_id,
+            "$or": [{"kind": kind, "seq": {"$gte": len(history[kind])}} for kind in HISTORY_KINDS]}
+
+
+def _history_query(tournament_id, kind, keys):
+    """Filter for the match axis and the *kind* rows (only *keys*, if given)."""
+    rows = {"kind": kind}
+    if keys is not None:
+        rows["key"] = {"$in": [str(k) for k in keys]}
+    return {"tournament_id": tournament_id, "$or": [{"kind": "matches"}, rows]}
+
+
+def _history_result(docs, kind):
+    """get_standings_history's result from _history_query's docs, in seq order."""
+    history = {"matches": [], kind: []}
+    for d in docs:
+        if d.pop("kind") == "matches":
+            history["matches"] = d["matches"]
+        else:
+            del d["seq"]
+            history[kind].append(d)
+    return history
+
+
+def _career_part_ops(tournament_id, parts):
+    return [
+        ReplaceOne({"tournament_id": tournament_id, "key": key}, part, upsert=True)
+        for key, part in parts.items()
+    ]
+
+
+def _career_ops(careers):
+    return [ReplaceOne({"key": c["key"]}, c, upsert=True) for c in careers]
+
+
+def _career_parts_query(tournament_id, keys):
+    query = {}
+    if tournament_id is not None:
+        query["tournament_id"] = tournament_id
+    if keys is not None:
+        query["key"] = {"$in": list(keys)}
+    return query
+
+
+# Careers by total points, highest first (ties by key, as in SQLite)
+_CAREER_ORDER = [("total_points", -1), ("key", 1)]
+
+# Collections holding a tournament's records (besides its tournaments doc)
+_TOURNAMENT_COLLECTIONS = ("rosters", "matches", "player_points", "leaderboard", "team_leaderboard",
+                           "response_bodies", "player_match_stats", "standings_history",
+                           "career_parts")
+
+
+def _tournament_doc(tournament_id, name, series_url):
+    return {"tournament_id": tournament_id, "name": name, "series_url": series_url or ""}
+
+
+# Roster size per tournament, for list_tournaments
+_ROSTER_COUNTS = [{"$group": {"_id": "$tournament_id", "n": {"$sum": 1}}}]
+_TOURNAMENT_LIST_FIELDS = {"_id": 0, "tournament_id": 1, "name": 1, "series_url": 1}
+
+
+def _tournament_summary(doc, counts):
+    """A list_tournaments row from a tournament doc and the _ROSTER_COUNTS counts."""
+    return {
+        "tournament_id": doc["tournament_id"],
+        "name": doc.get("name", doc["tournament_id"]),
+        "player_count": counts.get(doc["tournament_id"], 0),
+        "series_url": doc.get("series_url", ""),
+    }
+
+
+def _scoring_rules_update(rules):
+    return {"$unset": {"scoring_rules": ""}} if rules is None else {"$set": {"scoring_rules": rules}}
+
+
+def _roster_key(tournament_id, player_name):
+    return {"tournament_id": tournament_id, "name_key": normalise_name(player_name)}
+
+
+def _roster_trim(tournament_id, entries):
+    """Filter for the roster docs not among roster_entries() *entries*."""
+    return {"tournament_id": tournament_id, "name_key": {"$nin": list(entries)}}
+
+
+def _match_key(tournament_id, match_id):
+    return {"tournament_id": tournament_id, "match_id": str(match_id)}
+
+
+def _matches_query(tournament_id, match_ids):
+    return {"tournament_id": tournament_id, "match_id": {"$in": [str(m) for m in match_ids]}}
+
+
+_MATCH_SUMMARY_FIELDS = {"_id": 0, "match_id": 1, "match_name": 1, "cricinfo_url": 1}
+_MATCH_HASH_FIELDS = {"_id": 0, "match_id": 1, "content_hash": 1}
+
+
+def _match_summary(doc):
+    return {
+        "match_id": doc.get("match_id", ""),
+        "match_name": doc.get("match_name", ""),
+        "cricinfo_url": doc.get("cricinfo_url", ""),
+    }
+
+
+def _match_scores_query(rules_version, content_hashes):
+    return {"rules_version": rules_version, "content_hash": {"$in": list(content_hashes)}}
+
+
+def _player_points_docs(tournament_id, player_points_list):
+    docs = copy.deepcopy(player_points_list)
+    for d in docs:
+        d["tournament_id"] = tournament_id
+    return docs
+
+
+def _leaderboard_ops(tournament_id, leaderboard):
+    """ReplaceOne upserts storing each leaderboard row by rank.
+
+    Upserting rather than delete + insert: concurrent recalculations can't
+    trip the unique (tournament_id, rank) index and readers never see an
+    empty leaderboard mid-write.
+    """
+    return [
+        ReplaceOne(
+            {"tournament_id": tournament_id, "rank": row["rank"]},
+            dict(row, tournament_id=tournament_id),
+            upsert=True,
+        )
+        for row in leaderboard
+    ]
+
+
+def _leaderboard_trim(tournament_id, leaderboard):
+    """Filter for the rows past the end of *leaderboard* (and any unranked leftovers)."""
+    return {"tournament_id": tournament_id,
+            "$or": [{"rank": {"$gt": len(leaderboard)}}, {"rank": {"$exists": False}}]}
+
+
+def _leaderboard_page_query(tournament_id, after_rank, max_rank, team, fields):
+    """(filter, projection) for get_leaderboard_page; sort by rank."""
+    rank_filter = {"$gt": after_rank}
+    if max_rank is not None:
+        rank_filter["$lte"] = max_rank
+    query = {"tournament_id": tournament_id, "rank": rank_filter}
+    if team:
+        query["team"] = team
+    if fields:
+        projection = {f: 1 for f in fields}
+        projection["_id"] = 0
+    else:
+        projection = {"_id": 0, "tournament_id": 0}
+    return query, projection
+
+
+def _career_parts_trim(tournament_id, removed_keys):
+    return {"tournament_id": tournament_id, "key": {"$in": list(removed_keys)}}
+
+
+def _response_body_ops(tournament_id, version, bodies):
+    return [
+        ReplaceOne(
+            {"tournament_id": tournament_id, "name": name},
+            {"tournament_id": tournament_id, "name": name, "version": version, "body": body},
+            upsert=True,
+        )
+        for name, body in bodies.items()
+    ]
+
+
+def _response_bodies_result(docs):
+    """get_response_bodies' (version, {name: body}) from every stored body doc."""
+    if not docs:
+        return None, {}
+    version = max(d.get("version", 0) for d in docs)
+    return version, {d["name"]: bytes(d["body"]) for d in docs if d.get("version") == version}
+
+
+def client_options():
+    """Keyword arguments for MongoClient/AsyncMongoClient from the environment."""
+    options = {"tlsCAFile": certifi.where()}
+    for env, option in POOL_OPTIONS:
+        value = os.environ.get(env, "").strip()
+        if value:
+            options[option] = int(value)
+    return options
+
+
+def _mongomock_client():
+    """An in-memory mongomock client, patched for the pymongo installed here.
+
+    mongomock's bulk builder predates pymongo passing sort= to
+    ReplaceOne/UpdateOne in bulk_write, which would fail the first bulk
+    write; the (always unset) argument is dropped.
+    """
+    import mongomock
+    from mongomock.collection import BulkOperationBuilder
+    for name in ("add_replace", "add_update"):
+        original = getattr(BulkOperationBuilder, name)
+        if getattr(original, "_drops_sort", False):
+            continue
+
+        def _compat(self, *args, _original=original, sort=None, **kwargs):
+            return _original(self, *args, **kwargs)
+        _compat._drops_sort = True
+        setattr(BulkOperationBuilder, name, _compat)
+    return mongomock.MongoClient()
+
+
+# ---------------------------------------------------------------------------
+# Indexes and migrations, run on connect
+# ---------------------------------------------------------------------------
+
+# (collection, keys, create_index options) for what the queries above rely on
+_INDEXES = (
+    ("leaderboard", [("tournament_id", 1), ("rank", 1)], {"unique": True}),
+    ("leaderboard", [("tournament_id", 1), ("team", 1), ("rank", 1)], {}),
+    ("rosters", [("tournament_id", 1), ("name_key", 1)], {"unique": True}),
+    ("rosters", [("tournament_id", 1), ("seq", 1)], {}),
+    ("matches", [("tournament_id", 1), ("match_id", 1)], {"unique": True}),
+    ("match_scores", [("content_hash", 1), ("rules_version", 1)], {"unique": True}),
+    ("player_match_stats", [("tournament_id", 1), ("match_id", 1)], {"unique": True}),
+    ("standings_history", [("tournament_id", 1), ("kind", 1), ("seq", 1)], {"unique": True}),
+    ("standings_history", [("tournament_id", 1), ("kind", 1), ("key", 1)], {}),
+    ("career_parts", [("tournament_id", 1), ("key", 1)], {"unique": True}),
+    ("career_parts", [("key", 1)], {}),
+    ("player_careers", [("key", 1)], {"unique": True}),
+    ("player_careers", _CAREER_ORDER, {}),
+)
+
+# (filter, projection) finding records still stored in an older layout
+_EMBEDDED_ROSTERS = ({"players": {"$exists": True}}, {"_id": 0, "tournament_id": 1, "players": 1})
+_LEADERBOARD_DOCS = ({"rank": {"$exists": False}}, {"_id": 1, "tournament_id": 1, "data": 1})
+
+
+def _legacy_leaderboard_ops(doc):
+    """Upserts splitting a {tournament_id, data} leaderboard doc into rank rows."""
+    rows = [dict(row, rank=rank) for rank, row in enumerate(doc.get("data") or [], 1)]
+    return _leaderboard_ops(doc["tournament_id"], rows)
+
+
+def _ensure_indexes(db):
+    """Create the indexes (no-op if they exist), then migrate old-layout records."""
+    for collection, keys, options in _INDEXES:
+        db[collection].create_index(keys, **options)
+    for doc in db.tournaments.find(*_EMBEDDED_ROSTERS):
+        tid = doc["tournament_id"]
+        ops = _roster_ops(tid, roster_entries(doc.get("players")))
+        if ops:
+            db.rosters.bulk_write(ops, ordered=False)
+        db.tournaments.update_one({"tournament_id": tid}, {"$unset": {"players": ""}})
+        print("Moved {} roster entries for '{}' to the rosters collection".format(len(ops), tid))
+    for doc in db.leaderboard.find(*_LEADERBOARD_DOCS):
+        ops = _legacy_leaderboard_ops(doc)
+        if ops:
+            db.leaderboard.bulk_write(ops, ordered=False)
+        db.leaderboard.delete_one({"_id": doc["_id"]})
+        print("Split the leaderboard of '{}' into {} rank rows".format(doc["tournament_id"], len(ops)))
+
+
+async def _ensure_indexes_async(db):
+    """_ensure_indexes on the asyncio client."""
+    for collection, keys, options in _INDEXES:
+        await db[collection].create_index(keys, **options)
+    async for doc in db.tournaments.find(*_EMBEDDED_ROSTERS):
+        tid = doc["tournament_id"]
+        ops = _roster_ops(tid, roster_entries(doc.get("players")))
+        if ops:
+            await db.rosters.bulk_write(ops, ordered=False)
+        await db.tournaments.update_one({"tournament_id": tid}, {"$unset": {"players": ""}})
+        print("Moved {} roster entries for '{}' to the rosters collection".format(len(ops), tid))
+    async for doc in db.leaderboard.find(*_LEADERBOARD_DOCS):
+        ops = _legacy_leaderboard_ops(doc)
+        if ops:
+            await db.leaderboard.bulk_write(ops, ordered=False)
+        await db.leaderboard.delete_one({"_id": doc["_id"]})
+        print("Split the leaderboard of '{}' into {} rank rows".format(doc["tournament_id"], len(ops)))
+
+
+class MongoStorage(Storage):
+    name = "mongo"
+
+    def __init__(self, uri):
+        if not uri:
+            raise RuntimeError(
+                "MONGODB_URI environment variable is not set. "
+                "Set it to your MongoDB Atlas connection string."
+            )
+        self.uri = uri
+        self._client = None
+        self._db = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def db(self):
+        """The MongoDB database handle, connecting on first use in this process."""
+        if self._db is None or self._pid != os.getpid():
+            with self._lock:  # one client per process, however many threads ask at once
+                if self._db is None or self._pid != os.getpid():
+                    if self.uri.startswith("mongomock://"):
+                        if self._db is not None:  # in-memory: the child keeps the parent's data
+                            return self._db
+                        self._client = _mongomock_client()
+                    else:
+                        self._client = MongoClient(self.uri, **client_options())
+                    db = self._client[DB_NAME]
+                    _ensure_indexes(db)
+                    self._db, self._pid = db, os.getpid()
+        return self._db
+
+    def warm_up(self):
+        self.db.command("ping")
+
+    def after_fork(self):
+        # The parent's sockets and monitor threads aren't usable here, and
+        # closing them would disturb the parent: just let go of them.
+        self._lock = threading.Lock()
+        if not self.uri.startswith("mongomock://"):
+            self._client = self._db = None
+
+    def close(self):
+        if self._client is not None and self._pid == os.getpid():
+            self._client.close()
+        self._client = self._db = None
+
+    # -----------------------------------------------------------------------
+    # Tournaments
+    # -----------------------------------------------------------------------
+
+    def create_tournament(self, tournament_id, name, players=None, series_url=""):
+        db = self.db
+        if db.tournaments.find_one({"tournament_id": tournament_id}):
+            raise ValueError("Tournament '{}' already exists".format(tournament_id))
+        doc = _tournament_doc(tournament_id, name, series_url)
+        db.tournaments.insert_one(doc)
+        doc.pop("_id", None)
+        self.set_players(tournament_id, players)
+        return dict(doc, players=players or [])
+
+    def get_tournament(self, tournament_id):
+        return self.db.tournaments.find_one({"tournament_id": tournament_id}, {"_id": 0})
+
+    def list_tournaments(self):
+        db = self.db
+        counts = {c["_id"]: c["n"] for c in db.rosters.aggregate(_ROSTER_COUNTS)}
+        return [_tournament_summary(doc, counts)
+                for doc in db.tournaments.find({}, _TOURNAMENT_LIST_FIELDS)]
+
+    def update_tournament_series_url(self, tournament_id, series_url):
+        self.db.tournaments.update_one(
+            {"tournament_id": tournament_id},
+            {"$set": {"series_url": series_url}},
+        )
+
+    def update_tournament_name(self, tournament_id, name):
+        self.db.tournaments.update_one(
+            {"tournament_id": tournament_id},
+            {"$set": {"name": name}},
+        )
+
+    def bump_data_version(self, tournament_id):
+        doc = self.db.tournaments.find_one_and_update(
+            {"tournament_id": tournament_id},
+            {"$inc": {"data_version": 1}},
+            projection={"data_version": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc.get("data_version", 0) if doc else 0
+
+    def get_data_version(self, tournament_id):
+        doc = self.db.tournaments.find_one({"tournament_id": tournament_id},
+                                           {"_id": 0, "data_version": 1})
+        return None if doc is None else doc.get("data_version", 0)
+
+    def set_scoring_rules(self, tournament_id, rules):
+        self.db.tournaments.update_one({"tournament_id": tournament_id}, _scoring_rules_update(rules))
+
+    def list_scoring_rules(self):
+        docs = self.db.tournaments.find({"scoring_rules": {"$exists": True}},
+                                        {"_id": 0, "scoring_rules": 1})
+        return [d["scoring_rules"] for d in docs]
+
+    def delete_tournament(self, tournament_id):
+        db = self.db
+        if not db.tournaments.find_one({"tournament_id": tournament_id}):
+            return False
+        db.tournaments.delete_one({"tournament_id": tournament_id})
+        for coll in _TOURNAMENT_COLLECTIONS:
+            db[coll].delete_many({"tournament_id": tournament_id})
+        return True
+
+    def rename_tournament(self, tournament_id, new_id):
+        db = self.db
+        if db.tournaments.find_one({"tournament_id": new_id}):
+            raise ValueError("Tournament '{}' already exists".format(new_id))
+        if not db.tournaments.update_one({"tournament_id": tournament_id},
+                                         {"$set": {"tournament_id": new_id}}).matched_count:
+            return False
+        for coll in _TOURNAMENT_COLLECTIONS:
+            db[coll].update_many({"tournament_id": tournament_id}, {"$set": {"tournament_id": new_id}})
+        return True
+
+    # -----------------------------------------------------------------------
+    # Roster
+    # -----------------------------------------------------------------------
+
+    def get_players(self, tournament_id):
+        return list(self.db.rosters.find({"tournament_id": tournament_id}, _PLAYER_FIELDS)
+                    .sort("seq", 1))
+
+    def count_players(self, tournament_id):
+        return self.db.rosters.count_documents({"tournament_id": tournament_id})
+
+    def set_players(self, tournament_id, players):
+        db = self.db
+        # Upsert, then drop whoever isn't on the new roster: readers never
+        # see an empty roster mid-write.
+        entries = roster_entries(players)
+        if entries:
+            db.rosters.bulk_write(_roster_ops(tournament_id, entries), ordered=False)
+        db.rosters.delete_many(_roster_trim(tournament_id, entries))
+
+    def add_player(self, tournament_id, player_name, team, player_id=None):
+        self.db.rosters.update_one(_roster_key(tournament_id, player_name),
+                                   _add_player_update(player_name, team, player_id), upsert=True)
+
+    def set_player_ids(self, tournament_id, player_ids):
+        if player_ids:
+            self.db.rosters.bulk_write(_player_id_ops(tournament_id, player_ids), ordered=False)
+
+    def remove_player(self, tournament_id, player_name):
+        return self.db.rosters.delete_one(_roster_key(tournament_id, player_name)).deleted_count > 0
+
+    # -----------------------------------------------------------------------
+    # Matches
+    # -----------------------------------------------------------------------
+
+    def save_match(self, tournament_id, match_data):
+        query, update = _match_upsert(tournament_id, match_data)
+        try:
+            self.db.matches.update_one(query, update, upsert=True)
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def get_match(self, tournament_id, match_id):
+        return self.db.matches.find_one(_match_key(tournament_id, match_id), {"_id": 0})
+
+    def get_all_matches(self, tournament_id):
+        return list(self.db.matches.find({"tournament_id": tournament_id}, {"_id": 0}))
+
+    def count_matches(self, tournament_id):
+        return self.db.matches.count_documents({"tournament_id": tournament_id})
+
+    def delete_match(self, tournament_id, match_id):
+        query = _match_key(tournament_id, match_id)
+        result = self.db.matches.delete_one(query)
+        self.db.player_match_stats.delete_many(query)
+        return result.deleted_count > 0
+
+    def get_match_summaries(self, tournament_id):
+        docs = self.db.matches.find({"tournament_id": tournament_id}, _MATCH_SUMMARY_FIELDS)
+        return [_match_summary(d) for d in docs]
+
+    def get_match_hashes(self, tournament_id):
+        docs = self.db.matches.find({"tournament_id": tournament_id}, _MATCH_HASH_FIELDS)
+        return [(d.get("match_id", ""), d.get("content_hash")) for d in docs]
+
+    def get_matches(self, tournament_id, match_ids):
+        return list(self.db.matches.find(_matches_query(tournament_id, match_ids), {"_id": 0}))
+
+    def save_matches(self, tournament_id, matches):
+        ops = _match_replace_ops(tournament_id, matches)
+        if ops:
+            self.db.matches.bulk_write(ops)
+
+    # -----------------------------------------------------------------------
+    # Per-player match stats
+    # -----------------------------------------------------------------------
+
+    def save_player_match_stats(self, tournament_id, stats):
+        if stats:
+            self.db.player_match_stats.bulk_write(_player_stats_ops(tournament_id, stats),
+                                                  ordered=False)
+
+    def get_player_match_stats(self, tournament_id, match_ids=None):
+        docs = self.db.player_match_stats.find(_player_stats_query(tournament_id, match_ids),
+                                               {"_id": 0, "tournament_id": 0})
+        return {d["match_id"]: d for d in docs}
+
+    # -----------------------------------------------------------------------
+    # Per-match score cache
+    # -----------------------------------------------------------------------
+
+    def get_match_scores(self, rules_version, content_hashes):
+        docs = self.db.match_scores.find(_match_scores_query(rules_version, content_hashes),
+                                         {"_id": 0, "rules_version": 0})
+        return {d.pop("content_hash"): d for d in docs}
+
+    def save_match_scores(self, rules_version, scores):
+        ops = _match_score_ops(rules_version, scores)
+        if ops:
+            self.db.match_scores.bulk_write(ops, ordered=False)
+
+    def evict_match_scores(self, rules_versions):
+        result = self.db.match_scores.delete_many({"rules_version": {"$nin": list(rules_versions)}})
+        return result.deleted_count
+
+    # -----------------------------------------------------------------------
+    # Points and standings
+    # -----------------------------------------------------------------------
+
+    def save_all_player_points(self, tournament_id, player_points_list):
+        db = self.db
+        db.player_points.delete_many({"tournament_id": tournament_id})
+        if player_points_list:
+            db.player_points.insert_many(_player_points_docs(tournament_id, player_points_list))
+
+    def get_all_player_points(self, tournament_id):
+        return list(self.db.player_points.find({"tournament_id": tournament_id},
+                                               {"_id": 0, "tournament_id": 0}))
+
+    def save_leaderboard(self, tournament_id, leaderboard):
+        db = self.db
+        if leaderboard:
+            db.leaderboard.bulk_write(_leaderboard_ops(tournament_id, leaderboard), ordered=False)
+        db.leaderboard.delete_many(_leaderboard_trim(tournament_id, leaderboard))
+
+    def get_leaderboard_page(self, tournament_id, after_rank=0, limit=50, max_rank=None,
+                             team=None, fields=None):
+        query, projection = _leaderboard_page_query(tournament_id, after_rank, max_rank, team, fields)
+        cursor = self.db.leaderboard.find(query, projection).sort("rank", 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+
+    def save_team_leaderboard(self, tournament_id, team_leaderboard):
+        db = self.db
+        db.team_leaderboard.delete_many({"tournament_id": tournament_id})
+        if team_leaderboard:
+            db.team_leaderboard.insert_one({"tournament_id": tournament_id, "data": team_leaderboard})
+
+    def get_team_leaderboard(self, tournament_id):
+        doc = self.db.team_leaderboard.find_one({"tournament_id": tournament_id}, {"_id": 0})
+        return doc.get("data", []) if doc else []
+
+    # -----------------------------------------------------------------------
+    # Standings history
+    # -----------------------------------------------------------------------
+
+    def save_standings_history(self, tournament_id, history):
+        # Upsert by position, like save_leaderboard, then drop what's left over
+        db = self.db
+        db.standings_history.bulk_write(_history_ops(tournament_id, history), ordered=False)
+        db.standings_history.delete_many(_history_trim(tournament_id, history))
+
+    def get_standings_history(self, tournament_id, kind, keys=None):
+        docs = self.db.standings_history.find(_history_query(tournament_id, kind, keys),
+                                              {"_id": 0, "tournament_id": 0}).sort("seq", 1)
+        return _history_result(docs, kind)
+
+    # -----------------------------------------------------------------------
+    # Player careers
+    # -----------------------------------------------------------------------
+
+    def get_career_parts(self, tournament_id=None, keys=None):
+        return list(self.db.career_parts.find(_career_parts_query(tournament_id, keys), {"_id": 0}))
+
+    def save_career_parts(self, tournament_id, parts, removed_keys):
+        db = self.db
+        if removed_keys:
+            db.career_parts.delete_many(_career_parts_trim(tournament_id, removed_keys))
+        if parts:
+            db.career_parts.bulk_write(_career_part_ops(tournament_id, parts), ordered=False)
+
+    def save_player_careers(self, careers, removed_keys):
+        db = self.db
+        if removed_keys:
+            db.player_careers.delete_many({"key": {"$in": list(removed_keys)}})
+        if careers:
+            db.player_careers.bulk_write(_career_ops(careers), ordered=False)
+
+    def get_player_careers(self, limit=50, offset=0):
+        cursor = self.db.player_careers.find({}, {"_id": 0}).sort(_CAREER_ORDER).skip(offset)
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+
+    def get_player_career(self, key):
+        return self.db.player_careers.find_one({"key": key}, {"_id": 0})
+
+    # -----------------------------------------------------------------------
+    # Pre-rendered response bodies
+    # -----------------------------------------------------------------------
+
+    def save_response_bodies(self, tournament_id, version, bodies):
+        ops = _response_body_ops(tournament_id, version, bodies)
+        if ops:
+            self.db.response_bodies.bulk_write(ops, ordered=False)
+
+    def get_response_bodies(self, tournament_id):
+        return _response_bodies_result(
+            list(self.db.response_bodies.find({"tournament_id": tournament_id}, {"_id": 0})))
+
+
+class AsyncMongoStorage:
+    """MongoStorage on pymongo's asyncio client: same methods, as coroutines.
+
+    Used by db_async.py. Bind one instance to one event loop. Queries,
+    updates and indexes come from the same module-level helpers as
+    MongoStorage's, so the two stay in step.
+    """
+
+    name = "mongo"
+
+    def __init__(self, uri):
+        if not uri:
+            raise RuntimeError("MONGODB_URI environment variable is not set.")
+        self.uri = uri
+        self._client = None
+        self._db = None
+        self._connecting = asyncio.Lock()
+
+    async def get_db(self):
+        """The async database handle, connecting (and migrating) on first use."""
+        if self._db is None:
+            async with self._connecting:  # concurrent first calls share one client
+                if self._db is None:
+                    from pymongo import AsyncMongoClient
+                    self._client = AsyncMongoClient(self.uri, **client_options())
+                    db = self._client[DB_NAME]
+                    await _ensure_indexes_async(db)
+                    self._db = db
+        return self._db
+
+    # -----------------------------------------------------------------------
+    # Tournaments
+    # -----------------------------------------------------------------------
+
+    async def create_tournament(self, tournament_id, name, players=None, series_url=""):
+        db = await self.get_db()
+        if await db.tournaments.find_one({"tournament_id": tournament_id}):
+            raise ValueError("Tournament '{}' already exists".format(tournament_id))
+        doc = _tournament_doc(tournament_id, name, series_url)
+        await db.tournaments.insert_one(doc)
+        doc.pop("_id", None)
+        await self.set_players(tournament_id, players)
+        return dict(doc, players=players or [])
+
+    async def get_tournament(self, tournament_id):
+        db = await self.get_db()
+        return await db.tournaments.find_one({"tournament_id": tournament_id}, {"_id": 0})
+
+    async def list_tournaments(self):
+        db = await self.get_db()
+        counts = {c["_id"]: c["n"] async for c in await db.rosters.aggregate(_ROSTER_COUNTS)}
+        return [_tournament_summary(doc, counts)
+                async for doc in db.tournaments.find({}, _TOURNAMENT_LIST_FIELDS)]
+
+    async def update_tournament_series_url(self, tournament_id, series_url):
+        db = await self.get_db()
+        await db.tournaments.update_one({"tournament_id": tournament_id},
+                                        {"$set": {"series_url": series_url}})
+
+    async def update_tournament_name(self, tournament_id, name):
+        db = await self.get_db()
+        await db.tournaments.update_one({"tournament_id": tournament_id},
+                                        {"$set": {"name": name}})
+
+    async def bump_data_version(self, tournament_id):
+        db = await self.get_db()
+        doc = await db.tournaments.find_one_and_update(
+            {"tournament_id": tournament_id},
+            {"$inc": {"data_version": 1}},
+            projection={"data_version": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc.get("data_version", 0) if doc else 0
+
+    async def get_data_version(self, tournament_id):
+        db = await self.get_db()
+        doc = await db.tournaments.find_one({"tournament_id": tournament_id},
+                                            {"_id": 0, "data_version": 1})
+        return None if doc is None else doc.get("data_version", 0)
+
+    async def set_scoring_rules(self, tournament_id, rules):
+        db = await self.get_db()
+        await db.tournaments.update_one({"tournament_id": tournament_id}, _scoring_rules_update(rules))
+
+    async def list_scoring_rules(self):
+        db = await self.get_db()
+        cursor = db.tournaments.find({"scoring_rules": {"$exists": True}},
+                                     {"_id": 0, "scoring_rules": 1})
+        return [d["scoring_rules"] async for d in cursor]
+
+    async def delete_tournament(self, tournament_id):
+        db = await self.get_db()
+        if not await db.tournaments.find_one({"tournament_id": tournament_id}):
+            return False
+        await db.tournaments.delete_one({"tournament_id": tournament_id})
+        for coll in _TOURNAMENT_COLLECTIONS:
+            await db[coll].delete_many({"tournament_id": tournament_id})
+        return True
+
+    async def rename_tournament(self, tournament_id, new_id):
+        db = await self.get_db()
+        if await db.tournaments.find_one({"tournament_id": new_id}):
+            raise ValueError("Tournament '{}' already exists".format(new_id))
+        result = await db.tournaments.update_one({"tournament_id": tournament_id},
+                                                 {"$set": {"tournament_id": new_id}})
+        if not result.matched_count:
+            return False
+        for coll in _TOURNAMENT_COLLECTIONS:
+            await db[coll].update_many({"tournament_id": tournament_id},
+                                       {"$set": {"tournament_id": new_id}})
+        return True
+
+    # -----------------------------------------------------------------------
+    # Roster
+    # -----------------------------------------------------------------------
+
+    async def get_players(self, tournament_id):
+        db = await self.get_db()
+        return await db.rosters.find({"tournament_id": tournament_id},
+                                     _PLAYER_FIELDS).sort("seq", 1).to_list()
+
+    async def count_players(self, tournament_id):
+        db = await self.get_db()
+        return await db.rosters.count_documents({"tournament_id": tournament_id})
+
+    async def set_players(self, tournament_id, players):
+        db = await self.get_db()
+        entries = roster_entries(players)
+        if entries:
+            await db.rosters.bulk_write(_roster_ops(tournament_id, entries), ordered=False)
+        await db.rosters.delete_many(_roster_trim(tournament_id, entries))
+
+    async def add_player(self, tournament_id, player_name, team, player_id=None):
+        db = await self.get_db()
+        await db.rosters.update_one(_roster_key(tournament_id, player_name),
+                                    _add_player_update(player_name, team, player_id), upsert=True)
+
+    async def set_player_ids(self, tournament_id, player_ids):
+        if player_ids:
+            db = await self.get_db()
+            await db.rosters.bulk_write(_player_id_ops(tournament_id, player_ids), ordered=False)
+
+    async def remove_player(self, tournament_id, player_name):
+        db = await self.get_db()
+        result = await db.rosters.delete_one(_roster_key(tournament_id, player_name))
+        return result.deleted_count > 0
+
+    # -----------------------------------------------------------------------
+    # Matches
+    # -----------------------------------------------------------------------
+
+    async def save_match(self, tournament_id, match_data):
+        query, update = _match_upsert(tournament_id, match_data)
+        db = await self.get_db()
+        try:
+            await db.matches.update_one(query, update, upsert=True)
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def get_match(self, tournament_id, match_id):
+        db = await self.get_db()
+        return await db.matches.find_one(_match_key(tournament_id, match_id), {"_id": 0})
+
+    async def get_all_matches(self, tournament_id):
+        db = await self.get_db()
+        return await db.matches.find({"tournament_id": tournament_id}, {"_id": 0}).to_list()
+
+    async def count_matches(self, tournament_id):
+        db = await self.get_db()
+        return await db.matches.count_documents({"tournament_id": tournament_id})
+
+    async def delete_match(self, tournament_id, match_id):
+        db = await self.get_db()
+        query = _match_key(tournament_id, match_id)
+        result = await db.matches.delete_one(query)
+        await db.player_match_stats.delete_many(query)
+        return result.deleted_count > 0
+
+    async def get_match_summaries(self, tournament_id):
+        db = await self.get_db()
+        cursor = db.matches.find({"tournament_id": tournament_id}, _MATCH_SUMMARY_FIELDS)
+        return [_match_summary(d) async for d in cursor]
+
+    async def get_match_hashes(self, tournament_id):
+        db = await self.get_db()
+        cursor = db.matches.find({"tournament_id": tournament_id}, _MATCH_HASH_FIELDS)
+        return [(d.get("match_id", ""), d.get("content_hash")) async for d in cursor]
+
+    async def get_matches(self, tournament_id, match_ids):
+        db = await self.get_db()
+        return await db.matches.find(_matches_query(tournament_id, match_ids), {"_id": 0}).to_list()
+
+    async def save_matches(self, tournament_id, matches):
+        ops = _match_replace_ops(tournament_id, matches)
+        if ops:
+            db = await self.get_db()
+            await db.matches.bulk_write(ops)
+
+    # -----------------------------------------------------------------------
+    # Per-player match stats
+    # -----------------------------------------------------------------------
+
+    async def save_player_match_stats(self, tournament_id, stats):
+        if stats:
+            db = await self.get_db()
+            await db.player_match_stats.bulk_write(_player_stats_ops(tournament_id, stats),
+                                                   ordered=False)
+
+    async def get_player_match_stats(self, tournament_id, match_ids=None):
+        db = await self.get_db()
+        cursor = db.player_match_stats.find(_player_stats_query(tournament_id, match_ids),
+                                            {"_id": 0, "tournament_id": 0})
+        return {d["match_id"]: d async for d in cursor}
+
+    # -----------------------------------------------------------------------
+    # Per-match score cache
+    # -----------------------------------------------------------------------
+
+    async def get_match_scores(self, rules_version, content_hashes):
+        db = await self.get_db()
+        cursor = db.match_scores.find(_match_scores_query(rules_version, content_hashes),
+                                      {"_id": 0, "rules_version": 0})
+        return {d.pop("content_hash"): d async for d in cursor}
+
+    async def save_match_scores(self, rules_version, scores):
+        ops = _match_score_ops(rules_version, scores)
+        if ops:
+            db = await self.get_db()
+            await db.match_scores.bulk_write(ops, ordered=False)
+
+    async def evict_match_scores(self, rules_versions):
+        db = await self.get_db()
+        result = await db.match_scores.delete_many({"rules_version": {"$nin": list(rules_versions)}})
+        return result.deleted_count
+
+    # -----------------------------------------------------------------------
+    # Points and standings
+    # -----------------------------------------------------------------------
+
+    async def save_all_player_points(self, tournament_id, player_points_list):
+        db = await self.get_db()
+        await db.player_points.delete_many({"tournament_id": tournament_id})
+        if player_points_list:
+            await db.player_points.insert_many(_player_points_docs(tournament_id, player_points_list))
+
+    async def get_all_player_points(self, tournament_id):
+        db = await self.get_db()
+        return await db.player_points.find({"tournament_id": tournament_id},
+                                           {"_id": 0, "tournament_id": 0}).to_list()
+
+    async def save_leaderboard(self, tournament_id, leaderboard):
+        db = await self.get_db()
+        if leaderboard:
+            await db.leaderboard.bulk_write(_leaderboard_ops(tournament_id, leaderboard),
+                                            ordered=False)
+        await db.leaderboard.delete_many(_leaderboard_trim(tournament_id, leaderboard))
+
+    async def get_leaderboard_page(self, tournament_id, after_rank=0, limit=50, max_rank=None,
+                                   team=None, fields=None):
+        query, projection = _leaderboard_page_query(tournament_id, after_rank, max_rank, team, fields)
+        db = await self.get_db()
+        cursor = db.leaderboard.find(query, projection).sort("rank", 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list()
+
+    async def save_team_leaderboard(self, tournament_id, team_leaderboard):
+        db = await self.get_db()
+        await db.team_leaderboard.delete_many({"tournament_id": tournament_id})
+        if team_leaderboard:
+            await db.team_leaderboard.insert_one({"tournament_id": tournament_id,
+                                                  "data": team_leaderboard})
+
+    async def get_team_leaderboard(self, tournament_id):
+        db = await self.get_db()
+        doc = await db.team_leaderboard.find_one({"tournament_id": tournament_id}, {"_id": 0})
+        return doc.get("data", []) if doc else []
+
+    # -----------------------------------------------------------------------
+    # Standings history
+    # -----------------------------------------------------------------------
+
+    async def save_standings_history(self, tournament_id, history):
+        db = await self.get_db()
+        await db.standings_history.bulk_write(_history_ops(tournament_id, history), ordered=False)
+        await db.standings_history.delete_many(_history_trim(tournament_id, history))
+
+    async def get_standings_history(self, tournament_id, kind, keys=None):
+        db = await self.get_db()
+        docs = await db.standings_history.find(_history_query(tournament_id, kind, keys),
+                                               {"_id": 0, "tournament_id": 0}).sort("seq", 1).to_list()
+        return _history_result(docs, kind)
+
+    # -----------------------------------------------------------------------
+    # Player careers
+    # -----------------------------------------------------------------------
+
+    async def get_career_parts(self, tournament_id=None, keys=None):
+        db = await self.get_db()
+        return await db.career_parts.find(_career_parts_query(tournament_id, keys),
+                                          {"_id": 0}).to_list()
+
+    async def save_career_parts(self, tournament_id, parts, removed_keys):
+        db = await self.get_db()
+        if removed_keys:
+            await db.career_parts.delete_many(_career_parts_trim(tournament_id, removed_keys))
+        if parts:
+            await db.career_parts.bulk_write(_career_part_ops(tournament_id, parts), ordered=False)
+
+    async def save_player_careers(self, careers, removed_keys):
+        db = await self.get_db()
+        if removed_keys:
+            await db.player_careers.delete_many({"key": {"$in": list(removed_keys)}})
+        if careers:
+            await db.player_careers.bulk_write(_career_ops(careers), ordered=False)
+
+    async def get_player_careers(self, limit=50, offset=0):
+        db = await self.get_db()
+        cursor = db.player_careers.find({}, {"_id": 0}).sort(_CAREER_ORDER).skip(offset)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list()
+
+    async def get_player_career(self, key):
+        db = await self.get_db()
+        return await db.player_careers.find_one({"key": key}, {"_id": 0})
+
+    # -----------------------------------------------------------------------
+    # Pre-rendered response bodies
+    # -----------------------------------------------------------------------
+
+    async def save_response_bodies(self, tournament_id, version, bodies):
+        ops = _response_body_ops(tournament_id, version, bodies)
+        if ops:
+            db = await self.get_db()
+            await db.response_bodies.bulk_write(ops, ordered=False)
+
+    async def get_response_bodies(self, tournament_id):
+        db = await self.get_db()
+        return _response_bodies_result(
+            await db.response_bodies.find({"tournament_id": tournament_id}, {"_id": 0}).to_list())
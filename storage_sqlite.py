@@ -0,0 +1,727 @@
+"""Embedded SQLite storage backend (STORAGE_BACKEND=sqlite or memory).
+
+Documents are stored as JSON next to the columns they're looked up by, with
+an index behind every query db.py makes, so reads are local and
+sub-millisecond. A file database runs in WAL mode, so gunicorn workers can
+share it: readers don't block the (single) writer. ":memory:" gives a
+throwaway per-process database for tests and demos.
+
+Tables mirror the MongoDB collections:
+
+    tournaments      (tournament_id)              name, series_url, data_version, scoring_rules JSON
+    rosters          (tournament_id, name_key)    player_name, team, player_id, seq; index (tournament_id, seq)
+    matches          (tournament_id, match_id)    content_hash, doc JSON
+    player_points    (tournament_id, seq)         doc JSON
+    leaderboard      (tournament_id, rank)        team, doc JSON; index (tournament_id, team, rank)
+    team_leaderboard (tournament_id)              data JSON
+    response_bodies  (tournament_id, name)        version, body BLOB
+    player_match_stats (tournament_id, match_id, seq)  player, player_id, one column per stat
+    match_scores     (content_hash, rules_version) doc JSON
+    standings_history (tournament_id, kind, seq)  key, doc JSON; index (tournament_id, kind, key)
+    career_parts     (tournament_id, key)         doc JSON; index (key)
+    player_careers   (key)                        total_points, doc JSON; index (total_points)
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+
+from storage import HISTORY_KINDS, Storage, match_content_hash, normalise_name, roster_entries
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tournaments (
+    tournament_id TEXT PRIMARY KEY,
+    name          TEXT NOT NULL,
+    series_url    TEXT NOT NULL DEFAULT '',
+    data_version  INTEGER,
+    scoring_rules TEXT
+);
+CREATE TABLE IF NOT EXISTS rosters (
+    tournament_id TEXT NOT NULL,
+    name_key      TEXT NOT NULL,
+    player_name   TEXT NOT NULL,
+    team          TEXT NOT NULL,
+    player_id     INTEGER,
+    seq           INTEGER NOT NULL,
+    PRIMARY KEY (tournament_id, name_key)
+);
+CREATE INDEX IF NOT EXISTS rosters_seq ON rosters (tournament_id, seq);
+CREATE TABLE IF NOT EXISTS matches (
+    tournament_id TEXT NOT NULL,
+    match_id      TEXT NOT NULL,
+    content_hash  TEXT,
+    doc           TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, match_id)
+);
+CREATE TABLE IF NOT EXISTS player_points (
+    tournament_id TEXT NOT NULL,
+    seq           INTEGER NOT NULL,
+    doc           TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, seq)
+);
+CREATE TABLE IF NOT EXISTS leaderboard (
+    tournament_id TEXT NOT NULL,
+    rank          INTEGER NOT NULL,
+    team          TEXT,
+    doc           TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, rank)
+);
+CREATE INDEX IF NOT EXISTS leaderboard_team ON leaderboard (tournament_id, team, rank);
+CREATE TABLE IF NOT EXISTS team_leaderboard (
+    tournament_id TEXT PRIMARY KEY,
+    data          TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS response_bodies (
+    tournament_id TEXT NOT NULL,
+    name          TEXT NOT NULL,
+    version       INTEGER NOT NULL,
+    body          BLOB NOT NULL,
+    PRIMARY KEY (tournament_id, name)
+);
+CREATE TABLE IF NOT EXISTS player_match_stats (
+    tournament_id TEXT NOT NULL,
+    match_id      TEXT NOT NULL,
+    seq           INTEGER NOT NULL,
+    content_hash  TEXT NOT NULL,
+    match_name    TEXT NOT NULL,
+    start_time    TEXT,
+    player        TEXT NOT NULL,
+    player_id     INTEGER,
+    -- batting (NULL if they didn't bat)
+    runs INTEGER, balls INTEGER, fours INTEGER, sixes INTEGER, out INTEGER,
+    -- bowling (NULL if they didn't bowl)
+    balls_bowled INTEGER, maidens INTEGER, runs_conceded INTEGER, wickets INTEGER, dots INTEGER,
+    -- fielding (NULL if no fielding entry)
+    catches INTEGER, runouts INTEGER, stumpings INTEGER,
+    mom           INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tournament_id, match_id, seq)
+);
+CREATE TABLE IF NOT EXISTS match_scores (
+    content_hash  TEXT NOT NULL,
+    rules_version TEXT NOT NULL,
+    doc           TEXT NOT NULL,
+    PRIMARY KEY (content_hash, rules_version)
+);
+CREATE TABLE IF NOT EXISTS standings_history (
+    tournament_id TEXT NOT NULL,
+    kind          TEXT NOT NULL,
+    seq           INTEGER NOT NULL,
+    key           TEXT NOT NULL,
+    doc           TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, kind, seq)
+);
+CREATE INDEX IF NOT EXISTS standings_history_key ON standings_history (tournament_id, kind, key);
+CREATE TABLE IF NOT EXISTS career_parts (
+    tournament_id TEXT NOT NULL,
+    key           TEXT NOT NULL,
+    doc           TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, key)
+);
+CREATE INDEX IF NOT EXISTS career_parts_key ON career_parts (key);
+CREATE TABLE IF NOT EXISTS player_careers (
+    key           TEXT PRIMARY KEY,
+    total_points  REAL NOT NULL,
+    doc           TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS player_careers_points ON player_careers (total_points DESC, key);
+"""
+
+_TOURNAMENT_TABLES = ("rosters", "matches", "player_points", "leaderboard", "team_leaderboard",
+                      "response_bodies", "player_match_stats", "standings_history",
+                      "career_parts")
+
+# player_match_stats columns for each stats component, in component field order
+_STATS_COLUMNS = (
+    ("batting", ("runs", "balls", "fours", "sixes"), ("runs", "balls", "fours", "sixes")),
+    ("bowling", ("balls", "maidens", "runs", "wickets", "dots"),
+     ("balls_bowled", "maidens", "runs_conceded", "wickets", "dots")),
+    ("fielding", ("catches", "runout", "stumpings"), ("catches", "runouts", "stumpings")),
+)
+_STATS_SELECT = ", ".join(col for _, _, cols in _STATS_COLUMNS for col in cols)
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _upsert_roster(conn, tournament_id, entries):
+    # An entry keeps the player_id it has unless the new one brings its own
+    conn.executemany(
+        "INSERT INTO rosters (tournament_id, name_key, player_name, team, player_id, seq) "
+        "VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (tournament_id, name_key) DO UPDATE SET player_name = excluded.player_name, "
+        "team = excluded.team, player_id = COALESCE(excluded.player_id, player_id), seq = excluded.seq",
+        ((tournament_id, key, e["player_name"], e["team"], e.get("player_id"), seq)
+         for seq, (key, e) in enumerate(entries.items())))
+
+
+def _stats_values(tournament_id, match_id, match, seq, row):
+    """A player_match_stats row (tuple) for one match_stats() player row."""
+    values = [tournament_id, match_id, seq, match["content_hash"], match["match_name"],
+              match.get("start_time"), row["player"], row["player_id"]]
+    for component, fields, _ in _STATS_COLUMNS:
+        stats = row.get(component)
+        values += [stats[f] for f in fields] if stats else [None] * len(fields)
+        if component == "batting":
+            values.append(None if stats is None else int("dismissal" in stats))
+    values.append(int(bool(row.get("mom"))))
+    return values
+
+
+def _stats_row(values):
+    """Inverse of _stats_values for (player, player_id, <stats columns>, out, mom)."""
+    player, player_id, *values, out, mom = values
+    row = {"player": player, "player_id": player_id}
+    for component, fields, _ in _STATS_COLUMNS:
+        part, values = values[:len(fields)], values[len(fields):]
+        if part[0] is not None:
+            row[component] = dict(zip(fields, part))
+    if out:
+        row["batting"]["dismissal"] = "out"
+    if mom:
+        row["mom"] = True
+    return row
+
+
+def _columns(conn, table):
+    return [r[1] for r in conn.execute("PRAGMA table_info({})".format(table))]
+
+
+def _migrate(conn):
+    """Bring a database written by an older version up to SCHEMA."""
+    if "player_id" not in _columns(conn, "rosters"):
+        conn.execute("ALTER TABLE rosters ADD COLUMN player_id INTEGER")
+    if "content_hash" not in _columns(conn, "matches"):
+        conn.execute("ALTER TABLE matches ADD COLUMN content_hash TEXT")
+    if "scoring_rules" not in _columns(conn, "tournaments"):
+        conn.execute("ALTER TABLE tournaments ADD COLUMN scoring_rules TEXT")
+    if "start_time" not in _columns(conn, "player_match_stats"):
+        conn.execute("ALTER TABLE player_match_stats ADD COLUMN start_time TEXT")
+    if "players" not in _columns(conn, "tournaments"):
+        return
+    # Rosters used to be a JSON array on the tournament row
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for tid, players in conn.execute("SELECT tournament_id, players FROM tournaments").fetchall():
+            _upsert_roster(conn, tid, roster_entries(json.loads(players or "[]")))
+        conn.execute("ALTER TABLE tournaments DROP COLUMN players")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    print("Moved tournament rosters to the rosters table")
+
+
+class SqliteStorage(Storage):
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # One connection per process, shared by its threads under _lock
+        # (reconnect in a forked child rather than share the parent's handle).
+        if self._conn is None or (self._pid != os.getpid() and self.path != ":memory:"):
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA busy_timeout=10000")
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def warm_up(self):
+        with self._lock:
+            self._connection()
+
+    def after_fork(self):
+        # Never use (or close) a SQLite handle across fork: open a fresh one.
+        # An in-memory database exists only in its handle, so keep that one.
+        self._lock = threading.RLock()  # another thread may have held it at fork
+        if self.path != ":memory:":
+            self._conn = None
+
+    def close(self):
+        if self.path == ":memory:":  # closing would drop the database
+            return
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    @contextlib.contextmanager
+    def _read(self):
+        with self._lock:
+            yield self._connection()
+
+    @contextlib.contextmanager
+    def _write(self):
+        """Run the block in one IMMEDIATE transaction (takes the write lock up front)."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # -----------------------------------------------------------------------
+    # Tournaments
+    # -----------------------------------------------------------------------
+
+    def create_tournament(self, tournament_id, name, players=None, series_url=""):
+        doc = {
+            "tournament_id": tournament_id,
+            "name": name,
+            "players": players or [],
+            "series_url": series_url or "",
+        }
+        with self._write() as conn:
+            try:
+                conn.execute("INSERT INTO tournaments (tournament_id, name, series_url) VALUES (?, ?, ?)",
+                             (tournament_id, name, doc["series_url"]))
+            except sqlite3.IntegrityError:
+                raise ValueError("Tournament '{}' already exists".format(tournament_id)) from None
+            _upsert_roster(conn, tournament_id, roster_entries(players))
+        return doc
+
+    def get_tournament(self, tournament_id):
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT name, series_url, data_version, scoring_rules FROM tournaments "
+                "WHERE tournament_id = ?", (tournament_id,)).fetchone()
+        if row is None:
+            return None
+        doc = {"tournament_id": tournament_id, "name": row[0], "series_url": row[1]}
+        if row[2] is not None:
+            doc["data_version"] = row[2]
+        if row[3] is not None:
+            doc["scoring_rules"] = json.loads(row[3])
+        return doc
+
+    def list_tournaments(self):
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT t.tournament_id, t.name, t.series_url, "
+                "(SELECT COUNT(*) FROM rosters r WHERE r.tournament_id = t.tournament_id) "
+                "FROM tournaments t ORDER BY t.rowid").fetchall()
+        return [{"tournament_id": tid, "name": name or tid, "player_count": count,
+                 "series_url": series_url or ""}
+                for tid, name, series_url, count in rows]
+
+    def update_tournament_series_url(self, tournament_id, series_url):
+        with self._write() as conn:
+            conn.execute("UPDATE tournaments SET series_url = ? WHERE tournament_id = ?",
+                         (series_url, tournament_id))
+
+    def update_tournament_name(self, tournament_id, name):
+        with self._write() as conn:
+            conn.execute("UPDATE tournaments SET name = ? WHERE tournament_id = ?",
+                         (name, tournament_id))
+
+    def bump_data_version(self, tournament_id):
+        with self._write() as conn:
+            conn.execute("UPDATE tournaments SET data_version = COALESCE(data_version, 0) + 1 "
+                         "WHERE tournament_id = ?", (tournament_id,))
+            row = conn.execute("SELECT data_version FROM tournaments WHERE tournament_id = ?",
+                               (tournament_id,)).fetchone()
+        return row[0] if row else 0
+
+    def get_data_version(self, tournament_id):
+        with self._read() as conn:
+            row = conn.execute("SELECT data_version FROM tournaments WHERE tournament_id = ?",
+                               (tournament_id,)).fetchone()
+        return None if row is None else (row[0] or 0)
+
+    def set_scoring_rules(self, tournament_id, rules):
+        with self._write() as conn:
+            conn.execute("UPDATE tournaments SET scoring_rules = ? WHERE tournament_id = ?",
+                         (None if rules is None else _dumps(rules), tournament_id))
+
+    def list_scoring_rules(self):
+        with self._read() as conn:
+            rows = conn.execute("SELECT scoring_rules FROM tournaments "
+                                "WHERE scoring_rules IS NOT NULL").fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def delete_tournament(self, tournament_id):
+        with self._write() as conn:
+            if not conn.execute("DELETE FROM tournaments WHERE tournament_id = ?",
+                                (tournament_id,)).rowcount:
+                return False
+            for table in _TOURNAMENT_TABLES:
+                conn.execute("DELETE FROM {} WHERE tournament_id = ?".format(table), (tournament_id,))
+        return True
+
+    def rename_tournament(self, tournament_id, new_id):
+        with self._write() as conn:
+            try:
+                if not conn.execute("UPDATE tournaments SET tournament_id = ? WHERE tournament_id = ?",
+                                    (new_id, tournament_id)).rowcount:
+                    return False
+            except sqlite3.IntegrityError:
+                raise ValueError("Tournament '{}' already exists".format(new_id)) from None
+            for table in _TOURNAMENT_TABLES:
+                conn.execute("UPDATE {} SET tournament_id = ? WHERE tournament_id = ?".format(table),
+                             (new_id, tournament_id))
+        return True
+
+    # -----------------------------------------------------------------------
+    # Roster
+    # -----------------------------------------------------------------------
+
+    def get_players(self, tournament_id):
+        with self._read() as conn:
+            rows = conn.execute("SELECT player_name, team, player_id FROM rosters "
+                                "WHERE tournament_id = ? ORDER BY seq", (tournament_id,)).fetchall()
+        players = []
+        for name, team, player_id in rows:
+            player = {"player_name": name, "team": team}
+            if player_id is not None:
+                player["player_id"] = player_id
+            players.append(player)
+        return players
+
+    def count_players(self, tournament_id):
+        with self._read() as conn:
+            return conn.execute("SELECT COUNT(*) FROM rosters WHERE tournament_id = ?",
+                                (tournament_id,)).fetchone()[0]
+
+    def set_players(self, tournament_id, players):
+        entries = roster_entries(players)
+        with self._write() as conn:
+            conn.execute("DELETE FROM rosters WHERE tournament_id = ? "
+                         "AND name_key NOT IN (SELECT value FROM json_each(?))",
+                         (tournament_id, _dumps(list(entries))))
+            _upsert_roster(conn, tournament_id, entries)
+
+    def add_player(self, tournament_id, player_name, team, player_id=None):
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO rosters (tournament_id, name_key, player_name, team, player_id, seq) "
+                "SELECT ?, ?, ?, ?, ?, COALESCE(MAX(seq), -1) + 1 FROM rosters WHERE tournament_id = ? "
+                "ON CONFLICT (tournament_id, name_key) DO UPDATE SET "
+                "player_name = excluded.player_name, team = excluded.team, "
+                "player_id = COALESCE(excluded.player_id, player_id), seq = excluded.seq",
+                (tournament_id, normalise_name(player_name), player_name, team, player_id,
+                 tournament_id))
+
+    def set_player_ids(self, tournament_id, player_ids):
+        with self._write() as conn:
+            conn.executemany("UPDATE rosters SET player_id = ? WHERE tournament_id = ? AND name_key = ?",
+                             ((player_id, tournament_id, key) for key, player_id in player_ids.items()))
+
+    def remove_player(self, tournament_id, player_name):
+        with self._write() as conn:
+            return conn.execute("DELETE FROM rosters WHERE tournament_id = ? AND name_key = ?",
+                                (tournament_id, normalise_name(player_name))).rowcount > 0
+
+    # -----------------------------------------------------------------------
+    # Matches
+    # -----------------------------------------------------------------------
+
+    def save_match(self, tournament_id, match_data):
+        match_id = str(match_data.get("match_id", ""))
+        if not match_id:
+            raise ValueError("match_data must contain a 'match_id' field")
+        match_data["tournament_id"] = tournament_id
+        match_data["content_hash"] = content_hash = match_content_hash(match_data)
+        with self._write() as conn:
+            row = conn.execute("SELECT content_hash, doc FROM matches "
+                               "WHERE tournament_id = ? AND match_id = ?",
+                               (tournament_id, match_id)).fetchone()
+            if row and row[0] == content_hash:
+                return False
+            # Same semantics as Mongo's $set upsert: merge into what's there, in
+            # place (an updated match keeps its rowid, i.e. its position)
+            doc = dict(json.loads(row[1]), **match_data) if row else match_data
+            conn.execute("INSERT INTO matches (tournament_id, match_id, content_hash, doc) "
+                         "VALUES (?, ?, ?, ?) ON CONFLICT (tournament_id, match_id) DO UPDATE "
+                         "SET content_hash = excluded.content_hash, doc = excluded.doc",
+                         (tournament_id, match_id, content_hash, _dumps(doc)))
+        return True
+
+    def get_match(self, tournament_id, match_id):
+        with self._read() as conn:
+            row = conn.execute("SELECT doc FROM matches WHERE tournament_id = ? AND match_id = ?",
+                               (tournament_id, str(match_id))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_all_matches(self, tournament_id):
+        with self._read() as conn:
+            rows = conn.execute("SELECT doc FROM matches WHERE tournament_id = ? ORDER BY rowid",
+                                (tournament_id,)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def count_matches(self, tournament_id):
+        with self._read() as conn:
+            return conn.execute("SELECT COUNT(*) FROM matches WHERE tournament_id = ?",
+                                (tournament_id,)).fetchone()[0]
+
+    def delete_match(self, tournament_id, match_id):
+        with self._write() as conn:
+            conn.execute("DELETE FROM player_match_stats WHERE tournament_id = ? AND match_id = ?",
+                         (tournament_id, str(match_id)))
+            return conn.execute("DELETE FROM matches WHERE tournament_id = ? AND match_id = ?",
+                                (tournament_id, str(match_id))).rowcount > 0
+
+    def get_match_summaries(self, tournament_id):
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT match_id, json_extract(doc, '$.match_name'), json_extract(doc, '$.cricinfo_url') "
+                "FROM matches WHERE tournament_id = ? ORDER BY rowid", (tournament_id,)).fetchall()
+        return [{"match_id": mid, "match_name": name or "", "cricinfo_url": url or ""}
+                for mid, name, url in rows]
+
+    def get_match_hashes(self, tournament_id):
+        with self._read() as conn:
+            rows = conn.execute("SELECT match_id, content_hash FROM matches "
+                                "WHERE tournament_id = ? ORDER BY rowid", (tournament_id,)).fetchall()
+        return [tuple(r) for r in rows]
+
+    def get_matches(self, tournament_id, match_ids):
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT doc FROM matches WHERE tournament_id = ? "
+                "AND match_id IN (SELECT value FROM json_each(?))",
+                (tournament_id, json.dumps([str(m) for m in match_ids]))).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def save_matches(self, tournament_id, matches):
+        rows = []
+        for match_data in matches:
+            match_id = str(match_data.get("match_id", ""))
+            if not match_id:
+                raise ValueError("match_data must contain a 'match_id' field")
+            match_data["tournament_id"] = tournament_id
+            match_data["content_hash"] = content_hash = match_content_hash(match_data)
+            rows.append((tournament_id, match_id, content_hash, _dumps(match_data)))
+        with self._write() as conn:
+            conn.executemany("INSERT INTO matches (tournament_id, match_id, content_hash, doc) "
+                             "VALUES (?, ?, ?, ?) ON CONFLICT (tournament_id, match_id) DO UPDATE "
+                             "SET content_hash = excluded.content_hash, doc = excluded.doc", rows)
+
+    # -----------------------------------------------------------------------
+    # Per-player match stats
+    # -----------------------------------------------------------------------
+
+    def save_player_match_stats(self, tournament_id, stats):
+        with self._write() as conn:
+            conn.execute("DELETE FROM player_match_stats WHERE tournament_id = ? "
+                         "AND match_id IN (SELECT value FROM json_each(?))",
+                         (tournament_id, json.dumps(list(stats))))
+            conn.executemany(
+                "INSERT INTO player_match_stats (tournament_id, match_id, seq, content_hash, "
+                "match_name, start_time, player, player_id, runs, balls, fours, sixes, out, "
+                "balls_bowled, maidens, runs_conceded, wickets, dots, catches, runouts, stumpings, "
+                "mom) VALUES ({})".format(", ".join("?" * 22)),
+                (_stats_values(tournament_id, match_id, match, seq, row)
+                 for match_id, match in stats.items()
+                 for seq, row in enumerate(match["players"])))
+
+    def get_player_match_stats(self, tournament_id, match_ids=None):
+        query = ("SELECT match_id, match_name, start_time, content_hash, player, player_id, {}, "
+                 "out, mom "
+                 "FROM player_match_stats WHERE tournament_id = ?".format(_STATS_SELECT))
+        params = [tournament_id]
+        if match_ids is not None:
+            query += " AND match_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([str(m) for m in match_ids]))
+        with self._read() as conn:
+            rows = conn.execute(query + " ORDER BY match_id, seq", params).fetchall()
+        grouped = {}
+        for match_id, match_name, start_time, content_hash, *values in rows:
+            match = grouped.get(match_id)
+            if match is None:
+                match = grouped[match_id] = {"match_id": match_id, "match_name": match_name,
+                                             "content_hash": content_hash, "players": []}
+                if start_time is not None:
+                    match["start_time"] = start_time
+            match["players"].append(_stats_row(values))
+        return grouped
+
+    # -----------------------------------------------------------------------
+    # Per-match score cache
+    # -----------------------------------------------------------------------
+
+    def get_match_scores(self, rules_version, content_hashes):
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT content_hash, doc FROM match_scores WHERE rules_version = ? "
+                "AND content_hash IN (SELECT value FROM json_each(?))",
+                (rules_version, json.dumps(list(content_hashes)))).fetchall()
+        return {h: json.loads(doc) for h, doc in rows}
+
+    def save_match_scores(self, rules_version, scores):
+        with self._write() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO match_scores (content_hash, rules_version, doc) "
+                "VALUES (?, ?, ?)",
+                ((h, rules_version, _dumps(doc)) for h, doc in scores.items()))
+
+    def evict_match_scores(self, rules_versions):
+        with self._write() as conn:
+            return conn.execute(
+                "DELETE FROM match_scores WHERE rules_version NOT IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(rules_versions)),)).rowcount
+
+    # -----------------------------------------------------------------------
+    # Points and standings
+    # -----------------------------------------------------------------------
+
+    def save_all_player_points(self, tournament_id, player_points_list):
+        with self._write() as conn:
+            conn.execute("DELETE FROM player_points WHERE tournament_id = ?", (tournament_id,))
+            conn.executemany(
+                "INSERT INTO player_points (tournament_id, seq, doc) VALUES (?, ?, ?)",
+                ((tournament_id, seq, _dumps(p)) for seq, p in enumerate(player_points_list)))
+
+    def get_all_player_points(self, tournament_id):
+        with self._read() as conn:
+            rows = conn.execute("SELECT doc FROM player_points WHERE tournament_id = ? ORDER BY seq",
+                                (tournament_id,)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def save_leaderboard(self, tournament_id, leaderboard):
+        with self._write() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO leaderboard (tournament_id, rank, team, doc) VALUES (?, ?, ?, ?)",
+                ((tournament_id, row["rank"], row.get("team"), _dumps(row)) for row in leaderboard))
+            conn.execute("DELETE FROM leaderboard WHERE tournament_id = ? AND rank > ?",
+                         (tournament_id, len(leaderboard)))
+
+    def get_leaderboard_page(self, tournament_id, after_rank=0, limit=50, max_rank=None,
+                             team=None, fields=None):
+        sql = "SELECT doc FROM leaderboard WHERE tournament_id = ? AND rank > ?"
+        params = [tournament_id, after_rank]
+        if max_rank is not None:
+            sql += " AND rank <= ?"
+            params.append(max_rank)
+        if team:
+            sql += " AND team = ?"
+            params.append(team)
+        sql += " ORDER BY rank"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._read() as conn:
+            rows = [json.loads(r[0]) for r in conn.execute(sql, params)]
+        if fields:
+            rows = [{f: row[f] for f in fields if f in row} for row in rows]
+        return rows
+
+    def save_team_leaderboard(self, tournament_id, team_leaderboard):
+        with self._write() as conn:
+            conn.execute("DELETE FROM team_leaderboard WHERE tournament_id = ?", (tournament_id,))
+            if team_leaderboard:
+                conn.execute("INSERT INTO team_leaderboard (tournament_id, data) VALUES (?, ?)",
+                             (tournament_id, _dumps(team_leaderboard)))
+
+    def get_team_leaderboard(self, tournament_id):
+        with self._read() as conn:
+            row = conn.execute("SELECT data FROM team_leaderboard WHERE tournament_id = ?",
+                               (tournament_id,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    # -----------------------------------------------------------------------
+    # Standings history
+    # -----------------------------------------------------------------------
+
+    def save_standings_history(self, tournament_id, history):
+        with self._write() as conn:
+            conn.execute("DELETE FROM standings_history WHERE tournament_id = ?", (tournament_id,))
+            conn.executemany(
+                "INSERT INTO standings_history (tournament_id, kind, seq, key, doc) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(tournament_id, "matches", 0, "", _dumps(history["matches"]))]
+                + [(tournament_id, kind, seq, str(row["key"]), _dumps(row))
+                   for kind in HISTORY_KINDS for seq, row in enumerate(history[kind])])
+
+    def get_standings_history(self, tournament_id, kind, keys=None):
+        query = "SELECT kind, doc FROM standings_history WHERE tournament_id = ? AND kind = ?"
+        params = [tournament_id, kind]
+        if keys is not None:
+            query += " AND key IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([str(k) for k in keys]))
+        with self._read() as conn:
+            axis = conn.execute("SELECT doc FROM standings_history "
+                                "WHERE tournament_id = ? AND kind = 'matches'",
+                                (tournament_id,)).fetchone()
+            rows = conn.execute(query + " ORDER BY seq", params).fetchall()
+        return {"matches": json.loads(axis[0]) if axis else [],
+                kind: [json.loads(doc) for _, doc in rows]}
+
+    # -----------------------------------------------------------------------
+    # Player careers
+    # -----------------------------------------------------------------------
+
+    def get_career_parts(self, tournament_id=None, keys=None):
+        query, params = "SELECT doc FROM career_parts WHERE 1", []
+        if tournament_id is not None:
+            query += " AND tournament_id = ?"
+            params.append(tournament_id)
+        if keys is not None:
+            query += " AND key IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(list(keys)))
+        with self._read() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def save_career_parts(self, tournament_id, parts, removed_keys):
+        with self._write() as conn:
+            conn.execute("DELETE FROM career_parts WHERE tournament_id = ? "
+                         "AND key IN (SELECT value FROM json_each(?))",
+                         (tournament_id, json.dumps(list(removed_keys))))
+            conn.executemany(
+                "INSERT OR REPLACE INTO career_parts (tournament_id, key, doc) VALUES (?, ?, ?)",
+                ((tournament_id, key, _dumps(part)) for key, part in parts.items()))
+
+    def save_player_careers(self, careers, removed_keys):
+        with self._write() as conn:
+            conn.execute("DELETE FROM player_careers WHERE key IN (SELECT value FROM json_each(?))",
+                         (json.dumps(list(removed_keys)),))
+            conn.executemany(
+                "INSERT OR REPLACE INTO player_careers (key, total_points, doc) VALUES (?, ?, ?)",
+                ((c["key"], c["total_points"], _dumps(c)) for c in careers))
+
+    def get_player_careers(self, limit=50, offset=0):
+        with self._read() as conn:
+            rows = conn.execute("SELECT doc FROM player_careers ORDER BY total_points DESC, key "
+                                "LIMIT ? OFFSET ?", (limit or -1, offset)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def get_player_career(self, key):
+        with self._read() as conn:
+            row = conn.execute("SELECT doc FROM player_careers WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # -----------------------------------------------------------------------
+    # Pre-rendered response bodies
+    # -----------------------------------------------------------------------
+
+    def save_response_bodies(self, tournament_id, version, bodies):
+        with self._write() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO response_bodies (tournament_id, name, version, body) "
+                "VALUES (?, ?, ?, ?)",
+                ((tournament_id, name, version, body) for name, body in bodies.items()))
+
+    def get_response_bodies(self, tournament_id):
+        with self._read() as conn:
+            version = conn.execute("SELECT MAX(version) FROM response_bodies WHERE tournament_id = ?",
+                                   (tournament_id,)).fetchone()[0]
+            if version is None:
+                return None, {}
+            rows = conn.execute("SELECT name, body FROM response_bodies "
+                                "WHERE tournament_id = ? AND version = ?",
+                                (tournament_id, version)).fetchall()
+        return version, {name: bytes(body) for name, body in rows}
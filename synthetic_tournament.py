@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Seeded generator of synthetic tournaments for benchmarking.
+
+Produces match dicts in exactly the shape scrape_match._process_raw returns
+(batting / bowling with dots / fielding / man_of_the_match) plus a fantasy
+roster, so the whole scoring pipeline can be exercised at sizes the 12 real
+files in match_results/ can't reach.
+
+Innings are simulated ball by ball from typical T20 outcome rates, so runs,
+strike rates, maidens, dots, hauls and dismissal strings are realistic.
+Scorecard records carry Cricinfo-style player ids; the roster doesn't.
+Roster names deliberately drift from scorecard names (case, spacing,
+"(c)"/"(wk)" tags, dropped first names, unlisted players) to exercise the
+exact → substring → Unknown paths calculate_points._resolve_team takes
+before it has learned each player's id.
+
+to_cricinfo_data / render_scorecard_page turn a match back into the page
+Cricinfo serves, for driving the scraper offline.
+
+Usage:
+    python synthetic_tournament.py --matches 2000 --seed 7 --out synthetic/
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+
+FIRST_NAMES = [
+    "Aarav", "Adil", "Aiden", "Ben", "Babar", "Chris", "Dasun", "Devon", "Dewald",
+    "Faf", "Fakhar", "Glenn", "Harry", "Hardik", "Ish", "Jos", "Jasprit", "Kane",
+    "Kusal", "Liam", "Marco", "Matt", "Mohammad", "Nicholas", "Quinton", "Rashid",
+    "Rohit", "Ryan", "Sam", "Shai", "Shaheen", "Sikandar", "Tim", "Travis", "Trent",
+    "Virat", "Wanindu", "Will", "Yash", "Zak",
+]
+MIDDLE_NAMES = ["", "", "", "", "Ali", "de", "van", "Kumar", "Lee", "Singh", "Jan"]
+LAST_NAMES = [
+    "Ahmed", "Allen", "Babar", "Bavuma", "Brook", "Buttler", "Chapman", "Conway",
+    "Curran", "Dawson", "Farhan", "Hasaranga", "Henry", "Hetmyer", "Hope", "Jacks",
+    "Jansen", "Kishan", "Livingstone", "Markram", "Mendis", "Miller", "Mitchell",
+    "Nissanka", "Phillips", "Pooran", "Rabada", "Raza", "Rizwan", "Santner",
+    "Seifert", "Shepherd", "Tewatia", "Theekshana", "Varma", "Wellalage", "Williams",
+]
+COUNTRIES = [
+    "England", "India", "Pakistan", "Australia", "New Zealand", "South Africa",
+    "Sri Lanka", "West Indies", "Zimbabwe", "Bangladesh", "Afghanistan", "Ireland",
+    "Netherlands", "Scotland", "Namibia", "Nepal", "Oman", "USA", "Canada", "UAE",
+]
+# The canonical names in calculate_points._TEAM_CANONICAL, then generic extras
+FANTASY_TEAMS = ["GKKani", "PPT", "RamSurya", "RSK", "CNI"]
+
+# Per-ball outcome weights: dot, 1, 2, 3, 4, 6, wicket
+_OUTCOMES = (0, 1, 2, 3, 4, 6, "W")
+_WEIGHTS = (37, 34, 8, 1, 10, 5, 5)
+# Dismissal kinds and weights
+_DISMISSALS = (("caught", 60), ("bowled", 18), ("lbw", 10), ("run out", 8), ("stumped", 4))
+# First synthetic Cricinfo player objectId
+FIRST_PLAYER_ID = 1100001
+
+
+def _unique_names(rng, count):
+    names = set()
+    while len(names) < count:
+        middle = rng.choice(MIDDLE_NAMES)
+        parts = [rng.choice(FIRST_NAMES)] + ([middle] if middle else []) + [rng.choice(LAST_NAMES)]
+        names.add(" ".join(parts))
+    return sorted(names)
+
+
+def _roster_variant(rng, name):
+    """Return how a league admin might have typed *name* into the roster CSV."""
+    roll = rng.random()
+    if roll < 0.60:
+        return name
+    if roll < 0.72:
+        return "  " + name.upper() if rng.random() < 0.5 else name.lower() + " "
+    if roll < 0.84:
+        return name + rng.choice([" (c)", " (wk)", "(c)", " (WK)"])
+    parts = name.split()
+    return " ".join(parts[1:]) if len(parts) > 1 else name  # substring match
+
+
+def _fantasy_team_variant(rng, team):
+    """Only canonical names are case-folded by calculate_points, so only vary those."""
+    if team not in FANTASY_TEAMS:
+        return team
+    return rng.choice([team, team.lower(), team.upper(), " " + team + " "])
+
+
+def _simulate_innings(rng, batting_xi, bowling_xi, keeper, ids):
+    """Simulate one T20 innings ball by ball.
+
+    Returns (batting records, bowling records, fielding dict).
+    """
+    bat = {name: {"player": name, "player_id": ids[name], "dismissal": "not out", "runs": 0,
+                  "balls": 0, "fours": 0, "sixes": 0} for name in batting_xi}
+    bowlers = bowling_xi[-rng.randint(5, 7):]
+    bowl = {name: {"player": name, "player_id": ids[name], "balls": 0, "maidens": 0, "runs": 0,
+                   "wickets": 0, "dots": 0} for name in bowlers}
+    fielding = {}
+
+    def _fielder(name):
+        return fielding.setdefault(name, {"catches": 0, "runout": 0, "stumpings": 0,
+                                          "player_id": ids[name]})
+
+    order = list(batting_xi)
+    striker, non_striker = order.pop(0), order.pop(0)
+    batted = [striker, non_striker]
+    wickets = 0
+    prev_bowler = None
+
+    for over in range(20):
+        eligible = [b for b in bowlers if bowl[b]["balls"] < 24 and b != prev_bowler]
+        bowler = rng.choice(eligible or bowlers)
+        prev_bowler = bowler
+        over_runs = 0
+        for _ in range(6):
+            outcome = rng.choices(_OUTCOMES, _WEIGHTS)[0]
+            b, bw = bat[striker], bowl[bowler]
+            b["balls"] += 1
+            bw["balls"] += 1
+            if outcome == "W":
+                kind = rng.choices([k for k, _ in _DISMISSALS], [w for _, w in _DISMISSALS])[0]
+                fielder = rng.choice([p for p in bowling_xi if p != bowler])
+                if kind == "caught":
+                    b["dismissal"] = "c {} b {}".format(fielder, bowler)
+                    _fielder(fielder)["catches"] += 1
+                elif kind == "stumped":
+                    b["dismissal"] = "st {} b {}".format(keeper, bowler)
+                    _fielder(keeper)["stumpings"] += 1
+                elif kind == "run out":
+                    b["dismissal"] = "run out ({})".format(fielder)
+                    _fielder(fielder)["runout"] += 1
+                else:
+                    b["dismissal"] = ("lbw b " if kind == "lbw" else "b ") + bowler
+                if kind != "run out":
+                    bw["wickets"] += 1
+                bw["dots"] += 1
+                wickets += 1
+                if wickets == 10 or not order:
+                    break
+                striker = order.pop(0)
+                batted.append(striker)
+                continue
+            b["runs"] += outcome
+            bw["runs"] += outcome
+            over_runs += outcome
+            if outcome == 0:
+                bw["dots"] += 1
+            elif outcome == 4:
+                b["fours"] += 1
+            elif outcome == 6:
+                b["sixes"] += 1
+            if outcome % 2 == 1:
+                striker, non_striker = non_striker, striker
+        else:
+            if over_runs == 0:
+                bowl[bowler]["maidens"] += 1
+            striker, non_striker = non_striker, striker
+            continue
+        break  # all out
+
+    batting = [bat[name] for name in batted]
+    bowling = [bowl[name] for name in bowlers if bowl[name]["balls"]]
+    return batting, bowling, fielding
+
+
+def _man_of_the_match(batting, bowling):
+    """Crude award: best of runs + 25 per wicket."""
+    impact = {}
+    for b in batting:
+        impact[b["player"]] = impact.get(b["player"], 0) + b["runs"]
+    for b in bowling:
+        impact[b["player"]] = impact.get(b["player"], 0) + 25 * b["wickets"]
+    return max(impact, key=impact.get) if impact else None
+
+
+def generate(seed=7, matches=2000, countries=12, squad_size=25, fantasy_teams=8,
+             roster_coverage=0.85):
+    """Generate a synthetic tournament.
+
+    Returns {"roster": [{player_name, team}], "matches": [match dict, ...]}.
+    Same arguments → byte-identical output.
+    """
+    rng = random.Random(seed)
+    nations = (COUNTRIES * (countries // len(COUNTRIES) + 1))[:countries]
+    nations = [n if i < len(COUNTRIES) else "{} {}".format(n, i // len(COUNTRIES) + 1)
+               for i, n in enumerate(nations)]
+    names = _unique_names(rng, countries * squad_size)
+    ids = {name: FIRST_PLAYER_ID + i for i, name in enumerate(names)}
+    rng.shuffle(names)
+    squads = {n: names[i * squad_size:(i + 1) * squad_size] for i, n in enumerate(nations)}
+
+    teams = FANTASY_TEAMS[:fantasy_teams] + [
+        "Team{:02d}".format(i) for i in range(max(0, fantasy_teams - len(FANTASY_TEAMS)))
+    ]
+    roster = []
+    for name in names:
+        if rng.random() < roster_coverage:
+            roster.append({
+                "player_name": _roster_variant(rng, name),
+                "team": _fantasy_team_variant(rng, rng.choice(teams)),
+            })
+
+    out = []
+    for i in range(matches):
+        home, away = rng.sample(nations, 2)
+        xi = {n: rng.sample(squads[n], 11) for n in (home, away)}
+        first, second = (home, away) if rng.random() < 0.5 else (away, home)
+        bat1, bowl1, field1 = _simulate_innings(rng, xi[first], xi[second], xi[second][5], ids)
+        bat2, bowl2, field2 = _simulate_innings(rng, xi[second], xi[first], xi[first][5], ids)
+        fielding = field1
+        for name, entry in field2.items():
+            fielding[name] = entry
+        batting, bowling = bat1 + bat2, bowl1 + bowl2
+        match_id = str(900000 + i)
+        mom = _man_of_the_match(batting, bowling)
+        out.append({
+            "match_id": match_id,
+            "match_name": "{} vs {}".format(home, away),
+            "batting": batting,
+            "bowling": bowling,
+            "fielding": fielding,
+            "man_of_the_match": mom,
+            "man_of_the_match_id": ids[mom] if mom else None,
+        })
+    return {"roster": roster, "matches": out}
+
+
+# Cricinfo dismissalType codes read by scrape_match._extract_fielding
+_FIELDING_TYPES = (("catches", 1), ("runout", 4), ("stumpings", 5))
+
+
+def _player_obj(name, player_id):
+    obj = {"longName": name}
+    if player_id is not None:
+        obj["objectId"] = player_id
+    return obj
+
+
+def to_cricinfo_data(match):
+    """Convert a match dict back into Cricinfo's props.appPageProps.data shape.
+
+    Everything lands in innings 1; the extractors don't care how records are
+    split across the first two innings.
+    """
+    home, _, away = match["match_name"].partition(" vs ")
+    wickets = []
+    for name, entry in match["fielding"].items():
+        for key, d_type in _FIELDING_TYPES:
+            for _ in range(entry.get(key, 0)):
+                wickets.append({"dismissalType": d_type, "dismissalFielders": [
+                    {"player": _player_obj(name, entry.get("player_id"))}]})
+    awards = []
+    if match.get("man_of_the_match"):
+        awards.append({"player": _player_obj(match["man_of_the_match"],
+                                             match.get("man_of_the_match_id"))})
+    return {
+        "match": {
+            "id": int(match["match_id"]),
+            "title": match["match_name"],
+            "teams": [{"team": {"longName": home}}, {"team": {"longName": away or "?"}}],
+        },
+        "content": {
+            "innings": [{
+                "inningNumber": 1,
+                "inningBatsmen": [{
+                    "player": _player_obj(b["player"], b.get("player_id")),
+                    "isOut": b["dismissal"] != "not out",
+                    "dismissalText": {"long": b["dismissal"]},
+                    "runs": b["runs"], "balls": b["balls"],
+                    "fours": b["fours"], "sixes": b["sixes"],
+                } for b in match["batting"]],
+                "inningBowlers": [{
+                    "player": _player_obj(b["player"], b.get("player_id")),
+                    "balls": b["balls"], "maidens": b["maidens"], "conceded": b["runs"],
+                    "wickets": b["wickets"], "dots": b["dots"],
+                } for b in match["bowling"]],
+                "inningWickets": wickets,
+            }],
+            "matchPlayerAwards": awards,
+        },
+    }
+
+
+def render_scorecard_page(match):
+    """Render a minimal full-scorecard HTML page with an embedded __NEXT_DATA__."""
+    next_data = {"props": {"appPageProps": {"data": to_cricinfo_data(match)}}}
+    return ('<!DOCTYPE html><html><head><title>{}</title></head><body>'
+            '<script id="__NEXT_DATA__" type="application/json">{}</script>'
+            '</body></html>').format(match["match_name"], json.dumps(next_data))
+
+
+def write(tournament, out_dir):
+    """Write matches as match_results-style JSON files plus PlayersWithTeam.csv."""
+    match_dir = os.path.join(out_dir, "match_results")
+    os.makedirs(match_dir, exist_ok=True)
+    for m in tournament["matches"]:
+        path = os.path.join(match_dir, "{}_{}.json".format(m["match_name"], m["match_id"]))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(m, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(out_dir, "PlayersWithTeam.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Player Name", "Team"])
+        for p in tournament["roster"]:
+            writer.writerow([p["player_name"], p["team"]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic T20 tournament.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--countries", type=int, default=12)
+    parser.add_argument("--squad-size", type=int, default=25)
+    parser.add_argument("--fantasy-teams", type=int, default=8)
+    parser.add_argument("--out", required=True, help="Output directory")
+    args = parser.parse_args()
+
+    t = generate(seed=args.seed, matches=args.matches, countries=args.countries,
+                 squad_size=args.squad_size, fantasy_teams=args.fantasy_teams)
+    write(t, args.out)
+    print(f"Wrote {len(t['matches'])} matches and {len(t['roster'])} roster entries to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Shared fixtures: every test gets a fresh, empty in-memory datastore."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculate_points  # noqa: E402
+import db  # noqa: E402
+import resilience  # noqa: E402
+import shared_cache  # noqa: E402
+import synthetic_tournament  # noqa: E402
+from calculate_points import recalculate_all  # noqa: E402
+
+
+@pytest.fixture(params=["memory", "mongomock"])
+def datastore(request, monkeypatch, tmp_path):
+    """The db module on an empty backend: SQLite in memory, then mongomock."""
+    if request.param == "memory":
+        monkeypatch.setenv("STORAGE_BACKEND", "memory")
+    else:
+        pytest.importorskip("mongomock")
+        monkeypatch.setenv("STORAGE_BACKEND", "mongo")
+        monkeypatch.setenv("MONGODB_URI", "mongomock://tests")
+    monkeypatch.setattr(shared_cache, "CACHE_DIR", str(tmp_path / "shared-cache"))
+    monkeypatch.setattr(calculate_points, "_live_rule_versions", set())
+    db.reset_storage()
+    resilience.clear()
+    yield db
+    resilience.clear()
+    db.reset_storage()
+
+
+@pytest.fixture
+def tournament(datastore):
+    """A scored synthetic tournament 't' of 12 matches; returns the generated data."""
+    data = synthetic_tournament.generate(seed=7, matches=12)
+    datastore.create_tournament("t", "Test", data["roster"])
+    for match in data["matches"]:
+        datastore.save_match("t", dict(match))
+    recalculate_all("t")
+    return data
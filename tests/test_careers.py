@@ -0,0 +1,40 @@
+"""Player careers across tournaments."""
+
+import careers
+import synthetic_tournament
+from calculate_points import recalculate_all
+
+
+def _add_tournament(datastore, tid, year):
+    """The same synthetic players in tournament *tid*, its matches played in *year*."""
+    data = synthetic_tournament.generate(seed=7, matches=6)
+    datastore.create_tournament(tid, tid, data["roster"])
+    for day, match in enumerate(data["matches"], 1):
+        match = dict(match, match_id="{}{}".format(year, match["match_id"]),
+                     start_time="{}-03-{:02d}T14:00:00".format(year, day))
+        datastore.save_match(tid, match)
+    recalculate_all(tid)
+
+
+def test_latest_tournament_is_by_match_date(datastore):
+    # Alphabetical order would make "b" the player's latest tournament
+    _add_tournament(datastore, "a_league", 2026)
+    _add_tournament(datastore, "b_league", 2024)
+
+    career = datastore.get_player_careers(limit=1)[0]
+    assert [t["tournament_id"] for t in career["tournaments"]] == ["b_league", "a_league"]
+    assert career["recent_form"][-1]["tournament_id"] == "a_league"
+    assert career["matches"] == sum(t["matches"] for t in career["tournaments"])
+
+
+def test_dropping_a_tournament_rebuilds_the_career(datastore):
+    _add_tournament(datastore, "a_league", 2026)
+    _add_tournament(datastore, "b_league", 2024)
+    key = datastore.get_player_careers(limit=1)[0]["key"]
+
+    careers.drop_tournament("a_league")
+    datastore.delete_tournament("a_league")
+
+    career = datastore.get_player_career(key)
+    assert [t["tournament_id"] for t in career["tournaments"]] == ["b_league"]
+    assert {e["tournament_id"] for e in career["recent_form"]} == {"b_league"}
@@ -0,0 +1,76 @@
+"""Per-match standings history: rebuilt on recalculation and re-scrapes."""
+
+import copy
+
+from calculate_points import player_key, recalculate_all, standings_diff
+
+
+def _by_key(history):
+    return {row["key"]: row for row in history["players"]}
+
+
+def _at(row, step):
+    """(points, rank) of a history row after match *step*, or None before it was ranked."""
+    if step < row["start"]:
+        return None
+    return row["points"][step - row["start"]], row["ranks"][step - row["start"]]
+
+
+def test_history_ends_at_the_final_standings(datastore, tournament):
+    teams = datastore.get_standings_history("t", "teams")
+    players = datastore.get_standings_history("t", "players")
+    assert [m["match_id"] for m in teams["matches"]] == [m["match_id"] for m in tournament["matches"]]
+    assert [(r["team"], r["points"][-1], r["ranks"][-1]) for r in teams["teams"]] == \
+        [(t["team"], t["total_points"], rank)
+         for rank, t in enumerate(datastore.get_team_leaderboard("t"), 1)]
+    assert [(r["key"], r["points"][-1], r["ranks"][-1]) for r in players["players"]] == \
+        [(str(player_key(p)), p["total_points"], p["rank"]) for p in datastore.get_leaderboard("t")]
+
+    # Recalculating again rebuilds the same history
+    recalculate_all("t")
+    assert datastore.get_standings_history("t", "teams") == teams
+    assert datastore.get_standings_history("t", "players") == players
+
+
+def test_rescraped_match_rewrites_history_from_that_match(datastore, tournament):
+    before = _by_key(datastore.get_standings_history("t", "players"))
+    step = 4
+    match = copy.deepcopy(tournament["matches"][step])
+    batter = match["batting"][0]
+    batter["runs"] += 10
+    datastore.save_match("t", match)
+    recalculate_all("t")
+
+    history = datastore.get_standings_history("t", "players")
+    assert len(history["matches"]) == len(tournament["matches"])
+    after = _by_key(history)
+    row, old = after[str(batter["player_id"])], before[str(batter["player_id"])]
+    assert row["start"] == old["start"]
+    assert row["points"][:step - row["start"]] == old["points"][:step - old["start"]]
+    assert all(new > was for new, was in zip(row["points"][step - row["start"]:],
+                                             old["points"][step - old["start"]:]))
+    assert row["points"][-1] == next(p["total_points"] for p in datastore.get_leaderboard("t")
+                                     if p.get("player_id") == batter["player_id"])
+
+
+def test_standings_diff_between_two_match_numbers(datastore, tournament):
+    # The standings after the first 6 matches, as their own tournament
+    datastore.create_tournament("early", "Early", tournament["roster"])
+    for match in tournament["matches"][:6]:
+        datastore.save_match("early", dict(match))
+    recalculate_all("early")
+
+    history = _by_key(datastore.get_standings_history("t", "players"))
+    early = datastore.get_leaderboard("early")
+    assert {str(player_key(p)): (p["total_points"], p["rank"]) for p in early} == \
+        {key: _at(row, 5) for key, row in history.items() if _at(row, 5) is not None}
+
+    diff = standings_diff(early, datastore.get_leaderboard("t"),
+                          datastore.get_team_leaderboard("early"), datastore.get_team_leaderboard("t"))
+    changed = {str(player_key(p)) for p in diff["players"]}
+    moved = {key for key, row in history.items() if _at(row, 5) != _at(row, 11)}
+    assert moved <= changed
+    assert not diff["removed"]
+    assert {t["team"] for t in diff["teams"]} == \
+        {t["team"] for t in datastore.get_standings_history("t", "teams")["teams"]
+         if _at(t, 5) != _at(t, 11)}
@@ -0,0 +1,76 @@
+"""Leaderboard rank rows and their cursor pagination."""
+
+import pytest
+
+import storage_mongo
+
+
+def test_pages_cover_the_leaderboard(datastore, tournament):
+    full = datastore.get_leaderboard("t")
+    assert [row["rank"] for row in full] == list(range(1, len(full) + 1))
+
+    rows, after = [], 0
+    while True:
+        page = datastore.get_leaderboard_page("t", after_rank=after, limit=7)
+        if not page:
+            break
+        rows.extend(page)
+        after = page[-1]["rank"]
+    assert rows == full
+
+
+def test_page_edges(datastore, tournament):
+    full = datastore.get_leaderboard("t")
+    last = full[-1]["rank"]
+
+    assert datastore.get_leaderboard_page("t", after_rank=last, limit=10) == []
+    assert datastore.get_leaderboard_page("t", after_rank=last - 1, limit=10) == full[-1:]
+    assert datastore.get_leaderboard_page("t", after_rank=3, limit=10, max_rank=5) == full[3:5]
+    assert datastore.get_leaderboard_page("t", after_rank=5, limit=10, max_rank=5) == []
+    assert datastore.get_leaderboard_page("t", limit=0, max_rank=4) == full[:4]
+    assert datastore.get_leaderboard_page("missing", limit=10) == []
+
+
+def test_team_filter_keeps_overall_ranks(datastore, tournament):
+    full = datastore.get_leaderboard("t")
+    team = full[0]["team"]
+    expected = [row for row in full if row["team"] == team]
+
+    first = datastore.get_leaderboard_page("t", limit=2, team=team)
+    rest = datastore.get_leaderboard_page("t", after_rank=first[-1]["rank"], limit=0, team=team)
+    assert first + rest == expected
+    assert datastore.get_leaderboard_page("t", limit=10, team="No such team") == []
+
+
+def test_fields_projection(datastore, tournament):
+    page = datastore.get_leaderboard_page("t", limit=3, fields=["rank", "total_points"])
+    assert [set(row) for row in page] == [{"rank", "total_points"}] * 3
+
+
+def test_endpoint_cursor(datastore, tournament):
+    import main
+    client = main.app.test_client()
+    full = datastore.get_leaderboard("t")
+
+    resp = client.get("/t/t/fantasy/leaderboard?limit=5")
+    assert resp.get_json() == full[:5]
+    assert resp.headers["X-Next-Cursor"] == "5"
+    resp = client.get("/t/t/fantasy/leaderboard?limit=5&cursor=5&top=8")
+    assert resp.get_json() == full[5:8]
+    assert "X-Next-Cursor" not in resp.headers
+
+
+def test_legacy_leaderboard_doc_is_split_on_connect(datastore, tournament):
+    storage = datastore.get_storage()
+    if storage.name != "mongo":
+        pytest.skip("single-document leaderboards only ever existed on MongoDB")
+    full = datastore.get_leaderboard("t")
+    legacy = [{k: v for k, v in row.items() if k != "rank"} for row in full]
+    db = storage.db
+    db.leaderboard.delete_many({"tournament_id": "t"})
+    db.leaderboard.insert_one({"tournament_id": "t", "data": legacy})
+    assert datastore.get_leaderboard_page("t", limit=5) == []
+
+    storage_mongo._ensure_indexes(db)  # what connecting runs
+    assert datastore.get_leaderboard("t") == full
+    assert db.leaderboard.count_documents({"rank": {"$exists": False}}) == 0
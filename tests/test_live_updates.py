@@ -0,0 +1,91 @@
+"""Server-Sent Events stream: starting versions, diffs and the stream cap."""
+
+import asyncio
+import json
+
+import pytest
+
+import calculate_points
+import live_updates
+import main
+import shared_cache
+
+
+@pytest.fixture
+def live(tournament, monkeypatch):
+    """Fresh per-module stream state around the tournament fixture."""
+    monkeypatch.setattr(live_updates, "POLL_SECONDS", 0.05)
+    monkeypatch.setattr(live_updates, "_versions", {})
+    monkeypatch.setattr(live_updates, "_listeners", {})
+    monkeypatch.setattr(live_updates, "_async_cond", None)
+    monkeypatch.setattr(live_updates, "_async_versions", {})
+    monkeypatch.setattr(live_updates, "_async_listeners", {})
+    monkeypatch.setattr(live_updates, "_async_watcher", None)
+    return tournament
+
+
+def _event(frame):
+    lines = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+    return lines["event"], int(lines["id"]), json.loads(lines["data"])
+
+
+def test_stream_starts_from_published_version(live, monkeypatch):
+    version = shared_cache.current_version("t")
+    # Left behind by an earlier stream: nothing updates it once nobody listens
+    live_updates._versions["t"] = version - 1
+
+    frames = live_updates.stream("t")
+    assert next(frames).startswith("retry:")
+    assert _event(next(frames)) == ("reset", version, {"version": version})
+    frames.close()
+
+    frames = live_updates.stream("t", last_version=version)
+    next(frames)
+    monkeypatch.setattr(live_updates, "HEARTBEAT_SECONDS", 0.1)
+    assert next(frames) == ": keep-alive\n\n"
+    frames.close()
+    assert live_updates._listeners["t"] == 0
+
+
+def test_stream_sends_diff_after_recalculation(live):
+    version = shared_cache.current_version("t")
+    frames = live_updates.stream("t", last_version=version)
+    next(frames)
+    calculate_points.recalculate_all("t")
+
+    name, new_version, data = _event(next(frames))
+    assert name == "diff"
+    assert new_version == shared_cache.current_version("t") > version
+    assert data["from_version"] == version
+    frames.close()
+
+
+def test_async_stream_starts_from_published_version(live):
+    version = shared_cache.current_version("t")
+    live_updates._async_versions["t"] = version - 1
+
+    async def _first_frames():
+        frames = live_updates.stream_async("t")
+        try:
+            return [await frames.__anext__(), await frames.__anext__()]
+        finally:
+            await frames.aclose()
+
+    retry, reset = asyncio.run(_first_frames())
+    assert retry.startswith("retry:")
+    assert _event(reset) == ("reset", version, {"version": version})
+    assert live_updates._async_versions["t"] == version
+    assert live_updates._async_listeners["t"] == 0
+
+
+def test_streams_over_cap_get_503(live, monkeypatch):
+    monkeypatch.setattr(live_updates, "MAX_STREAMS", 1)
+    open_stream = live_updates.stream("t")
+    next(open_stream)
+
+    resp = main.app.test_client().get("/t/t/fantasy/stream")
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == str(live_updates.RETRY_SECONDS)
+
+    open_stream.close()
+    assert not live_updates.streams_full()
@@ -0,0 +1,40 @@
+"""Tying scorecard player ids to roster entries (calculate_points._learn_ids)."""
+
+from calculate_points import _learn_ids, _resolve_team, _team_map
+
+
+def _scored(*players):
+    """One scored match with rows for (name, player_id) pairs."""
+    return [{"match_id": "1", "match_name": "A vs B",
+             "players": [{"player": name, "player_id": player_id} for name, player_id in players]}]
+
+
+def test_unambiguous_name_is_tied():
+    team_map = _team_map([{"player_name": "Rashid Khan", "team": "RSK"},
+                          {"player_name": "Jos Buttler", "team": "PPT"}])
+    _learn_ids(_scored(("Rashid Khan", 11), ("JC Buttler", 12)), team_map)
+
+    assert team_map["learned"] == {"rashid khan": 11}
+    assert _resolve_team("Rashid Khan", team_map, 11) == "RSK"
+
+
+def test_two_players_with_the_same_display_name():
+    team_map = _team_map([{"player_name": "Mohammad Nabi", "team": "CNI"}])
+    _learn_ids(_scored(("Mohammad Nabi", 21), ("Mohammad Nabi", 22)), team_map)
+
+    # Either could be the rostered one: neither is tied, and the name is no alias
+    assert team_map["learned"] == {}
+    assert team_map["by_id"] == {}
+    assert "mohammad nabi" not in team_map["aliases"]
+
+
+def test_player_known_under_another_spelling():
+    team_map = _team_map([{"player_name": "MS Dhoni", "team": "RSK", "player_id": 31},
+                          {"player_name": "Singh", "team": "PPT"}])
+    _learn_ids(_scored(("Mahendra Singh Dhoni", 31)), team_map)
+
+    # Already tied: the new spelling claims no other (substring-matching) entry
+    assert team_map["learned"] == {}
+    assert team_map["ids"] == {"ms dhoni": 31}
+    assert team_map["aliases"]["mahendra singh dhoni"] == 31
+    assert _resolve_team("Mahendra Singh Dhoni", team_map, 31) == "RSK"
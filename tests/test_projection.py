@@ -0,0 +1,53 @@
+"""Projection endpoint bounds and the simulation time budget."""
+
+import time
+
+import pytest
+
+import main
+import projection
+
+
+@pytest.fixture
+def client(tournament):
+    return main.app.test_client()
+
+
+@pytest.mark.parametrize("remaining", [-1, projection.MAX_REMAINING + 1])
+def test_remaining_out_of_bounds_is_rejected(client, remaining):
+    resp = client.get("/t/t/fantasy/projection?remaining={}".format(remaining))
+    assert resp.status_code == 400
+
+
+def test_remaining_at_bound_is_projected(client):
+    resp = client.get("/t/t/fantasy/projection?remaining={}&simulations=50&seed=1".format(
+        projection.MAX_REMAINING))
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["remaining_matches"] == projection.MAX_REMAINING
+    assert body["simulations"] >= 1
+
+
+def _teams(count=10, players=15, matches=74):
+    return [("team{}".format(t), 0, [[(t + p + m) % 40 for m in range(matches)]
+                                     for p in range(players)])
+            for t in range(count)]
+
+
+def test_chunk_stays_within_draw_limit():
+    teams = _teams()
+    size = projection._chunk_size(teams, projection.MAX_REMAINING)
+    assert 1 <= size < projection.CHUNK_SIMULATIONS
+    assert size * 10 * 15 * projection.MAX_REMAINING <= projection.CHUNK_DRAWS
+    assert projection._chunk_size(_teams(count=2, players=1), 1) == projection.CHUNK_SIMULATIONS
+
+
+def test_simulate_stops_at_budget():
+    budget = 0.2
+    started = time.monotonic()
+    counts, done = projection.simulate(_teams(), projection.MAX_REMAINING,
+                                       projection.MAX_SIMULATIONS, budget, seed=1, workers=1)
+    elapsed = time.monotonic() - started
+    assert 1 <= done < projection.MAX_SIMULATIONS
+    assert sum(counts[0]) == done
+    assert elapsed < budget + 0.5
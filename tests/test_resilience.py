@@ -0,0 +1,121 @@
+"""Read endpoints while the datastore is failing: shared cache, stale copies, 503s."""
+
+import asyncio
+import json
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+from starlette.requests import Request
+
+import asgi
+import main
+import resilience
+
+
+@pytest.fixture
+def client(tournament):
+    return main.app.test_client()
+
+
+def _open_breaker():
+    for _ in range(resilience.breaker.failures):
+        resilience.breaker.record_failure()
+    assert resilience.breaker.state == "open"
+
+
+def _fail_reads(monkeypatch, datastore, *names):
+    storage = datastore.get_storage()
+
+    def _down(*args, **kwargs):
+        raise ServerSelectionTimeoutError("no servers")
+    for name in names:
+        monkeypatch.setattr(storage, name, _down)
+
+
+@pytest.mark.parametrize("path", ["leaderboard", "teams", "dashboard"])
+def test_open_breaker_serves_shared_cache(client, datastore, path):
+    expected = client.get("/t/t/fantasy/" + path).get_json()
+    resilience.clear()  # nothing kept: only the shared cache can answer
+    _open_breaker()
+
+    resp = client.get("/t/t/fantasy/" + path)
+    assert resp.status_code == 200
+    assert "X-Stale" not in resp.headers
+    assert resp.get_json() == expected
+
+
+def test_open_breaker_serves_shared_cache_asgi(tournament, datastore):
+    expected = datastore.get_team_leaderboard("t")
+    _open_breaker()
+    handler = asgi._resilient(asgi.fantasy_teams, cached="teams.json")
+    request = Request({"type": "http", "method": "GET", "path": "/t/t/fantasy/teams",
+                       "query_string": b"", "headers": [], "path_params": {"slug": "t"}})
+
+    resp = asyncio.run(handler(request))
+    assert resp.status_code == 200
+    assert json.loads(resp.body) == expected
+
+
+def test_failed_read_serves_last_known_good(client, datastore, monkeypatch):
+    good = client.get("/t/t/fantasy/matches")
+    assert good.status_code == 200
+    _fail_reads(monkeypatch, datastore, "get_match_summaries")
+
+    resp = client.get("/t/t/fantasy/matches")
+    assert resp.status_code == 200
+    assert resp.headers["X-Stale"].isdigit()
+    assert resp.get_json() == good.get_json()
+
+
+def test_open_breaker_without_fallback_is_503(client, datastore, monkeypatch):
+    calls = []
+    monkeypatch.setattr(datastore.get_storage(), "get_match_summaries",
+                        lambda *args: calls.append(args))
+    _open_breaker()
+
+    resp = client.get("/t/t/fantasy/matches")
+    assert resp.status_code == 503
+    assert int(resp.headers["Retry-After"]) >= 1
+    assert calls == []  # the breaker kept the request off the datastore
+
+
+def test_failures_open_the_breaker(client, datastore, monkeypatch):
+    _fail_reads(monkeypatch, datastore, "get_match_summaries")
+    for _ in range(resilience.breaker.failures):
+        assert client.get("/t/t/fantasy/matches").status_code == 503
+    assert resilience.breaker.state == "open"
+
+
+def test_ignored_query_params_share_one_kept_copy(client, datastore, monkeypatch):
+    for n in range(20):
+        assert client.get("/t/t/fantasy/matches?_={}".format(n)).status_code == 200
+    assert len(resilience._kept) == 1
+
+    page = client.get("/t/t/fantasy/leaderboard?limit=5&cursor=5")
+    _fail_reads(monkeypatch, datastore, "get_leaderboard_page")
+    resp = client.get("/t/t/fantasy/leaderboard?cursor=5&_=1&limit=5")
+    assert resp.status_code == 200
+    assert "X-Stale" in resp.headers
+    assert resp.get_json() == page.get_json()
+    assert resp.headers["Link"] == page.headers["Link"]
+
+
+def test_ignored_query_params_still_get_the_shared_cache(client):
+    expected = client.get("/t/t/fantasy/leaderboard").get_json()
+    assert client.get("/t/t/fantasy/leaderboard?_=1").get_json() == expected
+    _open_breaker()
+
+    resp = client.get("/t/t/fantasy/leaderboard?_=2")
+    assert resp.status_code == 200
+    assert resp.get_json() == expected
+
+
+def test_ignored_query_params_share_one_kept_copy_asgi(tournament):
+    handler = asgi._resilient(asgi.fantasy_history, params=main.HISTORY_PARAMS)
+    bodies = []
+    for query in (b"kind=players&_=1", b"_=2&kind=players", b"kind=players"):
+        request = Request({"type": "http", "method": "GET", "path": "/t/t/fantasy/history",
+                           "query_string": query, "headers": [], "path_params": {"slug": "t"}})
+        bodies.append(asyncio.run(handler(request)).body)
+    assert len(resilience._kept) == 1
+    assert bodies[0] == bodies[1] == bodies[2]
@@ -0,0 +1,48 @@
+"""The per-match score cache is keyed by rule-set version, so rule changes re-score."""
+
+from calculate_points import evict_stale_scores, recalculate_all
+from scoring import DEFAULT_RULE_SET, get_rule_set
+
+RULES = {"batting": {"run": 2}, "mom": 40}
+
+
+def _hashes(datastore):
+    return [h for _, h in datastore.get_match_hashes("t")]
+
+
+def test_recalculation_caches_every_match(datastore, tournament):
+    hashes = _hashes(datastore)
+    assert len(datastore.get_match_scores(DEFAULT_RULE_SET["version"], hashes)) == len(hashes)
+
+
+def test_rule_change_rescores(datastore, tournament):
+    hashes = _hashes(datastore)
+    before = datastore.get_leaderboard("t")
+
+    datastore.set_scoring_rules("t", RULES)
+    recalculate_all("t")
+    changed = datastore.get_leaderboard("t")
+    assert changed != before
+    assert len(datastore.get_match_scores(get_rule_set(RULES)["version"], hashes)) == len(hashes)
+
+    # Same standings as scoring every match afresh under the new rules
+    datastore.evict_match_scores([])
+    recalculate_all("t")
+    assert datastore.get_leaderboard("t") == changed
+
+    # Back to the defaults: the original standings, not the custom ones
+    datastore.set_scoring_rules("t", None)
+    recalculate_all("t")
+    assert datastore.get_leaderboard("t") == before
+
+
+def test_retired_rule_sets_are_evicted(datastore, tournament):
+    hashes = _hashes(datastore)
+    custom = get_rule_set(RULES)["version"]
+    datastore.set_scoring_rules("t", RULES)
+    recalculate_all("t")
+
+    datastore.set_scoring_rules("t", None)
+    assert evict_stale_scores() == len(hashes)
+    assert datastore.get_match_scores(custom, hashes) == {}
+    assert len(datastore.get_match_scores(DEFAULT_RULE_SET["version"], hashes)) == len(hashes)
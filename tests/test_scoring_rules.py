@@ -0,0 +1,77 @@
+"""Scoring rule-set validation and compilation."""
+
+import math
+
+import pytest
+
+import scoring
+from calculate_points import score_stats, what_if
+from scoring import (
+    DEFAULT_RULE_SET, DEFAULT_RULES, calculate_batting_points, get_rule_set, validate_rules,
+)
+
+
+@pytest.mark.parametrize("doc, message", [
+    ([], "must be an object"),
+    ({"kabaddi": {}}, "unknown scoring rule 'kabaddi'"),
+    ({"batting": 5}, "'batting' must be an object"),
+    ({"batting": {"walk": 1}}, "unknown scoring rule 'batting.walk'"),
+    ({"batting": {"run": "2"}}, "'batting.run' must be a number"),
+    ({"batting": {"run": True}}, "'batting.run' must be a number"),
+    ({"batting": {"run": math.nan}}, "'batting.run' must be a number"),
+    ({"fielding": {"catch": math.inf}}, "'fielding.catch' must be a number"),
+    ({"batting": {"milestone_runs": -25}}, "'batting.milestone_runs' must be a whole number"),
+    ({"batting": {"milestone_runs": 12.5}}, "'batting.milestone_runs' must be a whole number"),
+    ({"bowling": {"wicket_bonuses": {"three": 25}}}, "'bowling.wicket_bonuses' must map"),
+    ({"bowling": {"wicket_bonuses": {"0": 25}}}, "'bowling.wicket_bonuses' must map"),
+    ({"bowling": {"wicket_bonuses": {"3": None}}}, "'bowling.wicket_bonuses' must map"),
+    ({"bowling": {"wicket_bonuses": [25]}}, "'bowling.wicket_bonuses' must map"),
+    ({"mom": "25"}, "'mom' must be a number"),
+])
+def test_bad_rule_sets_are_rejected(doc, message):
+    with pytest.raises(ValueError, match=message):
+        validate_rules(doc)
+    with pytest.raises(ValueError):
+        get_rule_set(doc)
+
+
+def test_overrides_merge_into_the_defaults():
+    rules = validate_rules({"batting": {"six": 4}, "bowling": {"wicket_bonuses": {"04": 30}}})
+    assert rules["batting"] == dict(DEFAULT_RULES["batting"], six=4)
+    assert rules["bowling"]["wicket_bonuses"] == {"4": 30}  # replaced, not merged
+    assert rules["fielding"] == DEFAULT_RULES["fielding"]
+    assert validate_rules(None) == DEFAULT_RULES
+
+
+def test_rule_sets_are_versioned_by_value():
+    assert get_rule_set(None) is DEFAULT_RULE_SET
+    assert get_rule_set({"batting": {"run": 1}})["version"] == DEFAULT_RULE_SET["version"]
+    assert get_rule_set({"batting": {"run": 2}})["version"] != DEFAULT_RULE_SET["version"]
+
+
+def test_compiled_rules_score_like_the_defaults():
+    record = {"runs": 57, "balls": 31, "fours": 5, "sixes": 3, "dismissal": "c X b Y"}
+    # 57 + 2×5 + 3×3 + 2 milestones × 10 + (57 − 31)
+    assert calculate_batting_points(record) == 57 + 10 + 9 + 20 + 26
+    doubled = get_rule_set({"batting": {"run": 2, "milestone_runs": 0}})
+    assert doubled["batting"](record) == 2 * 57 + 10 + 9 + 26
+    duck = {"runs": 0, "balls": 3, "dismissal": "b Y"}
+    assert calculate_batting_points(duck) == -3 - 10
+
+
+def test_score_stats_uses_the_rule_set():
+    stats = {"match_id": "1", "match_name": "A vs B", "players": [
+        {"player": "P", "player_id": 1, "batting": {"runs": 10, "balls": 10}, "mom": True},
+        {"player": "Q", "player_id": 2, "fielding": {"catches": 2}},
+    ]}
+    rule_set = get_rule_set({"fielding": {"catch": 20}, "mom": 50})
+    p, q = score_stats(stats, rule_set)["players"]
+    assert (p["batting_points"], p["fielding_points"], p["mom"], p["total"]) == (10, 0, 50, 60)
+    assert (q["batting_points"], q["fielding_points"], q["total"]) == (0, 40, 40)
+
+
+def test_what_if_does_not_grow_the_compiled_cache(tournament):
+    cached = len(scoring._compiled)
+    result = what_if("t", {"sixes": {"batting": {"six": 6}}, "catches": {"fielding": {"catch": 12}}})
+    assert len(result["scenarios"]) == 2
+    assert len(scoring._compiled) == cached
@@ -0,0 +1,50 @@
+"""Shared-cache responses: ETags and revalidation."""
+
+from starlette.requests import Request
+
+import asgi
+import db
+import main
+import synthetic_tournament
+from calculate_points import recalculate_all
+
+
+def _asgi_get(path, slug, **headers):
+    request = Request({"type": "http", "method": "GET", "path": path, "query_string": b"",
+                       "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+                       "path_params": {"slug": slug}})
+    return asgi._cached_response(request, slug, "leaderboard.json")
+
+
+def test_unchanged_body_revalidates(tournament):
+    client = main.app.test_client()
+    first = client.get("/t/t/fantasy/leaderboard")
+    assert first.headers["ETag"]
+
+    again = client.get("/t/t/fantasy/leaderboard", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+    resp = _asgi_get("/t/t/fantasy/leaderboard", "t", **{"If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 304
+
+
+def test_recreated_tournament_gets_a_new_etag(datastore, tournament):
+    client = main.app.test_client()
+    old = client.get("/t/t/fantasy/leaderboard")
+    version = old.headers["X-Data-Version"]
+
+    assert client.delete("/tournaments/t").status_code == 200
+    data = synthetic_tournament.generate(seed=8, matches=12)
+    datastore.create_tournament("t", "Test", data["roster"])
+    for match in data["matches"]:
+        datastore.save_match("t", dict(match))
+    recalculate_all("t")
+    assert str(db.get_data_version("t")) == version  # the counter started over
+
+    resp = client.get("/t/t/fantasy/leaderboard", headers={"If-None-Match": old.headers["ETag"]})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != old.headers["ETag"]
+    assert resp.get_json() != old.get_json()
+
+    resp = _asgi_get("/t/t/fantasy/leaderboard", "t", **{"If-None-Match": old.headers["ETag"]})
+    assert resp.status_code == 200
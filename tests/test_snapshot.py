@@ -0,0 +1,88 @@
+"""Snapshot export/import round trips, and imports that must not half-happen."""
+
+import pytest
+
+import snapshot
+
+
+def _standings(datastore, tid):
+    return (datastore.get_leaderboard(tid), datastore.get_team_leaderboard(tid),
+            datastore.get_all_player_points(tid), datastore.get_match_hashes(tid))
+
+
+def _truncated(path, tmp_path):
+    with open(path, "rb") as f:
+        data = f.read()
+    cut = tmp_path / "cut.t20snap"
+    cut.write_bytes(data[:len(data) * 2 // 3])
+    return str(cut)
+
+
+@pytest.fixture
+def snapshot_path(tournament, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "BATCH_MATCHES", 5)  # several match/stats batches
+    path = str(tmp_path / "t.t20snap")
+    snapshot.write_snapshot("t", path)
+    return path
+
+
+def test_round_trip(datastore, snapshot_path):
+    result = snapshot.import_snapshot(snapshot_path, "copy")
+
+    assert result["counts"]["matches"] == 12
+    assert _standings(datastore, "copy") == _standings(datastore, "t")
+    assert datastore.get_tournament("copy")["name"] == "Test"
+    assert datastore.get_standings_history("copy", "teams") == \
+        datastore.get_standings_history("t", "teams")
+
+
+def test_existing_tournament_needs_replace(datastore, snapshot_path):
+    with pytest.raises(ValueError, match="already exists"):
+        snapshot.import_snapshot(snapshot_path)
+
+    snapshot.import_snapshot(snapshot_path, replace=True)
+    assert [t["tournament_id"] for t in datastore.list_tournaments()] == ["t"]
+
+
+def test_truncated_replace_keeps_the_live_tournament(datastore, snapshot_path, tmp_path):
+    before = _standings(datastore, "t")
+
+    with pytest.raises(ValueError, match="truncated"):
+        snapshot.import_snapshot(_truncated(snapshot_path, tmp_path), replace=True)
+
+    assert _standings(datastore, "t") == before
+    assert [t["tournament_id"] for t in datastore.list_tournaments()] == ["t"]
+
+
+def test_truncated_import_leaves_nothing_behind(datastore, snapshot_path, tmp_path):
+    with pytest.raises(ValueError, match="truncated"):
+        snapshot.import_snapshot(_truncated(snapshot_path, tmp_path), "copy")
+    assert [t["tournament_id"] for t in datastore.list_tournaments()] == ["t"]
+
+    # Nothing half-created, so a retry with the whole file works
+    snapshot.import_snapshot(snapshot_path, "copy")
+    assert _standings(datastore, "copy") == _standings(datastore, "t")
+
+
+def test_failed_write_removes_the_partial_import(datastore, snapshot_path, monkeypatch):
+    before = _standings(datastore, "t")
+    original = snapshot._load_records
+
+    def _failing(records, tournament_id, writers):
+        def _down(tid, data):
+            raise RuntimeError("datastore went away")
+        return original(records, tournament_id, dict(writers, player_points=_down))
+    monkeypatch.setattr(snapshot, "_load_records", _failing)
+
+    with pytest.raises(RuntimeError):
+        snapshot.import_snapshot(snapshot_path, replace=True)
+    assert [t["tournament_id"] for t in datastore.list_tournaments()] == ["t"]
+    assert _standings(datastore, "t") == before
+
+
+def test_replace_without_recalculate_keeps_careers(datastore, snapshot_path):
+    before = datastore.get_player_careers(limit=1000)
+    assert before
+
+    snapshot.import_snapshot(snapshot_path, replace=True, recalculate=False)
+    assert datastore.get_player_careers(limit=1000) == before
@@ -0,0 +1,33 @@
+"""Behaviour both storage backends must share."""
+
+import synthetic_tournament
+
+
+def test_save_match_skips_unchanged_content(datastore):
+    match = synthetic_tournament.generate(seed=1, matches=1)["matches"][0]
+    datastore.create_tournament("t", "Test")
+
+    assert datastore.save_match("t", dict(match)) is True
+    stored_hash = datastore.get_match("t", match["match_id"])["content_hash"]
+
+    # Same scorecard again: nothing is written
+    assert datastore.save_match("t", dict(match)) is False
+    assert datastore.count_matches("t") == 1
+
+    changed = dict(match, match_name=match["match_name"] + " (rescheduled)")
+    assert datastore.save_match("t", changed) is True
+    stored = datastore.get_match("t", match["match_id"])
+    assert stored["match_name"] == changed["match_name"]
+    assert stored["content_hash"] != stored_hash
+    assert datastore.count_matches("t") == 1
+
+
+def test_match_hashes_follow_saves(datastore):
+    matches = synthetic_tournament.generate(seed=1, matches=3)["matches"]
+    datastore.create_tournament("t", "Test")
+    for match in matches:
+        datastore.save_match("t", dict(match))
+
+    hashes = dict(datastore.get_match_hashes("t"))
+    assert set(hashes) == {m["match_id"] for m in matches}
+    assert all(hashes.values())
@@ -350,8 +350,7 @@ showview_js_old = r"""        /* ========== View Navigation ========== */
             document.getElementById('tournamentDropdownBtn').textContent = name;
             showEl(document.getElementById('navLinks'));
             showView('main');
-            fetchTeamsData();
-            fetchLeaderboardData();
+            fetchDashboard();
             // highlight active in dropdown
             document.querySelectorAll('#tournamentDropdownMenu .dropdown-item.tournament-option').forEach(el => {
                 el.classList.toggle('active', el.dataset.slug === slug);
@@ -385,8 +384,7 @@ showview_js_new = """        /* ========== View Navigation ========== */
             document.getElementById('tournamentDropdownBtn').textContent = name;
             document.getElementById('navContent').setAttribute('style', '');
             showView('main', document.querySelector('#navLinks .nav-link'));
-            fetchTeamsData();
-            fetchLeaderboardData();
+            fetchDashboard();
             // highlight active in dropdown
             document.querySelectorAll('#tournamentDropdownMenu .dropdown-item.tournament-option').forEach(el => {
                 el.classList.toggle('active', el.dataset.slug === slug);